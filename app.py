@@ -1,5 +1,5 @@
 from quart import Quart, request, jsonify
-from modules.webhook_handler import webhook_handler
+from modules.webhook_handler import webhook_handler, process_signal
 from modules.logger_config import logger
 from modules.websocket_handler import start_websocket_listener
 from quart import Blueprint, jsonify
@@ -11,15 +11,37 @@ import hmac
 import base64
 import secrets
 from modules.admin_tools import admin_tools
+from modules.loop_monitor import monitor_event_loop_lag
+from modules.market_snapshot import run_market_snapshot
+from modules.signal_registry import signal_registry
+from modules.symbol_info import run_symbol_info_refresh
+from modules.leader_election import run_as_leader
+from modules.orphan_position_checker import run_orphan_checker
+from modules.signal_queue import run_signal_workers
 
 
 app = Quart(__name__)
 app.register_blueprint(admin_tools)
 
-# --- Launch WebSocket Listener Correctly ---
+# --- Launch background tasks; every worker consumes signals and keeps a market snapshot, WS listener + reconciler only on the leader ---
 @app.before_serving
 async def startup():
-    asyncio.create_task(start_websocket_listener())
+    app.background_tasks = [
+        asyncio.create_task(run_as_leader(start_websocket_listener, run_orphan_checker)),
+        asyncio.create_task(run_signal_workers(process_signal)),
+        asyncio.create_task(monitor_event_loop_lag()),
+        asyncio.create_task(run_market_snapshot()),
+        asyncio.create_task(signal_registry.watch()),
+        asyncio.create_task(run_symbol_info_refresh()),
+    ]
+
+
+@app.after_serving
+async def shutdown():
+    # Cancelling the leader task releases the lease so another worker takes over immediately.
+    for task in app.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.background_tasks, return_exceptions=True)
 
 
 # --- Debug Signature Endpoint ---
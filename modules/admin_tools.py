@@ -1,6 +1,19 @@
+from modules import metrics
+from modules.candle_store import candle_store
+from modules.market_snapshot import market_snapshot
+from modules.signal_registry import signal_registry
+from modules.symbol_info import symbol_info
+from modules.circuit_breaker import get_breaker_status
+from modules.config import RECON_DRY_RUN
+from modules.leader_election import get_leader_status
+from modules.loop_monitor import get_loop_health, reset_loop_health
+from modules.order_book import order_book
+from modules.rate_limiter import get_rate_limit_status
 from modules.redis_client import get_redis
+from modules.signal_queue import get_queue_status
 from modules.orphan_position_checker import check_orphaned_positions
-from quart import Blueprint, jsonify, request
+from modules.ws_manager import ws_manager
+from quart import Blueprint, jsonify, request, Response
 import json
 
 admin_tools = Blueprint("admin_tools", __name__)
@@ -104,5 +117,101 @@ async def delete_key(key):
 
 @admin_tools.route("/position_recon", methods=["GET"])
 async def run_orphan_check():
-    """Sync check to run orphan recovery manually from CLI or admin UI"""
-    await check_orphaned_positions()
+    """Run orphan recovery now; ``?dry_run=1`` only reports diffs, ``?symbol=`` limits it to some symbols.
+
+    Symbols the leader's loop is reconciling at the same time come back as ``deferred``.
+    """
+    symbols = request.args.get("symbol")
+    report = await check_orphaned_positions(
+        symbols={symbol.strip().upper() for symbol in symbols.split(",")} if symbols else None,
+        dry_run=RECON_DRY_RUN or request.args.get("dry_run") == "1",
+    )
+    return jsonify(report), 200 if report["ok"] else 502
+
+
+@admin_tools.route("/debug/metrics", methods=["GET"])
+async def get_metrics():
+    return jsonify(metrics.snapshot()), 200
+
+
+@admin_tools.route("/debug/metrics/reset", methods=["POST"])
+async def reset_metrics():
+    metrics.reset()
+    return jsonify({"status": "reset"}), 200
+
+
+@admin_tools.route("/metrics", methods=["GET"])
+async def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@admin_tools.route("/debug/loop-health", methods=["GET"])
+async def loop_health():
+    """Event-loop lag percentiles and recent blocking callbacks with their stacks."""
+    return jsonify(get_loop_health()), 200
+
+
+@admin_tools.route("/debug/loop-health", methods=["DELETE"])
+async def clear_loop_health():
+    reset_loop_health()
+    return jsonify({"status": "cleared"}), 200
+
+
+@admin_tools.route("/debug/leader", methods=["GET"])
+async def leader_status():
+    """Which worker holds the leader lease (WS listener + reconciler) and whether it is this one."""
+    return jsonify(await get_leader_status()), 200
+
+
+@admin_tools.route("/debug/signal-queue", methods=["GET"])
+async def signal_queue_status():
+    """Stream backlog and per-consumer pending counts for the signal queue."""
+    return jsonify(await get_queue_status()), 200
+
+
+@admin_tools.route("/debug/rate-limits", methods=["GET"])
+async def rate_limit_status():
+    """Current per-endpoint-class token buckets (rate after throttling, tokens, waiters)."""
+    return jsonify(get_rate_limit_status()), 200
+
+
+@admin_tools.route("/debug/breakers", methods=["GET"])
+async def breaker_status():
+    """Circuit breaker state per dependency and whether new entries are currently refused."""
+    return jsonify(get_breaker_status()), 200
+
+
+@admin_tools.route("/debug/order-book", methods=["GET"])
+async def order_book_status():
+    """Whether this worker's local order book is live, and resting orders / TP-SLs per symbol."""
+    return jsonify(order_book.status()), 200
+
+
+@admin_tools.route("/debug/candles", methods=["GET"])
+async def candle_store_status():
+    """Candles held per symbol/interval in this worker's candle store and when each was refreshed."""
+    return jsonify(candle_store.status()), 200
+
+
+@admin_tools.route("/debug/market-snapshot", methods=["GET"])
+async def market_snapshot_status():
+    """Age of this worker's market snapshot, the symbols it refreshes and their mark prices."""
+    return jsonify(market_snapshot.status()), 200
+
+
+@admin_tools.route("/debug/signals", methods=["GET"])
+async def signal_registry_status():
+    """Signal validations in flight on this worker and whether a newer signal superseded them."""
+    return jsonify(signal_registry.status()), 200
+
+
+@admin_tools.route("/debug/symbols", methods=["GET"])
+async def symbol_info_status():
+    """Trading-pair precision and order limits used to round order payloads."""
+    return jsonify(symbol_info.status()), 200
+
+
+@admin_tools.route("/debug/ws", methods=["GET"])
+async def ws_status():
+    """Per-connection subscriptions, message rate, backlog and reconnects (leader only)."""
+    return jsonify(ws_manager.status()), 200
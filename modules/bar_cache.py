@@ -0,0 +1,67 @@
+"""
+Per-bar memoization for signal validation.
+
+Duplicate alerts, or several strategies firing on the same symbol and bar, ask
+the same questions: what did the bar close at, and what is the conviction
+score. ``BarCache`` keeps one result per key until the bar it belongs to has
+rolled over. Callers that arrive while the first computation is still running
+await the same task instead of starting their own, so every repeat on a bar is
+free. Failures are not cached.
+
+Hits and misses are counted in ``bar_cache{cache=...,result=hit|miss}``.
+"""
+import asyncio
+import time
+
+from modules import metrics
+from modules.config import BAR_CACHE_MAX_ENTRIES
+
+
+class BarCache:
+    def __init__(self, name: str, max_entries: int = BAR_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (expires_at epoch seconds, task)
+
+    def _evict(self, now: float):
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    async def get(self, key, expires_at: float, compute, keep=None):
+        """
+        Result of ``compute()`` for ``key``, computed at most once until ``expires_at``.
+        ``keep(result)`` returning False hands the result back without caching it.
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            metrics.incr("bar_cache", cache=self.name, result="hit")
+            return await asyncio.shield(entry[1])
+
+        metrics.incr("bar_cache", cache=self.name, result="miss")
+        self._evict(now)
+        task = asyncio.ensure_future(compute())
+        self._entries[key] = (expires_at, task)
+        # On the task, not the caller: the caller may be cancelled while the task runs on.
+        task.add_done_callback(lambda done: self._settled(key, done, keep))
+        metrics.set_gauge("bar_cache_entries", len(self._entries), cache=self.name)
+        # Shielded: a cancelled caller must not cancel the result others are waiting on.
+        return await asyncio.shield(task)
+
+    def _settled(self, key, task, keep):
+        if task.cancelled() or task.exception() is not None or (keep is not None and not keep(task.result())):
+            self._forget(key, task)
+
+    def _forget(self, key, task):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is task:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+close_price_cache = BarCache("close_price")
+conviction_cache = BarCache("conviction")
@@ -0,0 +1,128 @@
+"""
+Single entry point for Bitunix REST calls.
+
+Signs private requests, takes a token from the rate-limit bucket of the
+endpoint class at the caller's priority, sends over a pooled connection and
+feeds throttling signals back into the bucket. Returns the ``httpx.Response``
+so callers keep their own ``raise_for_status()`` / payload handling.
+
+``content`` is an already serialized JSON body (see ``order_templates``); it
+is sent and signed as is, instead of serializing ``body``.
+
+With ``retry`` set, the call is repeated under that policy (fresh nonce and
+token each attempt); see ``retry_policy`` for which failures qualify.
+
+Transport errors and 5xx count against the endpoint class's circuit breaker.
+While it is open calls raise ``CircuitOpenError`` at once, except
+``PRIORITY_CRITICAL`` ones (stop moves, closes), which are always attempted.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import secrets
+import time
+
+import httpx
+
+from modules.circuit_breaker import get_breaker
+from modules.config import API_KEY, API_SECRET, BASE_URL
+from modules.rate_limiter import endpoint_class, get_bucket, PRIORITY_CRITICAL, PRIORITY_QUERY
+from modules.retry_policy import RATE_LIMIT_CODES, RetryPolicy, request_with_retry
+
+_clients = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    # One pooled client per event loop (one per worker process in production).
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(base_url=BASE_URL, limits=httpx.Limits(max_connections=50))
+        _clients[loop] = client
+    return client
+
+
+def sign_get(nonce: str, timestamp: str, params: dict) -> str:
+    from modules.utils import generate_get_sign_api
+    return generate_get_sign_api(nonce, timestamp, "get", params)
+
+
+def sign_post(nonce: str, timestamp: str, body_json: str) -> str:
+    digest = hashlib.sha256((nonce + timestamp + API_KEY + body_json).encode('utf-8')).hexdigest()
+    return hashlib.sha256((digest + API_SECRET).encode('utf-8')).hexdigest()
+
+
+def _auth_headers(sign: str, nonce: str, timestamp: str) -> dict:
+    return {
+        "api-key": API_KEY,
+        "sign": sign,
+        "nonce": nonce,
+        "timestamp": timestamp,
+        "language": "en-US",
+        "Content-Type": "application/json",
+    }
+
+
+def _retry_after(response: httpx.Response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _is_throttled(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        return True
+    try:
+        return response.json().get("code") in RATE_LIMIT_CODES
+    except (ValueError, AttributeError):
+        return False
+
+
+async def bitunix_request(method: str, path: str, params: dict = None, body: dict = None,
+                          signed: bool = True, priority: int = PRIORITY_QUERY, timeout: float = 10.0,
+                          retry: RetryPolicy = None, recover=None, content: str = None) -> httpx.Response:
+    if content is None and body is not None:
+        content = json.dumps(body, separators=(',', ':'))
+
+    async def send():
+        return await _send_once(method, path, params, content, signed, priority, timeout)
+
+    if retry is None:
+        return await send()
+    return await request_with_retry(send, retry, f"{method.upper()} {path}", recover=recover)
+
+
+async def _send_once(method: str, path: str, params: dict, content: str, signed: bool, priority: int,
+                     timeout: float) -> httpx.Response:
+    breaker = get_breaker(f"bitunix_{endpoint_class(path)}")
+    breaker.check(force=priority == PRIORITY_CRITICAL)
+    bucket = get_bucket(path)
+    await bucket.acquire(priority)
+
+    headers = {}
+    if signed:
+        nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
+        timestamp = str(int(time.time() * 1000))
+        sign = sign_post(nonce, timestamp, content) if content is not None else sign_get(nonce, timestamp, params)
+        headers = _auth_headers(sign, nonce, timestamp)
+
+    try:
+        response = await _get_client().request(method.upper(), path, params=params, content=content,
+                                               headers=headers, timeout=timeout)
+    except httpx.TransportError as e:
+        breaker.failure(e)
+        raise
+    if response.status_code >= 500:
+        breaker.failure(f"HTTP {response.status_code}")
+    else:
+        breaker.success()
+    if _is_throttled(response):
+        bucket.penalize(_retry_after(response))
+    else:
+        bucket.reward()
+    return response
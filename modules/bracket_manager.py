@@ -0,0 +1,271 @@
+"""
+Per-position TP ladder and SL, driven as a state machine.
+
+A position's bracket is its SL, the TP ladder (``TP1``..``TP4``, sized by
+``TP_DISTRIBUTION``) and, after a limit scale-in, the accumulation TP (``ACC``)
+at the entry price. Each transition works out the whole target bracket:
+
+==============  ===========  =====================================================
+transition      phase after  target
+==============  ===========  =====================================================
+``open``        OPEN         SL at the signal stop, full TP ladder on the filled qty
+``scale_in``    (unchanged)  SL resized; ladder resized (market entry) or ACC
+                             placed/resized (limit entry)
+``acc_hit``     (unchanged)  ACC gone, pending entries cancelled
+``tp_hit``      BREAKEVEN /  TP gone, SL to breakeven (TP1) or the previous TP
+                TRAILING     (later TPs); TP1 also cancels pending entries
+``close``       CLOSED       nothing left; pending entries cancelled
+``restore``     (unchanged)  missing legs re-placed from the state (reconciler)
+==============  ===========  =====================================================
+
+The price/qty last sent for each leg is kept in ``state["bracket"]`` as the
+exchange strings. Only legs whose target differs are sent: a leg without an
+order id is placed, a changed one modified, an unchanged one skipped. A
+transition's operations go out together, and a leg is only recorded once its
+call succeeded, so a failed one is retried by the next transition. Order ids
+stay in ``sl_order_id`` / ``tp_orders`` / ``tp_acc_zone_id``. Callers persist
+the state.
+
+Operations are counted in ``bracket_ops{op=place|modify|skip|cancel_entries,result}``.
+"""
+import asyncio
+
+from modules import metrics
+from modules.config import TP_DISTRIBUTION
+from modules.logger_config import logger
+from modules.symbol_info import symbol_info, format_price, format_qty
+from modules.utils import place_tp_sl_order_async, update_tp_quantity, update_sl_price, cancel_all_new_orders
+
+SL, ACC = "SL", "ACC"
+OPEN, BREAKEVEN, TRAILING, CLOSED = "OPEN", "BREAKEVEN", "TRAILING", "CLOSED"
+CANCEL_ENTRIES = {"op": "cancel_entries"}
+
+
+def compute_breakeven_sl(direction: str, step: int, entry: float, tps: list) -> float:
+    """SL price to move to once the TP at index ``step`` has filled."""
+    trigger_price = float(tps[step])
+    if step == 0 and entry != 0:
+        if direction == "BUY":
+            return entry - (3 / 7) * ((trigger_price - entry) * 0.2)
+        return entry + (3 / 7) * ((entry - trigger_price) * 0.2)
+    return tps[step - 1]
+
+
+def tp_ladder(symbol: str, tps: list, qty: float, start: int = 0) -> dict:
+    """TP legs from index ``start`` on, sized on ``qty``: label -> (price, qty).
+
+    Empty TP prices and legs below the minimum order size are skipped: raising them to the
+    minimum could make the ladder add up to more than the position.
+    """
+    info = symbol_info.get(symbol)
+    legs = {f"TP{i + 1}": (tps[i], info.tradable_qty(qty * TP_DISTRIBUTION[i]))
+            for i in range(start, min(len(tps), len(TP_DISTRIBUTION))) if tps[i]}
+    return {leg: price_qty for leg, price_qty in legs.items() if price_qty[1]}
+
+
+def _order_id(state: dict, leg: str):
+    if leg == SL:
+        return state.get("sl_order_id")
+    if leg == ACC:
+        return state.get("tp_acc_zone_id") or None
+    tp_orders = state.get("tp_orders")
+    # States rebuilt by older versions only have a list of ids, which says nothing about which TP is which.
+    return tp_orders.get(leg) if isinstance(tp_orders, dict) else None
+
+
+def _set_order_id(state: dict, leg: str, order_id):
+    if leg == SL:
+        state["sl_order_id"] = order_id
+    elif leg == ACC:
+        state["tp_acc_zone_id"] = order_id
+    else:
+        if not isinstance(state.get("tp_orders"), dict):
+            state["tp_orders"] = {}
+        state["tp_orders"][leg] = order_id
+
+
+def _label_live_tps(symbol: str, state: dict, orders: list):
+    """Rebuilt states keep a list of TP ids: label the live ones by matching ``tpPrice`` to the unfilled ladder.
+
+    Returns label -> order, or None when an order matches no TP (or two match the same one).
+    """
+    step = state.get("step", 0)
+    labels = {format_price(symbol, price): f"TP{i + 1}"
+              for i, price in enumerate(state.get("tps", [])) if i >= step and price}
+    labelled = {}
+    for o in orders:
+        leg = labels.get(format_price(symbol, o.get("tpPrice") or 0))
+        if not leg or leg in labelled:
+            return None
+        labelled[leg] = o
+    return labelled
+
+
+def _forget_missing(symbol: str, state: dict, live_orders: list) -> bool:
+    """
+    Drop the order ids, and the legs last sent, of orders that are not in ``live_orders``.
+
+    Kept TP legs nothing was recorded for are recorded as the exchange has them. Returns False
+    if a live TP order cannot be tied to a ladder leg; its TPs must then be left alone.
+    """
+    live = {str(o["id"]): o for o in live_orders}
+    sent = state.get("bracket") or {}
+    if str(state.get("sl_order_id")) not in live:
+        state.pop("sl_order_id", None)
+    if state.get("tp_acc_zone_id") and str(state["tp_acc_zone_id"]) not in live:
+        state["tp_acc_zone_id"] = ""
+    tp_orders = state.get("tp_orders")
+    if isinstance(tp_orders, dict):
+        kept = {leg: live[str(order_id)] for leg, order_id in tp_orders.items() if str(order_id) in live}
+    else:
+        kept = _label_live_tps(symbol, state, [live[str(i)] for i in tp_orders or [] if str(i) in live])
+    live_legs = {SL} if state.get("sl_order_id") else set()
+    live_legs |= set(kept or {}) | ({ACC} if state.get("tp_acc_zone_id") else set())
+    state["bracket"] = {leg: value for leg, value in sent.items() if leg in live_legs}
+    if kept is None:
+        return False
+    state["tp_orders"] = {leg: o["id"] for leg, o in kept.items()}
+    for leg, o in kept.items():
+        state["bracket"].setdefault(leg, [format_price(symbol, o["tpPrice"]), format_qty(symbol, o["tpQty"])])
+    known = {str(order_id) for order_id in state["tp_orders"].values()} | {str(state.get("tp_acc_zone_id"))}
+    return all(order_id in known for order_id, o in live.items() if o.get("tpPrice") not in (None, ""))
+
+
+class BracketManager:
+    def plan(self, symbol: str, state: dict, target: dict) -> list:
+        """Operations taking the bracket last sent (``state["bracket"]``) to ``target`` (leg -> (price, qty))."""
+        sent = state.get("bracket") or {}
+        ops = []
+        for leg, (price, qty) in target.items():
+            order_id = _order_id(state, leg)
+            if not order_id:
+                ops.append({"op": "place", "leg": leg, "price": price, "qty": qty})
+            elif sent.get(leg) != [format_price(symbol, price), format_qty(symbol, qty)]:
+                ops.append({"op": "modify", "leg": leg, "price": price, "qty": qty, "order_id": order_id})
+            else:
+                metrics.incr("bracket_ops", op="skip", result="ok")
+        return ops
+
+    async def _apply(self, transition: str, symbol: str, direction: str, position_id, state: dict, ops: list):
+        log_extra = {"symbol": symbol, "direction": direction, "interval": state.get("interval", "")}
+        logger.info(f"[BRACKET] {symbol} {direction} {transition} ({state.get('bracket_phase')}): "
+                    f"{[{k: v for k, v in op.items() if k != 'order_id'} for op in ops] or 'no changes'}",
+                    extra=log_extra)
+        sent = state.setdefault("bracket", {})
+
+        async def run(op):
+            leg, sent_price = op.get("leg"), None
+            if op["op"] == "cancel_entries":
+                await cancel_all_new_orders(symbol, direction)
+                ok = True
+            elif op["op"] == "place":
+                if leg == SL:
+                    order_id = await place_tp_sl_order_async(symbol, tp_price=None, sl_price=op["price"],
+                                                             position_id=position_id, tp_qty=None, qty=op["qty"])
+                else:
+                    order_id = await place_tp_sl_order_async(symbol, tp_price=op["price"], sl_price=None,
+                                                             position_id=position_id, tp_qty=op["qty"],
+                                                             qty=op["qty"])
+                ok = bool(order_id)
+                if ok:
+                    _set_order_id(state, leg, order_id)
+            elif leg == SL:
+                sent_price = await update_sl_price(op["order_id"], direction, symbol, op["price"], op["qty"])
+                ok = sent_price is not None
+            else:
+                ok = await update_tp_quantity(op["order_id"], symbol, op["qty"], op["price"])
+            if ok and leg:
+                sent[leg] = [sent_price or format_price(symbol, op["price"]), format_qty(symbol, op["qty"])]
+            metrics.incr("bracket_ops", op=op["op"], result="ok" if ok else "failed")
+
+        results = await asyncio.gather(*(run(op) for op in ops), return_exceptions=True)
+        for op, result in zip(ops, results):
+            if isinstance(result, Exception):
+                metrics.incr("bracket_ops", op=op["op"], result="failed")
+                logger.error(f"[BRACKET] {symbol} {direction} {transition} {op['op']} {op.get('leg', '')} "
+                             f"failed: {result}", extra=log_extra)
+
+    async def open(self, symbol: str, direction: str, position_id, state: dict, qty: float):
+        """Position filled: SL and the full ladder, all new orders."""
+        state["bracket"], state["tp_orders"] = {}, {}
+        state.pop("sl_order_id", None)
+        state["bracket_phase"] = OPEN
+        target = {SL: (state["stop_loss"], qty), **tp_ladder(symbol, state.get("tps", []), qty)}
+        await self._apply("open", symbol, direction, position_id, state,
+                          self.plan(symbol, state, target))
+
+    async def scale_in(self, symbol: str, direction: str, position_id, state: dict, new_qty: float):
+        """Position grew: resize the SL, and the open TPs (market entry) or the accumulation TP (limit entry)."""
+        target = {SL: (state["stop_loss"], new_qty)}
+        if state.get("order_type", "market") == "market":
+            ladder = tp_ladder(symbol, state.get("tps", []), new_qty, start=state.get("step", 0))
+            target.update({leg: price_qty for leg, price_qty in ladder.items() if _order_id(state, leg)})
+            state["order_type"] = "limit"
+        else:
+            acc_qty = symbol_info.get(symbol).tradable_qty(new_qty - state.get("revised_qty", 0))
+            if acc_qty:
+                target[ACC] = (state.get("entry_price", 0), acc_qty)
+        await self._apply("scale_in", symbol, direction, position_id, state,
+                          self.plan(symbol, state, target))
+
+    async def acc_hit(self, symbol: str, direction: str, position_id, state: dict):
+        """Accumulation TP filled: the scaled-in part is out, drop the remaining entry orders."""
+        state["tp_acc_zone_id"] = ""
+        state.get("bracket", {}).pop(ACC, None)
+        await self._apply("acc_hit", symbol, direction, position_id, state, [CANCEL_ENTRIES])
+
+    async def tp_hit(self, symbol: str, direction: str, position_id, state: dict):
+        """Next TP of the ladder filled: SL to breakeven after TP1, to the previous TP after later ones."""
+        tps = state.get("tps", [])
+        step = state.get("step", 0)
+        old_qty = float(state.get("total_qty", 0))
+        next_step = step + 1
+        new_qty = round(old_qty - sum(TP_DISTRIBUTION[:next_step]) * old_qty, 3)
+        entry = float(state.get("entry_price", 0))
+        try:
+            new_sl = compute_breakeven_sl(direction, step, entry, tps)
+        except Exception:
+            logger.info("[TP LEVEL 1 Beakeven calculation error]",
+                        extra={"symbol": symbol, "direction": direction, "interval": state.get("interval", "")})
+            new_sl = entry if step == 0 else tps[max(step - 1, 0)]
+        logger.info(f"[BREAKEVEN SL] {symbol} {direction} step={step} → SL={new_sl}",
+                    extra={"symbol": symbol, "direction": direction, "interval": state.get("interval", "")})
+
+        state["step"] = next_step
+        # scale_in / restore build the SL from stop_loss: it has to follow the move.
+        state["stop_loss"] = new_sl
+        state["bracket_phase"] = BREAKEVEN if step == 0 else TRAILING
+        state.get("bracket", {}).pop(f"TP{next_step}", None)
+        ops = [CANCEL_ENTRIES] if step == 0 else []
+        await self._apply("tp_hit", symbol, direction, position_id, state,
+                          ops + self.plan(symbol, state, {SL: (new_sl, new_qty)}))
+
+    async def close(self, symbol: str, direction: str, position_id, state: dict):
+        """Position closed: the exchange drops its TP/SL, only pending entries are left to cancel."""
+        state["bracket"] = {}
+        state["bracket_phase"] = CLOSED
+        await self._apply("close", symbol, direction, position_id, state, [CANCEL_ENTRIES])
+
+    async def restore(self, symbol: str, direction: str, position_id, state: dict, qty: float,
+                      dry_run: bool = False, live_orders: list = ()) -> list:
+        """TP/SL orders missing on the exchange: place the SL and the unfilled ladder again. Returns the plan.
+
+        Legs still among ``live_orders`` (the position's pending TP/SL orders) are kept rather than
+        placed twice. If a live TP cannot be tied to a ladder leg, only the SL is restored. The SL
+        keeps the qty last sent, which ``tp_hit`` lowers below ``qty``.
+        """
+        sent_sl = (state.get("bracket") or {}).get(SL)
+        sl_qty = float(sent_sl[1]) if sent_sl else qty
+        target = {SL: (state.get("stop_loss"), sl_qty)}
+        if _forget_missing(symbol, state, list(live_orders)):
+            target.update(tp_ladder(symbol, state.get("tps", []), qty, start=state.get("step", 0)))
+        else:
+            logger.warning(f"[BRACKET] {symbol} {direction} live TPs not on the ladder, restoring the SL only",
+                           extra={"symbol": symbol, "direction": direction, "interval": state.get("interval", "")})
+        ops = self.plan(symbol, state, target)
+        if not dry_run:
+            await self._apply("restore", symbol, direction, position_id, state, ops)
+        return ops
+
+
+bracket_manager = BracketManager()
@@ -0,0 +1,142 @@
+"""
+Rolling in-process OHLCV store, one fixed-size NumPy ring buffer per (symbol, interval).
+
+The market filters read their klines from here instead of each downloading
+the last N bars. A ring is filled once with ``CANDLE_STORE_FILL`` bars; after
+that a refresh asks only for the bars since the last stored one (at least the
+still-forming bar), and not at all while the ring was refreshed within
+``CANDLE_REFRESH_SEC``. Concurrent readers of the same key share one fetch.
+
+Every candle is written twice, at ``slot`` and ``slot + capacity``, so the
+last ``n`` bars are always one contiguous slice: ``window`` returns a view,
+not a copy. A view is only valid until the next ``await`` (a refresh may write
+through it), so read it straight away and copy whatever you keep.
+"""
+import asyncio
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.config import CANDLE_STORE_SIZE, CANDLE_STORE_FILL, CANDLE_REFRESH_SEC
+from modules.logger_config import logger
+from modules.rate_limiter import PRIORITY_MARKET
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(COLUMNS))
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "1d": 86_400_000,
+}
+
+
+class CandleRing:
+    """Last ``capacity`` candles of one (symbol, interval), oldest first in every window."""
+
+    __slots__ = ("capacity", "data", "size", "head", "refreshed_at", "complete")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros((len(COLUMNS), 2 * capacity), dtype=np.float64)
+        self.size = 0
+        self.head = 0  # next slot to write
+        self.refreshed_at = 0.0
+        self.complete = False  # a fill returned fewer bars than asked: this is all the history there is
+
+    @property
+    def last_time(self) -> float:
+        return self.data[TIME, self.head - 1 + self.capacity] if self.size else -1.0
+
+    def _write(self, slot: int, row: np.ndarray):
+        self.data[:, slot] = row
+        self.data[:, slot + self.capacity] = row
+
+    def update(self, rows: np.ndarray):
+        """Apply candles (rows of ``COLUMNS``, oldest first): the forming bar is overwritten, newer ones appended."""
+        for row in rows:
+            last = self.last_time
+            if row[TIME] == last:
+                self._write((self.head - 1) % self.capacity, row)
+            elif row[TIME] > last:
+                self._write(self.head, row)
+                self.head = (self.head + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+
+    def window(self, n: int) -> np.ndarray:
+        """View of the last ``n`` candles, shape (len(COLUMNS), n); rows index with TIME..VOLUME."""
+        n = min(n, self.size)
+        end = self.head + self.capacity
+        return self.data[:, end - n:end]
+
+
+def _rows(klines: list) -> np.ndarray:
+    rows = np.array([[c["time"], c["open"], c["high"], c["low"], c["close"], c.get("baseVol", c.get("volume", 0))]
+                     for c in klines], dtype=np.float64).reshape(-1, len(COLUMNS))
+    return rows[np.argsort(rows[:, TIME], kind="stable")]
+
+
+class CandleStore:
+    def __init__(self, capacity: int = CANDLE_STORE_SIZE, fill: int = CANDLE_STORE_FILL,
+                 max_age: float = CANDLE_REFRESH_SEC):
+        self.capacity = capacity
+        self.fill = min(fill, capacity)
+        self.max_age = max_age
+        self.rings = {}
+        self._locks = defaultdict(asyncio.Lock)
+
+    def feed(self, symbol: str, interval: str, klines: list):
+        """Apply klines from any source (REST page, WS kline push) to the ring."""
+        key = (symbol.upper(), interval)
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = CandleRing(self.capacity)
+        ring.update(_rows(klines))
+        return ring
+
+    async def refresh(self, symbol: str, interval: str, bars: int, max_age: float = None):
+        """Make sure the ring holds the last ``bars`` candles, fetching only what is missing."""
+        key = (symbol.upper(), interval)
+        max_age = self.max_age if max_age is None else max_age
+        async with self._locks[key]:
+            ring = self.rings.get(key)
+            enough = ring is not None and (ring.size >= bars or ring.complete)
+            if enough and time.monotonic() - ring.refreshed_at < max_age:
+                metrics.incr("candle_store_reads", source="cache")
+                return ring
+            behind = int((time.time() * 1000 - ring.last_time) // INTERVAL_MS.get(interval, 60_000)) \
+                if ring is not None else 0
+            # Rings only grow forward, so too short a history (or too long a gap) means starting over.
+            full = not enough or behind >= self.capacity
+            limit = max(bars, self.fill) if full else max(behind + 1, 1)  # the forming bar is always re-read
+            response = await bitunix_request("get", "/api/v1/futures/market/kline",
+                                             params={"symbol": key[0], "interval": interval, "limit": limit},
+                                             signed=False, priority=PRIORITY_MARKET, timeout=5.0)
+            response.raise_for_status()
+            klines = response.json().get("data") or []
+            if not isinstance(klines, list):
+                raise ValueError("Invalid kline data received")
+            if full:
+                self.rings.pop(key, None)
+            metrics.incr("candle_store_reads", source="fill" if full else "incremental")
+            ring = self.feed(key[0], interval, klines)
+            ring.refreshed_at = time.monotonic()
+            if full:
+                ring.complete = len(klines) < limit
+            return ring
+
+    async def window(self, symbol: str, interval: str, bars: int, max_age: float = None) -> np.ndarray:
+        """Last ``bars`` candles as a zero-copy view (see the module docstring)."""
+        ring = await self.refresh(symbol, interval, bars, max_age)
+        if ring.size < bars:
+            logger.warning(f"[CANDLE STORE] {symbol} {interval}: only {ring.size}/{bars} candles available")
+        return ring.window(bars)
+
+    def status(self) -> dict:
+        return {f"{symbol}:{interval}": {"candles": ring.size,
+                                         "age_sec": round(time.monotonic() - ring.refreshed_at, 1)}
+                for (symbol, interval), ring in self.rings.items()}
+
+
+candle_store = CandleStore()
@@ -0,0 +1,142 @@
+"""
+Circuit breakers for the bot's external dependencies.
+
+A breaker counts consecutive failures of one dependency (each Bitunix endpoint
+class, Redis, Postgres). After ``BREAKER_FAILURE_THRESHOLD`` of them it opens
+and calls fail immediately with ``CircuitOpenError`` instead of each waiting
+out a 5-10s timeout. After ``BREAKER_RESET_SEC`` a single probe is let
+through (half-open); its success closes the breaker, its failure re-opens it.
+
+Degraded mode while a breaker is open:
+
+* ``bitunix_trade`` / ``redis`` - new entries are refused (``entries_blocked``);
+  stop-loss moves and closes (``PRIORITY_CRITICAL``) still go to the exchange.
+* ``bitunix_market`` - mark prices come from the last cached value.
+* ``postgres`` - Redis stays the source of truth and mirroring is skipped.
+"""
+import time
+
+import httpx
+
+from modules import metrics
+from modules.config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SEC
+from modules.logger_config import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """
+    A ``TransportError`` so the ``except httpx.HTTPError`` around every Bitunix call
+    treats a refused call like an unreachable exchange. Never retried
+    (``retry_policy`` classifies it as fatal).
+    """
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, next probe in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SEC):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.last_error = None
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"[BREAKER] {self.name} {self.state} -> {state}"
+                           + (f" ({self.last_error})" if state == OPEN else ""))
+            metrics.incr("breaker_transitions", breaker=self.name, state=state)
+        self.state = state
+        metrics.set_gauge("breaker_state", _STATE_VALUES[state], breaker=self.name)
+
+    def allow(self, force: bool = False) -> bool:
+        """Whether a call may go out now; ``force`` lets critical calls through an open breaker."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        # One probe at a time; a probe that never reported back (cancelled) is replaced after a while.
+        if self.state == HALF_OPEN and (self.probe_started is None or
+                                        now - self.probe_started >= self.reset_timeout):
+            self.probe_started = now
+            return True
+        return force
+
+    def check(self, force: bool = False):
+        if not self.allow(force):
+            metrics.incr("breaker_rejected", breaker=self.name)
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def retry_in(self) -> float:
+        if self.state == CLOSED:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def success(self):
+        self.failures = 0
+        self.probe_started = None
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def failure(self, error):
+        self.failures += 1
+        self.probe_started = None
+        self.last_error = str(error) or type(error).__name__
+        metrics.incr("breaker_failures", breaker=self.name)
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    @property
+    def is_open(self) -> bool:
+        """Open and not yet due for a probe (a due probe may be the next ordinary call)."""
+        return self.state == OPEN and self.retry_in() > 0
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in_sec": round(self.retry_in(), 3),
+            "last_error": self.last_error,
+        }
+
+
+BREAKERS = {name: CircuitBreaker(name) for name in (
+    "bitunix_trade", "bitunix_tpsl", "bitunix_account", "bitunix_market", "redis", "postgres",
+)}
+
+# Breakers that, while open, make it unsafe to open new positions.
+ENTRY_DEPENDENCIES = ("bitunix_trade", "redis")
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return BREAKERS[name]
+
+
+def entries_blocked() -> str:
+    """Name of the open breaker that rules out new entries, or an empty string."""
+    for name in ENTRY_DEPENDENCIES:
+        if BREAKERS[name].is_open:
+            return name
+    return ""
+
+
+def get_breaker_status() -> dict:
+    return {
+        "entries_blocked_by": entries_blocked() or None,
+        "breakers": {name: breaker.status() for name, breaker in BREAKERS.items()},
+    }
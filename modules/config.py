@@ -2,7 +2,77 @@ import os
 
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
-BASE_URL = 'https://fapi.bitunix.com'
+# Override both to point the bot at a local exchange simulator
+BASE_URL = os.getenv("BITUNIX_BASE_URL", 'https://fapi.bitunix.com')
+WS_URL = os.getenv("BITUNIX_WS_URL", 'wss://fapi.bitunix.com/private/')
+# WS reconnects back off exponentially (full jitter) from BASE up to MAX seconds
+WS_RECONNECT_BASE_SEC = float(os.getenv("WS_RECONNECT_BASE_SEC", 1))
+WS_RECONNECT_MAX_SEC = float(os.getenv("WS_RECONNECT_MAX_SEC", 60))
+# Public market-data WS: symbol subscriptions per connection (more spill onto a new one), per-connection
+# message backlog (oldest dropped when full), and how long a streamed mark price is used instead of REST
+WS_PUBLIC_URL = os.getenv("BITUNIX_WS_PUBLIC_URL", 'wss://fapi.bitunix.com/public/')
+WS_PUBLIC_MAX_SUBS = int(os.getenv("WS_PUBLIC_MAX_SUBS", 50))
+WS_PUBLIC_QUEUE_SIZE = int(os.getenv("WS_PUBLIC_QUEUE_SIZE", 1000))
+WS_PRICE_MAX_AGE = float(os.getenv("WS_PRICE_MAX_AGE", 5))
+# Skip database bootstrap at import (replay / offline tooling)
+OFFLINE_MODE = os.getenv("OFFLINE_MODE", "0") == "1"
+# Only the worker holding the leader lease runs the WS listener and reconciler
+LEADER_LEASE_SEC = float(os.getenv("LEADER_LEASE_SEC", 15))
+ORPHAN_CHECK_INTERVAL = int(os.getenv("ORPHAN_CHECK_INTERVAL", 300))  # seconds between full sweeps
+# Symbols touched by WS events are reconciled every ORPHAN_DIRTY_INTERVAL seconds, once quiet for SETTLE
+ORPHAN_DIRTY_INTERVAL = float(os.getenv("ORPHAN_DIRTY_INTERVAL", 5))
+ORPHAN_DIRTY_SETTLE_SEC = float(os.getenv("ORPHAN_DIRTY_SETTLE_SEC", 5))
+# Reconciler runs: symbols in parallel, wall-clock budget per run (leftovers wait for the next run),
+# +/- fraction of jitter on every interval, and report-only mode
+RECON_CONCURRENCY = int(os.getenv("RECON_CONCURRENCY", 4))
+RECON_TIME_BUDGET_SEC = float(os.getenv("RECON_TIME_BUDGET_SEC", 30))
+RECON_JITTER = float(os.getenv("RECON_JITTER", 0.2))
+RECON_DRY_RUN = os.getenv("RECON_DRY_RUN", "0") == "1"
+# A symbol whose reconcile keeps failing is retried with exponential backoff, then left to the full sweep
+RECON_MAX_RETRIES = int(os.getenv("RECON_MAX_RETRIES", 5))
+# Per-symbol reconcile lock; expires on its own if the worker holding it dies
+RECON_LOCK_SEC = int(os.getenv("RECON_LOCK_SEC", 60))
+# Signal queue: workers per process (each may sit out a bar close), backlog cap before 503,
+# and how long after its bar closes a replayed signal is still worth validating
+SIGNAL_WORKERS = int(os.getenv("SIGNAL_WORKERS", 32))
+SIGNAL_QUEUE_MAX_BACKLOG = int(os.getenv("SIGNAL_QUEUE_MAX_BACKLOG", 500))
+SIGNAL_REPLAY_GRACE_SEC = int(os.getenv("SIGNAL_REPLAY_GRACE_SEC", 120))
+# Concurrent signal executions per worker; extra ones queue by priority (reversal > entry > upgrade)
+EXECUTION_SLOTS = int(os.getenv("EXECUTION_SLOTS", 4))
+# Client-side REST budget per endpoint class, (requests/sec, burst), per worker process
+BITUNIX_RATE_LIMITS = {
+    "trade": (float(os.getenv("BITUNIX_RATE_TRADE", 10)), 10),
+    "tpsl": (float(os.getenv("BITUNIX_RATE_TPSL", 10)), 10),
+    "account": (float(os.getenv("BITUNIX_RATE_ACCOUNT", 10)), 10),
+    "market": (float(os.getenv("BITUNIX_RATE_MARKET", 20)), 20),
+}
+# Circuit breakers: consecutive failures before a dependency is cut off, and how long before a probe
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SEC = float(os.getenv("BREAKER_RESET_SEC", 30))
+# Candle store: bars kept per (symbol, interval), bars loaded on first use, and how long a ring
+# is served without asking the exchange for the newest bars
+CANDLE_STORE_SIZE = int(os.getenv("CANDLE_STORE_SIZE", 200))
+CANDLE_STORE_FILL = int(os.getenv("CANDLE_STORE_FILL", 50))
+CANDLE_REFRESH_SEC = float(os.getenv("CANDLE_REFRESH_SEC", 5))
+# Batched market snapshot: refresh cadence, how old a snapshot mark price / funding rate may be served,
+# and how long a symbol stays in the refreshed set after its last read (seconds)
+MARKET_SNAPSHOT_INTERVAL = float(os.getenv("MARKET_SNAPSHOT_INTERVAL", 2))
+MARKET_SNAPSHOT_MAX_AGE = float(os.getenv("MARKET_SNAPSHOT_MAX_AGE", 5))
+MARKET_SNAPSHOT_FUNDING_MAX_AGE = float(os.getenv("MARKET_SNAPSHOT_FUNDING_MAX_AGE", 60))
+MARKET_SNAPSHOT_SYMBOL_TTL = float(os.getenv("MARKET_SNAPSHOT_SYMBOL_TTL", 900))
+# Per-bar memo of validation close prices / conviction scores: max entries per cache
+BAR_CACHE_MAX_ENTRIES = int(os.getenv("BAR_CACHE_MAX_ENTRIES", 1000))
+# How often each worker checks whether another worker superseded one of its in-flight signals (seconds)
+SIGNAL_SUPERSEDE_POLL_SEC = float(os.getenv("SIGNAL_SUPERSEDE_POLL_SEC", 1))
+# How often trading-pair metadata (tick/lot precision, order size limits) is reloaded (seconds)
+SYMBOL_INFO_REFRESH_SEC = float(os.getenv("SYMBOL_INFO_REFRESH_SEC", 3600))
+# Share of the opening position quantity taken by each TP, TP1 first
+TP_DISTRIBUTION = [float(share) for share in os.getenv("TP_DISTRIBUTION", "0.7,0.1,0.1,0.1").split(",")]
+# Degraded mode: how old a cached mark price may be, and datastore timeouts (seconds)
+PRICE_CACHE_MAX_AGE = float(os.getenv("PRICE_CACHE_MAX_AGE", 120))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 10))  # must exceed blocking XREADGROUP (5s)
+PG_CONNECT_TIMEOUT = int(os.getenv("PG_CONNECT_TIMEOUT", 3))
 
 POSITION_SIZE = 10  # dollars per entry
 LEVERAGE = 20
@@ -15,7 +85,8 @@ DB_CONFIG = {
     "user": os.getenv("DB_USER", ""),
     "password": os.getenv("DB_PASSWORD", ""),
     "host": os.getenv("DB_HOST", ""),
-    "port": os.getenv("DB_PORT", 5432)
+    "port": os.getenv("DB_PORT", 5432),
+    "connect_timeout": PG_CONNECT_TIMEOUT,
 }
 
 DEFAULT_STATE = {
@@ -25,5 +96,5 @@ DEFAULT_STATE = {
     "step": 0,
     "tps": [],
     "stop_loss": 0.0,
-    "qty_distribution": [0.7, 0.1, 0.1, 0.1]
+    "qty_distribution": TP_DISTRIBUTION
 }
\ No newline at end of file
@@ -0,0 +1,569 @@
+"""
+Local stand-in for the Bitunix futures REST + private/public WebSocket API.
+
+Implements the endpoints the bot calls (orders, TP/SL, positions, market data)
+on top of a small matching engine driven by a scripted price path, with
+configurable latency and error injection. Point the bot at it with::
+
+    BITUNIX_BASE_URL=http://127.0.0.1:9000 BITUNIX_WS_URL=ws://127.0.0.1:9000/private/ \
+        BITUNIX_WS_PUBLIC_URL=ws://127.0.0.1:9000/public/
+
+Usage::
+
+    python -m modules.exchange_simulator --port 9000 --price-path prices.json --tick 0.5 --latency-ms 40
+
+``prices.json`` maps symbols to a list of prices stepped once per tick; symbols
+without a path follow a seeded random walk. ``/sim/*`` routes expose the event
+journal and let tests change prices or fault settings at runtime.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from quart import Quart, jsonify, request, websocket
+
+from modules.logger_config import logger
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "1d": 86_400_000,
+}
+RATE_LIMIT_CODE = 10006
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _iso_now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _ok(data=None):
+    return jsonify({"code": 0, "msg": "Success", "data": data})
+
+
+def _err(code: int, msg: str):
+    return jsonify({"code": code, "msg": msg, "data": None})
+
+
+class SimExchange:
+    def __init__(self, price_paths: dict | None = None, tick_secs: float = 1.0, seed: int = 7,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, funding_rate: float = 0.0001):
+        self.price_paths = {k.upper(): list(v) for k, v in (price_paths or {}).items()}
+        self.tick_secs = tick_secs
+        self.rng = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.funding_rate = funding_rate
+        self.reset()
+
+    def reset(self):
+        self.ids = itertools.count(1)
+        self.tick_index = 0
+        self.prices = {}
+        self.history = defaultdict(list)  # symbol -> [(ts_ms, price)]
+        self.orders = {}  # open limit orders
+        self.order_log = {}  # every order ever placed, for get_order_detail
+        self.client_ids = {}
+        self.positions = {}  # (symbol, side) -> position
+        self.tpsl = {}
+        self.subscribers = set()
+        self.public_subscribers = {}  # queue -> subscribed symbols (price channel)
+        self.journal = []
+        self.request_counts = defaultdict(int)
+
+    def _next_id(self) -> str:
+        return str(next(self.ids))
+
+    # --- prices ---
+    def price(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        if symbol not in self.prices:
+            path = self.price_paths.get(symbol)
+            self.prices[symbol] = float(path[0]) if path else 100.0
+            self.history[symbol].append((_now_ms(), self.prices[symbol]))
+        return self.prices[symbol]
+
+    def set_price(self, symbol: str, price: float):
+        symbol = symbol.upper()
+        self.prices[symbol] = float(price)
+        self.history[symbol].append((_now_ms(), float(price)))
+        self.publish_price(symbol)
+        self.match(symbol)
+
+    def step(self):
+        self.tick_index += 1
+        for symbol in list(self.prices):
+            path = self.price_paths.get(symbol)
+            if path:
+                price = float(path[min(self.tick_index, len(path) - 1)])
+            else:
+                price = round(self.prices[symbol] * (1 + self.rng.gauss(0, 0.0005)), 6)
+            self.set_price(symbol, price)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.tick_secs)
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"[SIM TICK ERROR] {e}")
+
+    def klines(self, symbol: str, interval: str, limit: int) -> list:
+        self.price(symbol)
+        span = INTERVAL_MS.get(interval, 60_000)
+        buckets = {}
+        for ts, price in self.history[symbol.upper()]:
+            start = ts - ts % span
+            c = buckets.get(start)
+            if c is None:
+                buckets[start] = {"time": start, "open": price, "high": price, "low": price, "close": price,
+                                  "baseVol": 1.0, "quoteVol": price}
+            else:
+                c["high"] = max(c["high"], price)
+                c["low"] = min(c["low"], price)
+                c["close"] = price
+                c["baseVol"] += 1.0
+                c["quoteVol"] += price
+        return [buckets[k] for k in sorted(buckets)][-limit:]
+
+    # --- events ---
+    def publish(self, channel: str, data: dict):
+        self.journal.append({"ts": time.time(), "ch": channel, **data})
+        message = json.dumps({"ch": channel, "ts": _now_ms(), "data": data})
+        for queue in list(self.subscribers):
+            queue.put_nowait(message)
+
+    def publish_price(self, symbol: str):
+        message = json.dumps({"ch": "price", "symbol": symbol, "ts": _now_ms(),
+                              "data": {"mp": str(self.prices[symbol]), "ip": str(self.prices[symbol]),
+                                       "fr": str(self.funding_rate)}})
+        for queue, symbols in list(self.public_subscribers.items()):
+            if symbol in symbols:
+                queue.put_nowait(message)
+
+    def _position_event(self, pos: dict, event: str):
+        self.publish("position", {
+            "event": event,
+            "positionId": pos["positionId"],
+            "symbol": pos["symbol"],
+            "side": pos["side"],
+            "qty": str(pos["qty"]),
+            "avgOpenPrice": str(pos["avgOpenPrice"]),
+            "realizedPNL": str(round(pos["realizedPNL"], 8)),
+            "ctime": _iso_now(),
+        })
+
+    def _order_event(self, order: dict, event: str):
+        self.publish("order", {
+            "event": event,
+            "orderId": order["orderId"],
+            "clientId": order.get("clientId"),
+            "symbol": order["symbol"],
+            "side": order["side"],
+            "type": order["orderType"],
+            "qty": str(order["qty"]),
+            "price": str(order["price"]),
+            "tradeSide": order["tradeSide"],
+            "orderStatus": order["status"],
+            "ctime": _iso_now(),
+        })
+
+    def _tpsl_event(self, o: dict, event: str, status: str, tp_qty=None, sl_qty=None):
+        self.publish("tpsl", {
+            "event": event,
+            "status": status,
+            "id": o["id"],
+            "positionId": o["positionId"],
+            "symbol": o["symbol"],
+            "side": o["side"],
+            "tpPrice": o.get("tpPrice"),
+            "slPrice": o.get("slPrice"),
+            "tpQty": tp_qty if tp_qty is not None else o.get("tpQty"),
+            "slQty": sl_qty if sl_qty is not None else o.get("slQty"),
+            "ctime": _iso_now(),
+        })
+
+    # --- matching ---
+    def _fill_open(self, order: dict, price: float):
+        side = "LONG" if order["side"] == "BUY" else "SHORT"
+        key = (order["symbol"], side)
+        qty = float(order["qty"])
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = {"positionId": self._next_id(), "symbol": order["symbol"], "side": side, "qty": qty,
+                   "avgOpenPrice": price, "realizedPNL": 0.0, "ctime": _now_ms()}
+            self.positions[key] = pos
+            event = "OPEN"
+        else:
+            total = pos["qty"] + qty
+            pos["avgOpenPrice"] = (pos["avgOpenPrice"] * pos["qty"] + price * qty) / total
+            pos["qty"] = round(total, 8)
+            event = "UPDATE"
+        order.update({"status": "FILLED", "avgPrice": price, "positionId": pos["positionId"]})
+        self._order_event(order, "CLOSE")
+        self._position_event(pos, event)
+
+    def _reduce(self, pos: dict, qty: float, price: float):
+        qty = min(qty, pos["qty"])
+        sign = 1 if pos["side"] == "LONG" else -1
+        pos["realizedPNL"] += (price - pos["avgOpenPrice"]) * qty * sign
+        pos["qty"] = round(pos["qty"] - qty, 8)
+        if pos["qty"] <= 0:
+            self._close(pos)
+        else:
+            self._position_event(pos, "UPDATE")
+
+    def _close(self, pos: dict):
+        pos["qty"] = 0.0
+        self.positions.pop((pos["symbol"], pos["side"]), None)
+        for o in [o for o in self.tpsl.values() if o["positionId"] == pos["positionId"]]:
+            self.tpsl.pop(o["id"], None)
+            self._tpsl_event(o, "CLOSE", "CANCELED")
+        self._position_event(pos, "CLOSE")
+
+    def match(self, symbol: str):
+        price = self.prices[symbol]
+        for order in [o for o in self.orders.values() if o["symbol"] == symbol]:
+            limit = float(order["price"])
+            if (order["side"] == "BUY" and price <= limit) or (order["side"] == "SELL" and price >= limit):
+                self.orders.pop(order["orderId"], None)
+                self._execute(order, limit)
+        for o in [o for o in self.tpsl.values() if o["symbol"] == symbol]:
+            pos = next((p for p in self.positions.values() if p["positionId"] == o["positionId"]), None)
+            if pos is None or o["id"] not in self.tpsl:
+                continue
+            is_long = pos["side"] == "LONG"
+            tp, sl = o.get("tpPrice"), o.get("slPrice")
+            if sl is not None and ((is_long and price <= float(sl)) or (not is_long and price >= float(sl))):
+                qty = min(float(o.get("slQty") or pos["qty"]), pos["qty"])
+                self.tpsl.pop(o["id"], None)
+                self._tpsl_event(o, "CLOSE", "FILLED", tp_qty=0, sl_qty=qty)
+                self._reduce(pos, qty, price)
+            elif tp is not None and ((is_long and price >= float(tp)) or (not is_long and price <= float(tp))):
+                qty = min(float(o.get("tpQty") or pos["qty"]), pos["qty"])
+                self.tpsl.pop(o["id"], None)
+                self._tpsl_event(o, "CLOSE", "FILLED", tp_qty=qty)
+                self._reduce(pos, qty, price)
+
+    def _execute(self, order: dict, price: float):
+        if order["tradeSide"] == "CLOSE":
+            side = "SHORT" if order["side"] == "BUY" else "LONG"
+            pos = self.positions.get((order["symbol"], side))
+            order["status"] = "FILLED"
+            self._order_event(order, "CLOSE")
+            if pos:
+                self._reduce(pos, float(order["qty"]), price)
+        else:
+            self._fill_open(order, price)
+
+    def place_order(self, body: dict) -> dict:
+        client_id = body.get("clientId")
+        if client_id and client_id in self.client_ids:
+            return self.order_log[self.client_ids[client_id]]
+        symbol = body["symbol"].upper()
+        order = {
+            "orderId": self._next_id(), "clientId": client_id, "symbol": symbol,
+            "side": body["side"].upper(), "orderType": body.get("orderType", "LIMIT").upper(),
+            "qty": float(body["qty"]), "price": float(body.get("price") or self.price(symbol)),
+            "tradeSide": "CLOSE" if body.get("reduceOnly") or body.get("tradeSide") == "CLOSE" else "OPEN",
+            "status": "NEW_", "ctime": _now_ms(),
+        }
+        self.order_log[order["orderId"]] = order
+        if client_id:
+            self.client_ids[client_id] = order["orderId"]
+        self.price(symbol)
+        if order["orderType"] == "MARKET":
+            self._execute(order, self.prices[symbol])
+        else:
+            self.orders[order["orderId"]] = order
+            self._order_event(order, "CREATE")
+            self.match(symbol)
+        return order
+
+
+def create_app(sim: SimExchange) -> Quart:
+    app = Quart(__name__)
+    app.config["SIM"] = sim
+
+    @app.before_serving
+    async def start_ticker():
+        app.add_background_task(sim.run)
+
+    @app.before_request
+    async def inject_faults():
+        if request.path.startswith("/sim/") or request.path.startswith("/private"):
+            return None
+        sim.request_counts[request.path] += 1
+        delay = sim.latency_ms + (sim.rng.uniform(-sim.jitter_ms, sim.jitter_ms) if sim.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = sim.rng.random()
+        if roll < sim.rate_limit_rate:
+            return _err(RATE_LIMIT_CODE, "Request too frequently"), 429
+        if roll < sim.rate_limit_rate + sim.error_rate:
+            return _err(-1, "Injected server error"), 500
+        return None
+
+    async def body_json() -> dict:
+        return json.loads(await request.get_data(as_text=True) or "{}")
+
+    # --- trade ---
+    @app.route("/api/v1/futures/trade/place_order", methods=["POST"])
+    async def place_order():
+        order = sim.place_order(await body_json())
+        return _ok({"orderId": order["orderId"], "clientId": order["clientId"]})
+
+    @app.route("/api/v1/futures/trade/get_pending_orders", methods=["GET"])
+    async def pending_orders():
+        symbol = request.args.get("symbol", "").upper()
+        orders = [o for o in sim.orders.values() if not symbol or o["symbol"] == symbol]
+        return _ok({"orderList": [{**o, "qty": str(o["qty"]), "price": str(o["price"])} for o in orders],
+                    "total": len(orders)})
+
+    @app.route("/api/v1/futures/trade/get_order_detail", methods=["GET"])
+    async def order_detail():
+        order_id = request.args.get("orderId") or sim.client_ids.get(request.args.get("clientId"))
+        order = sim.order_log.get(order_id)
+        if not order:
+            return _err(20007, "Order not exists")
+        return _ok({**order, "price": order.get("avgPrice", order["price"])})
+
+    @app.route("/api/v1/futures/trade/cancel_orders", methods=["POST"])
+    async def cancel_orders():
+        body = await body_json()
+        success, failed = [], []
+        for item in body.get("orderList", []):
+            order = sim.orders.pop(item.get("orderId"), None)
+            if order:
+                order["status"] = "CANCELED"
+                sim._order_event(order, "CLOSE")
+                success.append({"orderId": order["orderId"], "clientId": order["clientId"]})
+            else:
+                failed.append({"orderId": item.get("orderId"), "errorMsg": "Order not exists", "errorCode": 20007})
+        return _ok({"successList": success, "failureList": failed})
+
+    @app.route("/api/v1/futures/trade/flash_close_position", methods=["POST"])
+    async def flash_close():
+        position_id = str((await body_json()).get("positionId"))
+        pos = next((p for p in sim.positions.values() if p["positionId"] == position_id), None)
+        if not pos:
+            return _err(20008, "Position not exists")
+        sim._reduce(pos, pos["qty"], sim.price(pos["symbol"]))
+        return _ok(None)
+
+    @app.route("/api/v1/futures/trade/close_all_position", methods=["POST"])
+    async def close_all():
+        symbol = (await body_json()).get("symbol", "").upper()
+        for pos in [p for p in sim.positions.values() if not symbol or p["symbol"] == symbol]:
+            sim._reduce(pos, pos["qty"], sim.price(pos["symbol"]))
+        return _ok(None)
+
+    @app.route("/api/v1/futures/position/get_pending_positions", methods=["GET"])
+    async def pending_positions():
+        symbol = request.args.get("symbol", "").upper()
+        return _ok([
+            {**p, "qty": str(p["qty"]), "avgOpenPrice": str(p["avgOpenPrice"]), "realizedPNL": str(p["realizedPNL"]),
+             "unrealizedPNL": str((sim.price(p["symbol"]) - p["avgOpenPrice"]) * p["qty"]
+                                  * (1 if p["side"] == "LONG" else -1))}
+            for p in sim.positions.values() if not symbol or p["symbol"] == symbol
+        ])
+
+    # --- tpsl ---
+    @app.route("/api/v1/futures/tpsl/place_order", methods=["POST"])
+    async def tpsl_place():
+        body = await body_json()
+        position_id = str(body.get("positionId"))
+        pos = next((p for p in sim.positions.values() if p["positionId"] == position_id), None)
+        if not pos:
+            return _err(20008, "Position not exists")
+        order = {
+            "id": sim._next_id(), "positionId": position_id, "symbol": pos["symbol"],
+            "side": "SELL" if pos["side"] == "LONG" else "BUY",
+            "tpPrice": body.get("tpPrice"), "tpQty": body.get("tpQty"),
+            "tpStopType": body.get("tpStopType"), "tpOrderType": body.get("tpOrderType"),
+            "slPrice": body.get("slPrice"), "slQty": body.get("slQty"),
+            "slStopType": body.get("slStopType"), "slOrderType": body.get("slOrderType"),
+            "ctime": _now_ms(),
+        }
+        sim.tpsl[order["id"]] = order
+        sim._tpsl_event(order, "CREATE", "NEW")
+        sim.match(pos["symbol"])
+        return _ok([{"orderId": order["id"]}])
+
+    @app.route("/api/v1/futures/tpsl/modify_order", methods=["POST"])
+    async def tpsl_modify():
+        body = await body_json()
+        order = sim.tpsl.get(str(body.get("orderId")))
+        if not order:
+            return _err(20007, "Order not exists")
+        for field in ("tpPrice", "tpQty", "tpStopType", "tpOrderType", "slPrice", "slQty", "slStopType",
+                      "slOrderType"):
+            if field in body:
+                order[field] = body[field]
+        sim._tpsl_event(order, "UPDATE", "NEW")
+        sim.match(order["symbol"])
+        return _ok({"orderId": order["id"]})
+
+    @app.route("/api/v1/futures/tpsl/get_pending_orders", methods=["GET"])
+    async def tpsl_pending():
+        symbol = request.args.get("symbol", "").upper()
+        return _ok([o for o in sim.tpsl.values() if not symbol or o["symbol"] == symbol])
+
+    # --- market ---
+    @app.route("/api/v1/futures/market/tickers", methods=["GET"])
+    async def tickers():
+        symbols = [s for s in request.args.get("symbols", "").upper().split(",") if s]
+        return _ok([{"symbol": s, "markPrice": str(sim.price(s)), "lastPrice": str(sim.price(s))}
+                    for s in symbols or list(sim.prices)])
+
+    @app.route("/api/v1/futures/market/kline", methods=["GET"])
+    async def kline():
+        candles = sim.klines(request.args["symbol"], request.args.get("interval", "1m"),
+                             int(request.args.get("limit", 100)))
+        return _ok([{k: (str(v) if k != "time" else v) for k, v in c.items()} for c in reversed(candles)])
+
+    @app.route("/api/v1/futures/market/funding_rate", methods=["GET"])
+    async def funding_rate():
+        symbol = request.args.get("symbol", "").upper()
+        return _ok({"symbol": symbol, "markPrice": str(sim.price(symbol)), "fundingRate": str(sim.funding_rate)})
+
+    @app.route("/api/v1/futures/market/trading_pairs", methods=["GET"])
+    async def trading_pairs():
+        symbols = [s for s in request.args.get("symbols", "").upper().split(",") if s]
+        return _ok([{"symbol": s, "base": s[:-4], "quote": "USDT", "basePrecision": 3, "quotePrecision": 4,
+                     "minTradeVolume": "0.001", "maxLimitOrderVolume": "1000000", "maxMarketOrderVolume": "100000",
+                     "maxLeverage": 125, "symbolStatus": "OPEN"} for s in symbols or list(sim.prices)])
+
+    @app.route("/api/v1/futures/market/funding_rate/batch", methods=["GET"])
+    async def funding_rate_batch():
+        return _ok([{"symbol": s, "markPrice": str(sim.prices[s]), "fundingRate": str(sim.funding_rate)}
+                    for s in list(sim.prices)])
+
+    # --- simulator control ---
+    @app.route("/sim/price", methods=["POST"])
+    async def sim_price():
+        body = await request.get_json()
+        sim.set_price(body["symbol"], body["price"])
+        return jsonify({"symbol": body["symbol"].upper(), "price": sim.prices[body["symbol"].upper()]})
+
+    @app.route("/sim/config", methods=["POST"])
+    async def sim_config():
+        body = await request.get_json()
+        for field in ("latency_ms", "jitter_ms", "error_rate", "rate_limit_rate", "funding_rate", "tick_secs"):
+            if field in body:
+                setattr(sim, field, float(body[field]))
+        return jsonify({f: getattr(sim, f) for f in ("latency_ms", "jitter_ms", "error_rate", "rate_limit_rate",
+                                                       "funding_rate", "tick_secs")})
+
+    @app.route("/sim/stats", methods=["GET"])
+    async def sim_stats():
+        since = float(request.args.get("since", 0))
+        return jsonify({
+            "requests": dict(sim.request_counts),
+            "positions": list(sim.positions.values()),
+            "open_orders": len(sim.orders),
+            "tpsl_orders": len(sim.tpsl),
+            "journal": [e for e in sim.journal if e["ts"] >= since],
+        })
+
+    @app.route("/sim/reset", methods=["POST"])
+    async def sim_reset():
+        subscribers, public_subscribers = sim.subscribers, sim.public_subscribers
+        sim.reset()
+        sim.subscribers, sim.public_subscribers = subscribers, public_subscribers
+        return jsonify({"status": "reset"})
+
+    # --- private websocket ---
+    @app.websocket("/private/")
+    async def private_ws():
+        queue = asyncio.Queue()
+        await websocket.send(json.dumps({"op": "connect", "data": {"result": True}}))
+
+        async def sender():
+            while True:
+                await websocket.send(await queue.get())
+
+        send_task = asyncio.ensure_future(sender())
+        try:
+            while True:
+                msg = json.loads(await websocket.receive())
+                op = msg.get("op")
+                if op == "login":
+                    await websocket.send(json.dumps({"op": "login", "data": {"result": True}}))
+                elif op == "subscribe":
+                    sim.subscribers.add(queue)
+                    await websocket.send(json.dumps({"op": "subscribe", "args": msg.get("args", [])}))
+                elif op == "ping":
+                    await websocket.send(json.dumps({"op": "ping", "pong": msg.get("ping"), "ping": int(time.time())}))
+        finally:
+            sim.subscribers.discard(queue)
+            send_task.cancel()
+
+    # --- public websocket (price channel only) ---
+    @app.websocket("/public/")
+    async def public_ws():
+        queue = asyncio.Queue()
+        symbols = sim.public_subscribers[queue] = set()
+        await websocket.send(json.dumps({"op": "connect", "data": {"result": True}}))
+
+        async def sender():
+            while True:
+                await websocket.send(await queue.get())
+
+        send_task = asyncio.ensure_future(sender())
+        try:
+            while True:
+                msg = json.loads(await websocket.receive())
+                op = msg.get("op")
+                if op in ("subscribe", "unsubscribe"):
+                    for arg in msg.get("args", []):
+                        if arg.get("ch") != "price":
+                            continue
+                        if op == "subscribe":
+                            symbols.add(arg["symbol"].upper())
+                        else:
+                            symbols.discard(arg["symbol"].upper())
+                    await websocket.send(json.dumps({"op": op, "args": msg.get("args", [])}))
+                elif op == "ping":
+                    await websocket.send(json.dumps({"op": "ping", "pong": msg.get("ping"), "ping": int(time.time())}))
+        finally:
+            sim.public_subscribers.pop(queue, None)
+            send_task.cancel()
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Bitunix exchange simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--price-path", help="JSON file mapping symbol -> list of prices")
+    parser.add_argument("--tick", type=float, default=1.0, help="Seconds between price path steps")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    price_paths = {}
+    if args.price_path:
+        with open(args.price_path) as fh:
+            price_paths = json.load(fh)
+    sim = SimExchange(price_paths, tick_secs=args.tick, seed=args.seed, latency_ms=args.latency_ms,
+                      jitter_ms=args.jitter_ms, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    create_app(sim).run(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Vectorized indicators over candle arrays (no I/O).
+
+Every function takes arrays whose last axis is time, oldest first, so the same
+call works on one symbol's ``candle_store`` window, shape ``(n,)``, or on many
+symbols stacked with ``stack_windows``, shape ``(symbols, n)``. Recursive
+indicators (EMA, ATR) step over time once and are vectorized across symbols;
+everything else is a single NumPy expression.
+"""
+import numpy as np
+
+from modules.candle_store import HIGH, LOW, CLOSE, VOLUME
+
+
+def ema(values, span: int) -> np.ndarray:
+    """Exponential moving average (alpha = 2 / (span + 1)), seeded with the first value."""
+    return _smooth(np.asarray(values, dtype=np.float64), 2.0 / (span + 1))
+
+
+def _smooth(values: np.ndarray, alpha: float) -> np.ndarray:
+    out = np.empty_like(values)
+    out[..., 0] = values[..., 0]
+    for t in range(1, values.shape[-1]):
+        out[..., t] = alpha * values[..., t] + (1 - alpha) * out[..., t - 1]
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    tr = high - low
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(tr[..., 1:], np.maximum(np.abs(high[..., 1:] - prev_close),
+                                                     np.abs(low[..., 1:] - prev_close)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average true range with Wilder smoothing (alpha = 1 / period)."""
+    return _smooth(true_range(high, low, close), 1.0 / period)
+
+
+def vwap(high, low, close, volume) -> np.ndarray:
+    """Volume-weighted typical price over the whole window (NaN where there was no volume)."""
+    typical = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    total = volume.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (typical * volume).sum(axis=-1) / total, np.nan)
+
+
+def volume_zscore(volume) -> np.ndarray:
+    """How many standard deviations the last bar's volume sits above the earlier bars (0 if flat)."""
+    volume = np.asarray(volume, dtype=np.float64)
+    if volume.shape[-1] < 2:
+        return np.zeros(volume.shape[:-1])
+    history = volume[..., :-1]
+    std = history.std(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(std > 0, (volume[..., -1] - history.mean(axis=-1)) / std, 0.0)
+
+
+def slope(values, relative: bool = True) -> np.ndarray:
+    """
+    Least-squares slope per bar; with ``relative`` divided by the mean, so
+    symbols (or OI vs price) at different scales compare directly.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    x = np.arange(values.shape[-1], dtype=np.float64)
+    x -= x.mean()
+    denom = (x * x).sum()
+    if denom == 0:
+        return np.zeros(values.shape[:-1])
+    beta = (values * x).sum(axis=-1) / denom
+    if not relative:
+        return beta
+    mean = values.mean(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mean != 0, beta / np.abs(mean), 0.0)
+
+
+def realized_volatility(close) -> np.ndarray:
+    """Standard deviation of log returns per bar."""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] < 2:
+        return np.zeros(close.shape[:-1])
+    return np.diff(np.log(close), axis=-1).std(axis=-1)
+
+
+def stack_windows(windows: list, bars: int) -> np.ndarray:
+    """Stack the last ``bars`` candles of several candle-store windows into (columns, symbols, bars)."""
+    return np.stack([w[:, -bars:] for w in windows], axis=1)
+
+
+def compute(candles: np.ndarray, ema_span: int = 9, atr_period: int = 14) -> dict:
+    """
+    Indicator set for candle-store window(s): ``candles`` is (columns, n) for one
+    symbol or (columns, symbols, n) from ``stack_windows``. Values are the latest
+    per symbol; ``atr_pct`` is ATR over the last close.
+    """
+    high, low, close, volume = candles[HIGH], candles[LOW], candles[CLOSE], candles[VOLUME]
+    last_close = close[..., -1]
+    last_atr = atr(high, low, close, atr_period)[..., -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        atr_pct = np.where(last_close != 0, last_atr / last_close, 0.0)
+    return {
+        "ema": ema(close, ema_span)[..., -1],
+        "atr": last_atr,
+        "atr_pct": atr_pct,
+        "vwap": vwap(high, low, close, volume),
+        "volume_zscore": volume_zscore(volume),
+        "price_slope": slope(close),
+        "volatility": realized_volatility(close),
+    }
@@ -0,0 +1,112 @@
+"""
+Redis lease so only one worker runs the singleton background tasks.
+
+Every worker process serves webhooks, but the private WebSocket listener and the
+orphan reconciler must run exactly once: two listeners would both react to the
+same fills and place duplicate TP/SL orders. Workers race for ``LEADER_KEY`` with
+``SET NX PX``; the winner starts the tasks and renews the lease, everyone else
+retries. If the leader dies its lease expires and another worker takes over
+within ``LEADER_LEASE_SEC``. A leader that fails to renew cancels its tasks
+before the lease can be picked up elsewhere.
+"""
+import asyncio
+import os
+import secrets
+import socket
+from datetime import datetime
+
+from modules import metrics
+from modules.config import LEADER_LEASE_SEC
+from modules.logger_config import logger
+from modules.redis_client import get_redis
+
+LEADER_KEY = "leader:bitunix-bot"
+RENEW_INTERVAL = LEADER_LEASE_SEC / 3
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+# Only extend/release the lease if we still own it.
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_status = {"is_leader": False, "since": None, "terms": 0}
+
+
+async def try_acquire(r) -> bool:
+    return bool(await r.set(LEADER_KEY, WORKER_ID, nx=True, px=int(LEADER_LEASE_SEC * 1000)))
+
+
+async def renew(r) -> bool:
+    return bool(await r.eval(_RENEW_SCRIPT, 1, LEADER_KEY, WORKER_ID, int(LEADER_LEASE_SEC * 1000)))
+
+
+async def release(r):
+    try:
+        await r.eval(_RELEASE_SCRIPT, 1, LEADER_KEY, WORKER_ID)
+    except Exception as e:
+        logger.error(f"[LEADER] Failed to release lease: {e}")
+
+
+async def _hold_lease(r):
+    """Renew until the lease is lost; returns so the caller can stand down."""
+    deadline = asyncio.get_running_loop().time() + LEADER_LEASE_SEC
+    while True:
+        await asyncio.sleep(RENEW_INTERVAL)
+        try:
+            if not await renew(r):
+                logger.warning(f"[LEADER] {WORKER_ID} lost the lease")
+                return
+            deadline = asyncio.get_running_loop().time() + LEADER_LEASE_SEC
+        except Exception as e:
+            # Keep leading through short Redis blips, but never past our own lease.
+            logger.error(f"[LEADER] Lease renewal failed: {e}")
+            if asyncio.get_running_loop().time() + RENEW_INTERVAL >= deadline:
+                logger.warning(f"[LEADER] {WORKER_ID} standing down, lease could not be renewed")
+                return
+
+
+async def run_as_leader(*task_factories):
+    """Run the given coroutine factories only while this worker holds the lease."""
+    r = get_redis()
+    while True:
+        try:
+            acquired = await try_acquire(r)
+        except Exception as e:
+            logger.error(f"[LEADER] Lease acquisition failed: {e}")
+            acquired = False
+
+        if not acquired:
+            await asyncio.sleep(RENEW_INTERVAL)
+            continue
+
+        _status.update(is_leader=True, since=datetime.utcnow().isoformat(), terms=_status["terms"] + 1)
+        metrics.set_gauge("leader", 1)
+        logger.info(f"[LEADER] {WORKER_ID} elected, starting {len(task_factories)} background tasks")
+        tasks = [asyncio.create_task(factory()) for factory in task_factories]
+        try:
+            await _hold_lease(r)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # No-op if the lease already moved on; hands over immediately on shutdown.
+            await release(r)
+            _status.update(is_leader=False, since=None)
+            metrics.set_gauge("leader", 0)
+
+
+async def get_leader_status() -> dict:
+    try:
+        holder = await get_redis().get(LEADER_KEY)
+    except Exception as e:
+        holder = f"unavailable: {e}"
+    return {"worker_id": WORKER_ID, "leader": holder, **_status}
@@ -0,0 +1,112 @@
+"""
+Event-loop health: continuous lag sampling plus a watchdog thread that catches
+callbacks blocking the loop and records where they were stuck.
+
+The loop side only bumps a heartbeat; a daemon thread checks it and, when the
+heartbeat is older than ``BLOCKING_THRESHOLD``, snapshots the loop thread's
+stack with ``sys._current_frames``. One record is kept per stall with its
+final duration once the loop gets control back.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from modules import metrics
+from modules.logger_config import logger
+
+LAG_SAMPLE_INTERVAL = 0.25  # seconds
+BLOCKING_THRESHOLD = float(os.getenv("LOOP_BLOCKING_THRESHOLD", 0.2))  # seconds
+MAX_BLOCKING_EVENTS = 50
+
+_state = {
+    "heartbeat": time.monotonic(),
+    "loop_thread_id": None,
+    "watchdog": None,
+    "current_stall": None,
+}
+_blocking_events = deque(maxlen=MAX_BLOCKING_EVENTS)
+_lock = threading.Lock()
+
+
+async def monitor_event_loop_lag(interval: float = LAG_SAMPLE_INTERVAL):
+    """Record how late the loop wakes us up; anything above ~0 means something blocked it."""
+    loop = asyncio.get_running_loop()
+    _state["loop_thread_id"] = threading.get_ident()
+    _start_watchdog()
+    while True:
+        started = loop.time()
+        _state["heartbeat"] = time.monotonic()
+        await asyncio.sleep(interval)
+        _state["heartbeat"] = time.monotonic()
+        lag = max(loop.time() - started - interval, 0.0)
+        metrics.observe("event_loop_lag_seconds", lag)
+        metrics.set_gauge("event_loop_lag_last_seconds", lag)
+
+
+def _start_watchdog():
+    watchdog = _state["watchdog"]
+    if watchdog and watchdog.is_alive():
+        return
+    watchdog = threading.Thread(target=_watchdog_loop, name="loop-watchdog", daemon=True)
+    _state["watchdog"] = watchdog
+    watchdog.start()
+
+
+def _watchdog_loop():
+    poll = max(min(BLOCKING_THRESHOLD / 4, LAG_SAMPLE_INTERVAL / 2), 0.01)
+    while True:
+        time.sleep(poll)
+        # The sampler sleeps LAG_SAMPLE_INTERVAL between beats, so that much silence is normal.
+        stalled_for = time.monotonic() - _state["heartbeat"] - LAG_SAMPLE_INTERVAL
+        stall = _state["current_stall"]
+        if stalled_for >= BLOCKING_THRESHOLD:
+            if stall is None:
+                _state["current_stall"] = _capture_stall(stalled_for)
+            else:
+                stall["duration_sec"] = round(stalled_for, 4)
+        elif stall is not None:
+            _state["current_stall"] = None
+            _finish_stall(stall)
+
+
+def _capture_stall(stalled_for: float) -> dict:
+    frame = sys._current_frames().get(_state["loop_thread_id"])
+    stack = traceback.format_stack(frame) if frame else []
+    return {
+        "detected_at": datetime.utcnow().isoformat(),
+        "duration_sec": round(stalled_for, 4),
+        "stack": [line.rstrip() for line in stack[-25:]],
+    }
+
+
+def _finish_stall(stall: dict):
+    with _lock:
+        _blocking_events.append(stall)
+    metrics.incr("event_loop_blocked_total")
+    metrics.observe("event_loop_blocked_seconds", stall["duration_sec"])
+    where = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "unknown"
+    logger.warning(f"[LOOP BLOCKED] {stall['duration_sec']:.3f}s at {where}")
+
+
+def get_loop_health() -> dict:
+    snapshot = metrics.snapshot()
+    with _lock:
+        events = list(_blocking_events)
+    return {
+        "blocking_threshold_sec": BLOCKING_THRESHOLD,
+        "lag": snapshot["timings"].get("event_loop_lag_seconds", {}),
+        "last_lag_sec": snapshot["gauges"].get("event_loop_lag_last_seconds"),
+        "blocked_total": snapshot["counters"].get("event_loop_blocked_total", 0),
+        "in_progress": _state["current_stall"],
+        "blocking_events": events[::-1],
+    }
+
+
+def reset_loop_health():
+    with _lock:
+        _blocking_events.clear()
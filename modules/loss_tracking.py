@@ -1,9 +1,14 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from modules.config import DB_CONFIG, MAX_DAILY_LOSS
+from datetime import date
+from modules.config import DB_CONFIG, MAX_DAILY_LOSS, OFFLINE_MODE
 from modules.logger_config import error_logger, logger
+from modules.postgres_state_manager import call_postgres
 import os
 
+# Last net P&L read from Postgres, used while the database is unavailable.
+_last_known_net = {"date": None, "net": 0.0}
+
 
 def get_db_conn():
     return psycopg2.connect(**DB_CONFIG)
@@ -75,8 +80,17 @@ def log_profit_loss(symbol, direction, positionid,  pnl, entry_type, ctime, date
                 logger.info(f"[POSTGRES PNL CAPTURE]: {insert_error}")
 
 
-def is_daily_loss_limit_exceeded():
-    net = get_today_net_loss()
+async def is_daily_loss_limit_exceeded():
+    try:
+        net = await call_postgres(get_today_net_loss)
+        _last_known_net.update(date=date.today(), net=net)
+    except Exception as e:
+        if _last_known_net["date"] != date.today():
+            # Nothing known for today: refuse new entries rather than trade past the limit blind.
+            error_logger.error(f"[MAX DAILY LOSS] Net P&L unavailable ({e}); blocking new entries")
+            return True
+        net = _last_known_net["net"]
+        logger.warning(f"[MAX DAILY LOSS] Net P&L unavailable ({e}); using last known {net}")
     return net <= float(MAX_DAILY_LOSS)
 
 
@@ -93,4 +107,5 @@ def get_today_net_loss():
 
 
 # Ensure table exists on import
-ensure_loss_table()
+if not OFFLINE_MODE:
+    ensure_loss_table()
@@ -0,0 +1,146 @@
+"""
+Batched market snapshot for the symbols this worker cares about.
+
+Instead of one ``/market/tickers`` and one ``/market/funding_rate`` call per
+symbol per signal (and per SL/TP check), a background loop refreshes the whole
+active set every ``MARKET_SNAPSHOT_INTERVAL`` seconds with:
+
+* ``/market/tickers?symbols=A,B,...`` in chunks of ``TICKER_BATCH_SIZE``;
+* ``/market/funding_rate/batch`` once funding is half-way to stale.
+
+Each refresh builds a new ``MarketSnapshot`` and swaps it in, so readers always
+see one consistent set of prices. The active set is every symbol read in the
+last ``MARKET_SNAPSHOT_SYMBOL_TTL`` seconds plus every symbol with a tracked
+position (the ``position_symbols`` set, one ``SMEMBERS`` per refresh). A
+symbol seen for the first time, or a snapshot that has gone stale (the
+refresh is failing), falls back to the per-symbol REST call.
+
+Open interest has no batch endpoint and is not read on the signal path, so it
+is not part of the snapshot.
+"""
+import asyncio
+import time
+
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.config import MARKET_SNAPSHOT_INTERVAL, MARKET_SNAPSHOT_MAX_AGE, MARKET_SNAPSHOT_FUNDING_MAX_AGE, \
+    MARKET_SNAPSHOT_SYMBOL_TTL
+from modules.logger_config import logger
+from modules.rate_limiter import PRIORITY_MARKET
+from modules.redis_client import get_redis
+from modules.redis_state_manager import POSITION_SYMBOLS_KEY
+
+TICKER_BATCH_SIZE = 50
+
+
+class MarketSnapshot:
+    """Mark prices and funding rates taken together; never mutated once published."""
+
+    __slots__ = ("taken_at", "prices", "funding", "funding_at")
+
+    def __init__(self, taken_at: float = 0.0, prices: dict = None, funding: dict = None, funding_at: float = 0.0):
+        self.taken_at = taken_at
+        self.prices = prices or {}
+        self.funding = funding or {}
+        self.funding_at = funding_at
+
+    def mark_price(self, symbol: str, max_age: float = MARKET_SNAPSHOT_MAX_AGE):
+        if time.monotonic() - self.taken_at > max_age:
+            return None
+        return self.prices.get(symbol)
+
+    def funding_rate(self, symbol: str, max_age: float = MARKET_SNAPSHOT_FUNDING_MAX_AGE):
+        if time.monotonic() - self.funding_at > max_age:
+            return None
+        return self.funding.get(symbol)
+
+
+class MarketSnapshotService:
+    def __init__(self):
+        self.current = MarketSnapshot()
+        self._touched = {}  # symbol -> monotonic time of the last read
+
+    def track(self, symbol: str):
+        self._touched[symbol.upper()] = time.monotonic()
+
+    def mark_price(self, symbol: str):
+        """Snapshot mark price, or None if the caller should ask the exchange itself."""
+        self.track(symbol)
+        return self.current.mark_price(symbol.upper())
+
+    def funding_rate(self, symbol: str):
+        """Snapshot funding rate, or None if the caller should ask the exchange itself."""
+        self.track(symbol)
+        return self.current.funding_rate(symbol.upper())
+
+    async def active_symbols(self) -> list:
+        cutoff = time.monotonic() - MARKET_SNAPSHOT_SYMBOL_TTL
+        for symbol, touched in list(self._touched.items()):
+            if touched < cutoff:
+                del self._touched[symbol]
+        symbols = set(self._touched)
+        try:
+            symbols.update(await get_redis().smembers(POSITION_SYMBOLS_KEY))
+        except Exception as e:
+            logger.warning(f"[MARKET SNAPSHOT] Position symbols unavailable: {e}")
+        return sorted(symbols)
+
+    async def _fetch_prices(self, symbols: list) -> dict:
+        prices = {}
+        for i in range(0, len(symbols), TICKER_BATCH_SIZE):
+            response = await bitunix_request("get", "/api/v1/futures/market/tickers",
+                                             params={"symbols": ",".join(symbols[i:i + TICKER_BATCH_SIZE])},
+                                             signed=False, priority=PRIORITY_MARKET, timeout=5.0)
+            response.raise_for_status()
+            for ticker in response.json().get("data") or []:
+                prices[ticker["symbol"]] = float(ticker["markPrice"])
+        return prices
+
+    async def _fetch_funding(self) -> dict:
+        response = await bitunix_request("get", "/api/v1/futures/market/funding_rate/batch",
+                                         signed=False, priority=PRIORITY_MARKET, timeout=5.0)
+        response.raise_for_status()
+        return {entry["symbol"]: float(entry["fundingRate"]) for entry in response.json().get("data") or []}
+
+    async def refresh(self) -> MarketSnapshot:
+        symbols = await self.active_symbols()
+        metrics.set_gauge("market_snapshot_symbols", len(symbols))
+        if not symbols:
+            return self.current
+        started = time.monotonic()
+        previous = self.current
+        prices = await self._fetch_prices(symbols)
+        funding, funding_at = previous.funding, previous.funding_at
+        if started - funding_at > MARKET_SNAPSHOT_FUNDING_MAX_AGE / 2:
+            try:
+                funding, funding_at = await self._fetch_funding(), time.monotonic()
+            except Exception as e:
+                logger.warning(f"[MARKET SNAPSHOT] Funding refresh failed, keeping the previous rates: {e}")
+        self.current = MarketSnapshot(time.monotonic(), prices, funding, funding_at)
+        metrics.observe("market_snapshot_seconds", time.monotonic() - started)
+        return self.current
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        snapshot = self.current
+        return {
+            "age_sec": round(now - snapshot.taken_at, 3) if snapshot.taken_at else None,
+            "funding_age_sec": round(now - snapshot.funding_at, 3) if snapshot.funding_at else None,
+            "tracked": sorted(self._touched),
+            "prices": snapshot.prices,
+        }
+
+
+market_snapshot = MarketSnapshotService()
+
+
+async def run_market_snapshot():
+    """Refresh loop started on every worker; idle while nothing is being traded or validated."""
+    while True:
+        try:
+            await market_snapshot.refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[MARKET SNAPSHOT] Refresh failed: {e}")
+        await asyncio.sleep(MARKET_SNAPSHOT_INTERVAL)
@@ -0,0 +1,98 @@
+"""In-process counters, gauges and timing samples, exposed through the admin blueprint."""
+import threading
+from collections import defaultdict, deque
+
+MAX_SAMPLES = 2048
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_timings = defaultdict(lambda: {"count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=MAX_SAMPLES)})
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_str(key: tuple) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def incr(name: str, value: float = 1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels):
+    with _lock:
+        t = _timings[_key(name, labels)]
+        t["count"] += 1
+        t["sum"] += value
+        t["max"] = max(t["max"], value)
+        t["samples"].append(value)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def summarize(values) -> dict:
+    values = list(values)
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def snapshot() -> dict:
+    with _lock:
+        timings = {}
+        for key, t in _timings.items():
+            summary = summarize(t["samples"])
+            summary.update(count=t["count"], sum=round(t["sum"], 6), max=t["max"])
+            timings[_label_str(key)] = summary
+        return {
+            "counters": {_label_str(k): v for k, v in _counters.items()},
+            "gauges": {_label_str(k): v for k, v in _gauges.items()},
+            "timings": timings,
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
+
+
+def render_prometheus(prefix: str = "bitunix_") -> str:
+    lines = []
+    with _lock:
+        for key, value in sorted(_counters.items()):
+            lines.append(f"{prefix}{_label_str(key)} {value}")
+        for key, value in sorted(_gauges.items()):
+            lines.append(f"{prefix}{_label_str(key)} {value}")
+        for key, t in sorted(_timings.items()):
+            name, labels = key
+            samples = list(t["samples"])
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f"{prefix}{_label_str((name, labels + (('quantile', str(q)),)))} "
+                             f"{percentile(samples, q * 100)}")
+            lines.append(f"{prefix}{_label_str((name + '_count', labels))} {t['count']}")
+            lines.append(f"{prefix}{_label_str((name + '_sum', labels))} {t['sum']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+"""
+Local view of open orders and pending TP/SL orders, kept from the private WebSocket.
+
+The listener seeds it over REST right after subscribing (events that queued up
+meanwhile are applied on top, which is safe because every update is an upsert
+or a removal) and then applies each ``order``/``tpsl`` event before the
+handlers run. ``cancel_all_new_orders`` and ``modify_tp_sl_order_async`` read
+from it instead of fetching pending orders over REST.
+
+The book is only trusted while ``live``: in the leader process, between a
+successful seed and the connection dropping. Everywhere else callers fall back
+to REST.
+"""
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.logger_config import logger
+from modules.rate_limiter import PRIORITY_QUERY
+from modules.retry_policy import QUERY_POLICY
+
+# Statuses after which an order/TP-SL no longer rests on the book.
+DONE_STATUSES = {"FILLED", "CANCELED", "CANCELLED", "PART_FILLED_CANCELED", "EXPIRED", "TRIGGERED"}
+SEED_PAGE_SIZE = 100
+
+
+class OrderBook:
+    def __init__(self):
+        self.orders = {}  # symbol -> {orderId: order}, shaped like trade/get_pending_orders entries
+        self.tpsl = {}    # symbol -> {id: order}, shaped like tpsl/get_pending_orders entries
+        self.live = False
+
+    def invalidate(self):
+        """Connection lost: events may be missed from here on, so stop serving reads."""
+        self.live = False
+
+    async def seed(self) -> bool:
+        """Replace the book with a REST snapshot; the book goes live only if both fetches succeed."""
+        self.live = False
+        try:
+            response = await bitunix_request("get", "/api/v1/futures/trade/get_pending_orders",
+                                             params={"limit": SEED_PAGE_SIZE}, priority=PRIORITY_QUERY,
+                                             retry=QUERY_POLICY)
+            response.raise_for_status()
+            orders = response.json().get("data", {}).get("orderList", [])
+            response = await bitunix_request("get", "/api/v1/futures/tpsl/get_pending_orders",
+                                             params={"limit": SEED_PAGE_SIZE}, priority=PRIORITY_QUERY,
+                                             retry=QUERY_POLICY)
+            response.raise_for_status()
+            tpsl_orders = response.json().get("data") or []
+        except Exception as e:
+            logger.error(f"[ORDER BOOK] Seeding failed, falling back to REST reads: {e}")
+            return False
+
+        if len(orders) >= SEED_PAGE_SIZE or len(tpsl_orders) >= SEED_PAGE_SIZE:
+            logger.warning(f"[ORDER BOOK] Snapshot may be truncated ({len(orders)} orders, "
+                           f"{len(tpsl_orders)} TP/SL); staying on REST reads")
+            return False
+
+        self.orders, self.tpsl = {}, {}
+        for o in orders:
+            self.orders.setdefault(o["symbol"], {})[str(o["orderId"])] = o
+        for o in tpsl_orders:
+            self.tpsl.setdefault(o["symbol"], {})[str(o["id"])] = o
+        self.live = True
+        logger.info(f"[ORDER BOOK] Seeded {len(orders)} orders and {len(tpsl_orders)} TP/SL orders")
+        return True
+
+    def apply(self, topic: str, data: dict):
+        if topic == "order":
+            self._apply_order(data)
+        elif topic == "tpsl":
+            self._apply_tpsl(data)
+
+    def _apply_order(self, data: dict):
+        symbol, order_id = data.get("symbol"), data.get("orderId")
+        if not symbol or order_id is None:
+            return
+        status = data.get("orderStatus") or data.get("status") or ""
+        book = self.orders.setdefault(symbol, {})
+        if data.get("event") == "CLOSE" or status in DONE_STATUSES:
+            book.pop(str(order_id), None)
+            return
+        order = book.setdefault(str(order_id), {})
+        order.update({k: v for k, v in data.items() if k not in ("event", "orderStatus")})
+        order["status"] = status
+
+    def _apply_tpsl(self, data: dict):
+        symbol = data.get("symbol")
+        tpsl_id = data.get("id") or data.get("orderId")
+        if not symbol or tpsl_id is None:
+            return
+        book = self.tpsl.setdefault(symbol, {})
+        if data.get("event") == "CLOSE" or data.get("status") in DONE_STATUSES:
+            book.pop(str(tpsl_id), None)
+            return
+        order = book.setdefault(str(tpsl_id), {})
+        order.update({k: v for k, v in data.items() if k not in ("event", "status")})
+        order["id"] = str(tpsl_id)
+        order.setdefault("tpPrice", None)
+        order.setdefault("slPrice", None)
+
+    def remove_orders(self, symbol: str, order_ids):
+        """Drop orders we just cancelled, ahead of their WebSocket CLOSE events."""
+        book = self.orders.get(symbol, {})
+        for order_id in order_ids:
+            book.pop(str(order_id), None)
+
+    def open_orders(self, symbol: str):
+        """Open orders for ``symbol``, or None if the book cannot be trusted right now."""
+        if not self.live:
+            metrics.incr("order_book_reads", source="rest")
+            return None
+        metrics.incr("order_book_reads", source="local")
+        return [dict(o) for o in self.orders.get(symbol, {}).values()]
+
+    def tpsl_orders(self, symbol: str):
+        """Pending TP/SL orders for ``symbol``, or None if the book cannot be trusted right now."""
+        if not self.live:
+            metrics.incr("order_book_reads", source="rest")
+            return None
+        metrics.incr("order_book_reads", source="local")
+        return [dict(o) for o in self.tpsl.get(symbol, {}).values()]
+
+    def status(self) -> dict:
+        return {
+            "live": self.live,
+            "orders": {symbol: len(book) for symbol, book in self.orders.items() if book},
+            "tpsl": {symbol: len(book) for symbol, book in self.tpsl.items() if book},
+        }
+
+
+order_book = OrderBook()
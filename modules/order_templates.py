@@ -0,0 +1,120 @@
+"""
+Pre-serialized order payloads per symbol and leg.
+
+Most of an order body never changes for a symbol: ``symbol``, ``side``,
+``orderType``, ``tradeSide``, ``effect``, the ``*StopType`` / ``*OrderType``
+pairs. Each ``OrderTemplate`` is serialized once, with the same compact
+separators ``bitunix_client`` uses, and split around its slots (price, qty,
+ids). Submitting then only joins the static chunks with the quoted slot values;
+there is no payload dict and no ``json.dumps``. The result is passed to
+``bitunix_request(content=...)``, which signs exactly those bytes.
+
+Templates are built for a symbol the first time it is used, and up front by
+``prepare`` when a position is created. Slot values must already be strings;
+prices and quantities come from ``symbol_info.format_price`` / ``format_qty``.
+"""
+import json
+
+from modules.logger_config import logger
+
+_MARK = "\x00{}\x00"
+
+
+def _quote(value: str) -> str:
+    value = str(value)
+    if '"' in value or "\\" in value or not value.isprintable():
+        return json.dumps(value)
+    return f'"{value}"'
+
+
+class OrderTemplate:
+    """A JSON body with named string slots; ``render(**slots)`` returns the compact JSON text."""
+
+    __slots__ = ("slots", "_chunks")
+
+    def __init__(self, fields: dict, slots: tuple):
+        self.slots = slots
+        body = json.dumps({k: _MARK.format(k) if k in slots else v for k, v in fields.items()},
+                          separators=(',', ':'))
+        chunks = []
+        for name in slots:
+            marker = json.dumps(_MARK.format(name))
+            head, found, body = body.partition(marker)
+            if not found:
+                raise ValueError(f"Slot {name} is not a field of the template")
+            chunks.append(head)
+        chunks.append(body)
+        self._chunks = tuple(chunks)
+
+    def render(self, **values) -> str:
+        chunks = self._chunks
+        parts = [chunks[0]]
+        for i, name in enumerate(self.slots, 1):
+            parts.append(_quote(values[name]))
+            parts.append(chunks[i])
+        return "".join(parts)
+
+
+def _tpsl_fields(prefix: str) -> dict:
+    return {f"{prefix}Price": None, f"{prefix}StopType": "MARK_PRICE", f"{prefix}OrderType": "MARKET",
+            f"{prefix}Qty": None}
+
+
+class SymbolTemplates:
+    """Every order leg the bot sends for one symbol."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.orders = {}
+        for side in ("BUY", "SELL"):
+            for order_type in ("LIMIT", "MARKET"):
+                for reduce_only in (False, True):
+                    fields = {"symbol": symbol, "qty": None, "price": None, "side": side, "orderType": order_type,
+                              "tradeSide": "CLOSE" if reduce_only else "OPEN", "effect": "GTC", "clientId": None}
+                    if reduce_only:
+                        fields["reduceOnly"] = True
+                    self.orders[side, order_type, reduce_only] = OrderTemplate(fields, ("qty", "price", "clientId"))
+        self.tpsl = {
+            prefix: OrderTemplate({"symbol": symbol, "positionId": None, **_tpsl_fields(prefix)},
+                                  ("positionId", f"{prefix}Price", f"{prefix}Qty"))
+            for prefix in ("tp", "sl")
+        }
+        self.modify = {
+            legs: OrderTemplate({"symbol": symbol, "orderId": None,
+                                 **{k: v for prefix in legs for k, v in _tpsl_fields(prefix).items()}},
+                                ("orderId", *(f"{prefix}{field}" for prefix in legs for field in ("Price", "Qty"))))
+            for legs in (("tp",), ("sl",), ("tp", "sl"))
+        }
+
+    def order(self, side: str, order_type: str, reduce_only: bool, qty: str, price: str, client_id: str) -> str:
+        return self.orders[side.upper(), order_type.upper(), reduce_only].render(qty=qty, price=price,
+                                                                                  clientId=client_id)
+
+    def place_tpsl(self, prefix: str, position_id: str, price: str, qty: str) -> str:
+        return self.tpsl[prefix].render(**{"positionId": position_id, f"{prefix}Price": price, f"{prefix}Qty": qty})
+
+    def modify_tpsl(self, order_data: dict) -> str:
+        """Body for ``/tpsl/modify_order`` from the variable fields (orderId, tp/sl price and qty) in ``order_data``."""
+        legs = tuple(prefix for prefix in ("tp", "sl") if f"{prefix}Price" in order_data)
+        return self.modify[legs].render(**{name: order_data[name] for name in self.modify[legs].slots})
+
+
+class OrderTemplates:
+    def __init__(self):
+        self.symbols = {}
+
+    def get(self, symbol: str) -> SymbolTemplates:
+        symbol = symbol.upper()
+        templates = self.symbols.get(symbol)
+        if templates is None:
+            templates = self.symbols[symbol] = SymbolTemplates(symbol)
+        return templates
+
+    def prepare(self, symbol: str):
+        """Build a symbol's templates ahead of its first order (at position creation)."""
+        if symbol.upper() not in self.symbols:
+            self.get(symbol)
+            logger.info(f"[ORDER TEMPLATES] Prepared order templates for {symbol.upper()}")
+
+
+order_templates = OrderTemplates()
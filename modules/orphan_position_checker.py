@@ -1,198 +1,382 @@
+"""
+Reconciles live Bitunix positions with their Redis state and TP/SL orders.
+
+WebSocket ``order``/``position``/``tpsl`` events mark their symbol dirty in a
+Redis sorted set (score = last event time). The leader reconciles dirty symbols
+every ``ORPHAN_DIRTY_INTERVAL`` seconds once they have been quiet for
+``ORPHAN_DIRTY_SETTLE_SEC`` (so it does not race the event handler itself), and
+sweeps every position only every ``ORPHAN_CHECK_INTERVAL`` seconds. Both
+intervals are jittered by ``RECON_JITTER``; ``RECON_DRY_RUN`` reports diffs
+without touching orders or state.
+"""
 import asyncio
 import json
-from datetime import datetime
-import httpx
+import random
 import secrets
-import base64
+import time
+from datetime import datetime
 
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.bracket_manager import ACC, SL, bracket_manager
 from modules.logger_config import logger
+from modules.rate_limiter import PRIORITY_QUERY
+from modules.retry_policy import QUERY_POLICY
 from modules.redis_client import get_redis
 from modules.redis_state_manager import update_position_state
+from modules.symbol_info import symbol_info
 from modules.utils import (
-    place_tp_sl_order_async,
     update_tp_quantity,
-    update_sl_price,
-    generate_get_sign_api
+    update_sl_price
 )
-from modules.config import BASE_URL, API_KEY, API_SECRET
+from modules.config import ORPHAN_CHECK_INTERVAL, ORPHAN_DIRTY_INTERVAL, ORPHAN_DIRTY_SETTLE_SEC, \
+    RECON_CONCURRENCY, RECON_DRY_RUN, RECON_JITTER, RECON_LOCK_SEC, RECON_MAX_RETRIES, RECON_TIME_BUDGET_SEC, \
+    TP_DISTRIBUTION
 
-TP_DISTRIBUTION = [0.7, 0.1, 0.1, 0.1]
+DIRTY_KEY = "recon:dirty_symbols"
+FAILURES_KEY = "recon:failures"  # symbol -> consecutive failed reconciles
+LOCK_KEY = "recon:lock:{}"  # per symbol, held while a run writes its orders/state
 
+# Only release the symbol lock if this run still holds it.
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
-async def fetch_bitunix_positions():
-    url = f"{BASE_URL}/api/v1/futures/position/get_pending_positions"
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
-    timestamp = str(int(datetime.utcnow().timestamp() * 1000))
-    sign = generate_get_sign_api(nonce, timestamp, "get", "")
-
-    headers = {
-        "api-key": API_KEY,
-        "nonce": nonce,
-        "timestamp": timestamp,
-        "sign": sign,
-        "language": "en-US",
-        "Content-Type": "application/json"
-    }
 
+async def mark_dirty(symbol: str):
+    """Queue ``symbol`` for the next incremental reconcile; never raises."""
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            return resp.json().get("data", [])
+        await get_redis().zadd(DIRTY_KEY, {symbol.upper(): time.time()})
+    except Exception as e:
+        logger.error(f"[ORPHAN CHECK] Could not mark {symbol} dirty: {e}")
+
+
+async def take_dirty_symbols(r) -> set:
+    """Pop symbols that have been quiet for the settle time; newer events stay queued."""
+    cutoff = time.time() - ORPHAN_DIRTY_SETTLE_SEC
+    symbols = await r.zrangebyscore(DIRTY_KEY, "-inf", cutoff)
+    if symbols:
+        await r.zremrangebyscore(DIRTY_KEY, "-inf", cutoff)
+    return set(symbols)
+
+
+def position_direction(position: dict) -> str:
+    return "BUY" if position.get("side") in ("LONG", "BUY", 1) else "SELL"
+
+
+def position_qty(position: dict) -> float:
+    return float(position.get("qty") or position.get("positionSize") or 0)
+
+
+def _has(order: dict, field: str) -> bool:
+    return order.get(field) not in (None, "")
+
+
+def _expected_tps(state: dict, tp_orders: list):
+    """
+    ``(order, expected price, expected qty)`` for the live TP orders, and whether an expected TP is missing.
+
+    Legs the bracket manager placed are held to the price/qty it last sent (``state["bracket"]``),
+    matched by order id. Rebuilt states have no bracket and fall back to the ladder on
+    ``tps``/``total_qty``, matched by index.
+    """
+    bracket = state.get("bracket") or {}
+    leg_ids = dict(state["tp_orders"]) if isinstance(state.get("tp_orders"), dict) else {}
+    if state.get("tp_acc_zone_id"):
+        leg_ids[ACC] = state["tp_acc_zone_id"]
+    legs = {str(order_id): leg for leg, order_id in leg_ids.items() if order_id and leg in bracket}
+    if legs:
+        live = {str(o["id"]): o for o in tp_orders}
+        expected = [(live[order_id], float(bracket[leg][0]), float(bracket[leg][1]))
+                    for order_id, leg in legs.items() if order_id in live]
+        return expected, len(expected) < len(legs)
+    step = state.get("step", 0)
+    tps = state.get("tps", [])[step:]
+    qty = float(state.get("total_qty", 0))
+    info = symbol_info.get(state.get("symbol", ""))
+    expected = [(o, float(tps[i]), info.round_qty(qty * TP_DISTRIBUTION[min(step + i, len(TP_DISTRIBUTION) - 1)]))
+                for i, o in enumerate(tp_orders[:len(tps)])]
+    return expected, not tp_orders
+
+
+async def fetch_bitunix_positions():
+    try:
+        resp = await bitunix_request("get", "/api/v1/futures/position/get_pending_positions",
+                                     priority=PRIORITY_QUERY, retry=QUERY_POLICY)
+        resp.raise_for_status()
+        return resp.json().get("data", [])
     except Exception as e:
         logger.error(f"[ORPHAN CHECK] Failed to fetch live positions: {e}")
-        return []
+        return None
 
 
 async def fetch_pending_tp_sl(symbol: str):
-    url = f"{BASE_URL}/api/v1/futures/tpsl/get_pending_orders"
     params = {"symbol": symbol.upper()}
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
-    timestamp = str(int(datetime.utcnow().timestamp() * 1000))
-    sign = generate_get_sign_api(nonce, timestamp, "get", params)
-
-    headers = {
-        "api-key": API_KEY,
-        "nonce": nonce,
-        "timestamp": timestamp,
-        "sign": sign,
-        "language": "en-US",
-        "Content-Type": "application/json"
-    }
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers, params=params)
-            resp.raise_for_status()
-            return resp.json().get("data", [])
+        resp = await bitunix_request("get", "/api/v1/futures/tpsl/get_pending_orders", params=params,
+                                     priority=PRIORITY_QUERY, retry=QUERY_POLICY)
+        resp.raise_for_status()
+        return resp.json().get("data", [])
     except Exception as e:
         logger.error(f"[ORPHAN CHECK] Failed to fetch TP/SL for {symbol}: {e}")
-        return []
+        return None
 
 
-async def check_orphaned_positions():
-    r = get_redis()
-    keys = await r.keys("position_state:*")
-    logger.info(f"[ORPHAN CHECK] Scanning {len(keys)} keys")
+async def reconcile_position(r, p: dict, tp_sl_orders: list, dry_run: bool = False) -> list:
+    """
+    Bring one live position's Redis state and TP/SL orders in line; ``tp_sl_orders`` are its symbol's.
 
-    live_positions = await fetch_bitunix_positions()
-    redis_position_ids = set()
+    Returns the differences found. With ``dry_run`` nothing is written to the exchange or Redis.
+    """
+    position_id = p["positionId"]
+    symbol = p["symbol"]
+    direction = position_direction(p)
+    entry_price = float(p.get("avgOpenPrice") or p.get("avgEntryPrice") or 0)
+    qty = position_qty(p)
+    diffs = []
+    # Pending TP/SL orders carry tpPrice/tpQty or slPrice/slQty and the closing side, so match on positionId.
+    orders = [o for o in tp_sl_orders if str(o.get("positionId")) == str(position_id)]
+    tp_orders = sorted((o for o in orders if _has(o, "tpPrice")), key=lambda o: float(o["tpPrice"]),
+                       reverse=(direction == "SELL"))
+    sl_order = next((o for o in orders if _has(o, "slPrice") and not _has(o, "tpPrice")), None)
 
-    for key in keys:
-        state_json = await r.get(key)
-        if not state_json:
-            continue
-        state = json.loads(state_json)
-        if state.get("status") == "OPEN":
-            redis_position_ids.add(state.get("position_id"))
+    def found(action: str, **details):
+        diffs.append({"action": action, "symbol": symbol, "direction": direction, **details})
 
-    for p in live_positions:
-        position_id = p["positionId"]
-        symbol = p["symbol"]
-        direction = "BUY" if p["side"] == 1 else "SELL"
-        entry_price = float(p["avgEntryPrice"])
-        qty = float(p["positionSize"])
-
-        if position_id not in redis_position_ids:
-            logger.warning(f"[ORPHAN REDIS MISS] Rebuilding state for {symbol}-{direction}")
-
-            tp_sl_orders = await fetch_pending_tp_sl(symbol)
-            tp_orders = [o for o in tp_sl_orders if o.get("tpPrice") is not None and o["side"] == direction]
-            tps = sorted(
-                [float(o["price"]) for o in tp_orders],
-                reverse=(direction == "SELL")
-            )
-
-            sl_order = next(
-                (o for o in tp_sl_orders if o.get("tpPrice") is None and o["side"] == direction),
-                None
-            )
-            sl_price = float(sl_order["price"]) if sl_order else None
-
-            state = {
-                "symbol": symbol,
-                "direction": direction,
-                "position_id": position_id,
-                "entry_price": entry_price,
-                "total_qty": qty,
-                "step": 0,
-                "status": "OPEN",
-                "interval": "5m",
-                "created_at": datetime.utcnow().isoformat(),
-                "tps": tps,
-                "stop_loss": sl_price,
-                "tp_orders": [o["orderId"] for o in tp_orders],
-                "sl_order_id": sl_order["orderId"] if sl_order else None
-            }
+    state_json = await r.get(f"position_state:{symbol}:{direction}")
+    redis_state = json.loads(state_json) if state_json else None
+    if not redis_state or redis_state.get("status") != "OPEN" or \
+            str(redis_state.get("position_id")) != str(position_id):
+        logger.warning(f"[ORPHAN REDIS MISS] Rebuilding state for {symbol}-{direction}")
+
+        tps = [float(o["tpPrice"]) for o in tp_orders]
+        sl_price = float(sl_order["slPrice"]) if sl_order else None
+
+        state = {
+            "symbol": symbol,
+            "direction": direction,
+            "position_id": position_id,
+            "entry_price": entry_price,
+            "total_qty": qty,
+            "step": 0,
+            "status": "OPEN",
+            "interval": "5m",
+            "created_at": datetime.utcnow().isoformat(),
+            "tps": tps,
+            "stop_loss": sl_price,
+            # Labelled like the bracket manager's, in the price order that gives ``tps``.
+            "tp_orders": {f"TP{i + 1}": o["id"] for i, o in enumerate(tp_orders)},
+            "sl_order_id": sl_order["id"] if sl_order else None
+        }
 
+        found("rebuild_state", position_id=position_id, tps=tps, stop_loss=sl_price)
+        if not dry_run:
             await update_position_state(symbol, direction, position_id, state)
 
+    else:
+        expected_step = redis_state.get("step", 0)
+        expected_tps = redis_state.get("tps", [])[expected_step:]
+        expected_qty = float(redis_state.get("total_qty", 0))
+        # tp_hit moves the SL and lowers its qty; the bracket holds what was last sent.
+        sent_sl = (redis_state.get("bracket") or {}).get(SL)
+        if sent_sl:
+            expected_sl_price, expected_sl_qty = float(sent_sl[0]), float(sent_sl[1])
         else:
-            redis_state = json.loads(await r.get(f"position_state:{symbol}:{direction}"))
+            expected_sl_price, expected_sl_qty = float(redis_state.get("stop_loss") or 0), expected_qty
+        tp_expected, tp_missing = _expected_tps(redis_state, tp_orders)
+        tp_updates = [(o, price, tp_qty) for o, price, tp_qty in tp_expected
+                      if abs(float(o["tpPrice"]) - price) > 0.01 or abs(float(o["tpQty"]) - tp_qty) > 0.01]
 
-            tp_sl_orders = await fetch_pending_tp_sl(symbol)
-            tp_orders = [o for o in tp_sl_orders if o.get("tpPrice") is not None and o["side"] == direction]
-            sl_order = next((o for o in tp_sl_orders if o.get("tpPrice") is None and o["side"] == direction), None)
+        sl_mismatch = False
+        if sl_order:
+            actual_sl_price = float(sl_order["slPrice"])
+            actual_sl_qty = float(sl_order["slQty"])
+            if abs(actual_sl_price - expected_sl_price) > 0.01 or abs(actual_sl_qty - expected_sl_qty) > 0.01:
+                sl_mismatch = True
 
-            expected_step = redis_state.get("step", 0)
-            expected_tps = redis_state.get("tps", [])[expected_step:]
-            expected_qty = float(redis_state.get("total_qty", 0))
-            expected_sl_price = float(redis_state.get("stop_loss") or 0)
-
-            tp_mismatch = False
-            if len(tp_orders) != len(expected_tps):
-                tp_mismatch = True
-            else:
-                for i, o in enumerate(tp_orders):
-                    actual_price = float(o["price"])
-                    actual_qty = float(o["quantity"])
-                    expected_price = expected_tps[i]
-                    if abs(actual_price - expected_price) > 0.01 or abs(actual_qty - expected_qty * 0.1) > 0.01:
-                        tp_mismatch = True
-                        break
-
-            sl_mismatch = False
-            if sl_order:
-                actual_sl_price = float(sl_order["price"])
-                actual_sl_qty = float(sl_order["quantity"])
-                if abs(actual_sl_price - expected_sl_price) > 0.01 or abs(actual_sl_qty - expected_qty) > 0.01:
-                    sl_mismatch = True
-
-            if not tp_orders or not sl_order:
-                logger.warning(f"[ORPHAN TPSL MISSING] Placing TP/SL for {symbol}-{direction}")
-                new_qty = expected_qty
-                sl_order_id = await place_tp_sl_order_async(symbol, tp_price=None, sl_price=expected_sl_price,
-                                                            position_id=position_id, tp_qty=None, qty=new_qty)
-                if sl_order_id:
-                    redis_state["sl_order_id"] = sl_order_id
-                redis_state["tp_orders"] = {}
-                for i in range(0, 4):
-                    tp_price = expected_tps[i] if i < len(expected_tps) else None
-                    tp_ratio = TP_DISTRIBUTION[i]
-                    tp_qty = round(new_qty * tp_ratio, 3)
-                    logger.info(f"[INITIAL TP/SL SET] {symbol} {direction} TP{i + 1} {tp_price}, tpQty: {tp_qty}")
-                    if tp_price:
-                        order_id = await place_tp_sl_order_async(symbol, tp_price=tp_price, sl_price=None,
-                                                                 position_id=position_id, tp_qty=tp_qty, qty=new_qty)
-                        if order_id:
-                            redis_state["tp_orders"][f"TP{i + 1}"] = order_id
-                    else:
-                        logger.info(
-                            f"[INITIAL TP/SL NOT SET FOR]: {symbol} {direction} TP{i + 1} {tp_price}, tpQty: {tp_qty}")
-            else:
-                if tp_mismatch:
-                    logger.warning(f"[ORPHAN TP MISMATCH] Updating TP for {symbol}-{direction}")
-                    for i, o in enumerate(tp_orders):
-                        order_id = o["orderId"]
-                        new_tp_price = expected_tps[i]
-                        new_tp_qty = round(expected_qty * 0.1, 3)  # adjust if you use TP_DISTRIBUTION
+        if tp_missing or not sl_order:
+            logger.warning(f"[ORPHAN TPSL MISSING] Placing TP/SL for {symbol}-{direction}")
+            found("place_tpsl", position_id=position_id, stop_loss=expected_sl_price, tps=expected_tps,
+                  qty=expected_qty)
+            await bracket_manager.restore(symbol, direction, position_id, redis_state, expected_qty,
+                                          dry_run=dry_run, live_orders=orders)
+            if dry_run:
+                return diffs
+        else:
+            if tp_updates:
+                logger.warning(f"[ORPHAN TP MISMATCH] Updating TP for {symbol}-{direction}")
+                for o, new_tp_price, new_tp_qty in tp_updates:
+                    order_id = o["id"]
+                    found("update_tp", order_id=order_id, price=float(o["tpPrice"]), qty=float(o["tpQty"]),
+                          expected_price=new_tp_price, expected_qty=new_tp_qty)
+                    if not dry_run:
                         await update_tp_quantity(order_id, symbol, new_tp_qty, new_tp_price)
 
-                if sl_mismatch:
-                    logger.warning(f"[ORPHAN SL MISMATCH] Updating SL for {symbol}-{direction}")
-                    order_id = sl_order["orderId"]
-                    await update_sl_price(order_id, direction, symbol, expected_sl_price, expected_qty)
+            if sl_mismatch:
+                logger.warning(f"[ORPHAN SL MISMATCH] Updating SL for {symbol}-{direction}")
+                order_id = sl_order["id"]
+                found("update_sl", order_id=order_id, price=actual_sl_price, qty=actual_sl_qty,
+                      expected_price=expected_sl_price, expected_qty=expected_sl_qty)
+                if not dry_run:
+                    await update_sl_price(order_id, direction, symbol, expected_sl_price, expected_sl_qty)
 
+        if not dry_run:
             await update_position_state(symbol, direction, position_id, redis_state)
+    return diffs
+
+
+async def check_orphaned_positions(symbols: set = None, dry_run: bool = RECON_DRY_RUN,
+                                   budget: float = RECON_TIME_BUDGET_SEC) -> dict:
+    """
+    Reconcile live positions against Redis; only those on ``symbols`` when given.
+
+    Symbols are handled ``RECON_CONCURRENCY`` at a time, each fetching its pending
+    TP/SL orders once for both sides. Symbols not started within ``budget``
+    seconds are reported as ``deferred`` (work already in flight is finished,
+    never cut off mid-order). Outside ``dry_run`` each symbol is locked in Redis
+    (``SET NX EX``) so ``/position_recon`` on another worker and the leader's loop
+    never both restore it; a symbol locked elsewhere is ``deferred`` too. ``ok`` is
+    False if live positions could not be fetched.
+    """
+    started = time.monotonic()
+    report = {"ok": False, "dry_run": dry_run, "positions": 0, "reconciled": [], "deferred": [], "failed": [],
+              "diffs": []}
+    live_positions = await fetch_bitunix_positions()
+    if live_positions is None:
+        return report
+    if symbols is not None:
+        live_positions = [p for p in live_positions if p["symbol"] in symbols]
+
+    by_symbol = {}
+    for p in live_positions:
+        by_symbol.setdefault(p["symbol"], []).append(p)
+    scope = "all symbols" if symbols is None else f"{len(symbols)} dirty symbols"
+    logger.info(f"[ORPHAN CHECK] Reconciling {len(live_positions)} positions on {scope}"
+                + (" (dry run)" if dry_run else ""))
+    report.update(ok=True, positions=len(live_positions))
+
+    r = get_redis()
+    semaphore = asyncio.Semaphore(RECON_CONCURRENCY)
+    token = secrets.token_hex(8)
+
+    async def reconcile_positions(symbol: str, positions: list):
+        tp_sl_orders = await fetch_pending_tp_sl(symbol)
+        if tp_sl_orders is None:
+            # Without the live orders every leg would look missing and be placed twice.
+            report["failed"].append(symbol)
+            return
+        for p in positions:
+            try:
+                report["diffs"] += await reconcile_position(r, p, tp_sl_orders, dry_run=dry_run)
+            except Exception as e:
+                logger.error(f"[ORPHAN CHECK] Failed to reconcile {symbol} {p.get('positionId')}: {e}")
+                report["failed"].append(symbol)
+                return
+        report["reconciled"].append(symbol)
+
+    async def reconcile_symbol(symbol: str, positions: list):
+        async with semaphore:
+            if time.monotonic() - started > budget:
+                report["deferred"].append(symbol)
+                return
+            if dry_run:
+                await reconcile_positions(symbol, positions)
+                return
+            lock_key = LOCK_KEY.format(symbol)
+            try:
+                locked = await r.set(lock_key, token, nx=True, ex=RECON_LOCK_SEC)
+            except Exception as e:
+                logger.error(f"[ORPHAN CHECK] Could not lock {symbol}: {e}")
+                report["failed"].append(symbol)
+                return
+            if not locked:
+                logger.info(f"[ORPHAN CHECK] {symbol} is being reconciled elsewhere, deferring it")
+                report["deferred"].append(symbol)
+                return
+            try:
+                await reconcile_positions(symbol, positions)
+            finally:
+                try:
+                    await r.eval(_UNLOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.error(f"[ORPHAN CHECK] Could not unlock {symbol}: {e}")
+
+    await asyncio.gather(*(reconcile_symbol(symbol, positions) for symbol, positions in by_symbol.items()))
+
+    scope_label = "full" if symbols is None else "dirty"
+    elapsed = time.monotonic() - started
+    metrics.observe("orphan_check_seconds", elapsed, scope=scope_label)
+    metrics.incr("orphan_positions_checked", len(live_positions), scope=scope_label)
+    metrics.incr("orphan_diffs", len(report["diffs"]), dry_run=dry_run)
+    if report["deferred"]:
+        metrics.incr("orphan_symbols_deferred", len(report["deferred"]))
+        logger.warning(f"[ORPHAN CHECK] Deferred {len(report['deferred'])} symbols "
+                       f"(budget of {budget}s used up or reconciled elsewhere)")
+    for diff in report["diffs"]:
+        logger.info(f"[ORPHAN DIFF{' DRY RUN' if dry_run else ''}] {diff}")
+    report["elapsed_sec"] = round(elapsed, 3)
+    return report
+
 
-    return f"[ORPHAN CHECK] Completed"
+async def requeue_dirty(r, symbols):
+    # Score 0 makes them eligible next run; nx keeps a newer event's score.
+    if symbols:
+        await r.zadd(DIRTY_KEY, {symbol: 0 for symbol in symbols}, nx=True)
+
+
+async def requeue_failed(r, symbols):
+    """Retry failed symbols after ``ORPHAN_DIRTY_INTERVAL * 2^n``; after ``RECON_MAX_RETRIES`` leave them to the sweep."""
+    for symbol in symbols:
+        failures = await r.hincrby(FAILURES_KEY, symbol, 1)
+        if failures > RECON_MAX_RETRIES:
+            await r.hdel(FAILURES_KEY, symbol)
+            metrics.incr("orphan_symbols_dropped")
+            logger.error(f"[ORPHAN CHECK] {symbol} failed {failures - 1} times in a row, "
+                         f"leaving it to the next full sweep")
+            continue
+        # The settle cutoff in take_dirty_symbols makes a future score a delay.
+        await r.zadd(DIRTY_KEY, {symbol: time.time() + ORPHAN_DIRTY_INTERVAL * 2 ** failures}, nx=True)
+
+
+async def clear_failures(r, symbols):
+    if symbols:
+        await r.hdel(FAILURES_KEY, *symbols)
+
+
+async def _requeue(r, report: dict):
+    await requeue_dirty(r, report["deferred"])
+    await requeue_failed(r, report["failed"])
+    await clear_failures(r, report["reconciled"])
+
+
+def _jittered(seconds: float) -> float:
+    return seconds * random.uniform(1 - RECON_JITTER, 1 + RECON_JITTER)
+
+
+async def run_orphan_checker(interval: int = ORPHAN_CHECK_INTERVAL):
+    """Background reconcile loop; started by the elected leader only, with a full sweep first."""
+    r = get_redis()
+    next_full = time.monotonic()
+    while True:
+        try:
+            if time.monotonic() >= next_full:
+                report = await check_orphaned_positions()
+                if report["ok"]:
+                    next_full = time.monotonic() + _jittered(interval)
+                await _requeue(r, report)
+            else:
+                symbols = await take_dirty_symbols(r)
+                if symbols:
+                    report = await check_orphaned_positions(symbols)
+                    # Positions could not be fetched, or the budget ran out: try those again next round.
+                    if not report["ok"]:
+                        await requeue_dirty(r, symbols)
+                    else:
+                        await _requeue(r, report)
+        except Exception as e:
+            logger.error(f"[ORPHAN CHECK] Reconcile run failed: {e}")
+        await asyncio.sleep(_jittered(ORPHAN_DIRTY_INTERVAL))
@@ -1,6 +1,8 @@
+import asyncio
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from modules.config import DB_CONFIG, DEFAULT_STATE
+from modules.circuit_breaker import get_breaker
+from modules.config import DB_CONFIG, DEFAULT_STATE, OFFLINE_MODE
 from modules.logger_config import logger
 from datetime import datetime
 
@@ -9,6 +11,19 @@ def get_db_conn():
     return psycopg2.connect(**DB_CONFIG)
 
 
+async def call_postgres(fn, *args, **kwargs):
+    """Run a blocking DB function off the event loop, guarded by the ``postgres`` breaker."""
+    breaker = get_breaker("postgres")
+    breaker.check()
+    try:
+        result = await asyncio.to_thread(fn, *args, **kwargs)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        breaker.failure(e)
+        raise
+    breaker.success()
+    return result
+
+
 create_statements = ["""
                 CREATE TABLE IF NOT EXISTS position_state (
                     symbol TEXT NOT NULL,
@@ -183,9 +198,12 @@ def log_signal_event(symbol: str, direction: str, interval: str, entry_price: fl
                 conn.commit()
                 logger.info(f"[SIGNAL LOGGED] {symbol}-{direction} | Score: {conviction_score}")
 
+    except psycopg2.OperationalError:
+        raise  # connection trouble is for the caller's breaker to see
     except Exception as e:
         logger.error(f"[SIGNAL LOGGING ERROR] {symbol}-{direction}: {e}")
 
 
 # Ensure table exists at import
-ensure_table()
+if not OFFLINE_MODE:
+    ensure_table()
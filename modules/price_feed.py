@@ -1,16 +1,22 @@
 import asyncio
+import time
 from datetime import datetime, timedelta
 
-import httpx
-
-from modules.config import BASE_URL
+from modules import metrics
+from modules.bar_cache import close_price_cache, conviction_cache
+from modules.bitunix_client import bitunix_request
+from modules.config import PRICE_CACHE_MAX_AGE, WS_PRICE_MAX_AGE
 from modules.logger_config import logger
 from modules.market_filters import get_high_conviction_score
-from modules.redis_state_manager import record_signal_log
+from modules.market_snapshot import market_snapshot
+from modules.rate_limiter import PRIORITY_MARKET
 
 # from modules.market_filters import get_funding_rate, get_open_interest, get_open_interest_trend
 
-BITUNIX_BASE_URL = "https://fapi.bitunix.com"
+# symbol -> (mark price, monotonic time it was fetched); fallback while the ticker endpoint is failing
+_mark_price_cache = {}
+# symbol -> (mark price, monotonic time received) from the public WS ``price`` channel (leader only)
+_ws_mark_prices = {}
 
 # Interval mapping
 INTERVAL_MINUTES = {
@@ -50,32 +56,32 @@ def get_bar_start_for_close(close_time: datetime, interval_min: int) -> int:
 async def get_previous_candle_close_price(symbol: str, interval: str, reference_time: datetime,
                                           max_retries: int = 3) -> float:
     actual_interval = "1m" if interval == "3m" else interval
-    url = f"{BITUNIX_BASE_URL}/api/v1/futures/market/kline"
+    path = "/api/v1/futures/market/kline"
     expected_ts = int(get_previous_bar_close(reference_time, actual_interval).timestamp() * 1000)
 
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                params = {
-                    "symbol": symbol.upper(),
-                    "interval": actual_interval,
-                    "limit": 2,
-                    "type": "MARK_PRICE"
-                }
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                candles = response.json().get("data", [])
-                for candle in candles:
-                    if int(candle.get("time", 0)) == expected_ts:
-                        logger.info(f"[MATCHED BUY CANDLE]: {candle}")
-                        return float(candle.get("close"))
-
-                if attempt == 2:
-                    mark_price = await get_latest_mark_price(symbol)
-                    return mark_price if mark_price else \
-                        logger.warning(
-                            f"[BUY CANDLE NOT FOUND] Expected {expected_ts}, Got {[int(c['time']) for c in candles]}")
-                await asyncio.sleep(1)
+            params = {
+                "symbol": symbol.upper(),
+                "interval": actual_interval,
+                "limit": 2,
+                "type": "MARK_PRICE"
+            }
+            response = await bitunix_request("get", path, params=params, signed=False, priority=PRIORITY_MARKET,
+                                             timeout=5.0)
+            response.raise_for_status()
+            candles = response.json().get("data", [])
+            for candle in candles:
+                if int(candle.get("time", 0)) == expected_ts:
+                    logger.info(f"[MATCHED BUY CANDLE]: {candle}")
+                    return float(candle.get("close"))
+
+            if attempt == 2:
+                mark_price = await get_latest_mark_price(symbol)
+                return mark_price if mark_price else \
+                    logger.warning(
+                        f"[BUY CANDLE NOT FOUND] Expected {expected_ts}, Got {[int(c['time']) for c in candles]}")
+            await asyncio.sleep(1)
         except Exception as e:
             logger.error(f"[BUY CANDLE FETCH ERROR] Attempt {attempt + 1}: {e}")
             await asyncio.sleep(1)
@@ -85,31 +91,31 @@ async def get_previous_candle_close_price(symbol: str, interval: str, reference_
 
 async def get_latest_close_price_current(symbol: str, interval: str, expected_ts: int, max_retries: int = 3) -> float:
     actual_interval = "1m" if interval == "3m" else interval
-    url = f"{BITUNIX_BASE_URL}/api/v1/futures/market/kline"
+    path = "/api/v1/futures/market/kline"
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                params = {
-                    "symbol": symbol.upper(),
-                    "interval": actual_interval,
-                    "limit": 1
-                }
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json().get("data", [])
-                if not data:
-                    raise ValueError("No candle data returned")
-                candle = data[0]
-                candle_ts = int(candle.get("time", 0))
-                if candle_ts == expected_ts:
-                    logger.info(f"[LATEST CANDLE MATCHED]: {candle}")
-                    return float(candle.get("close"))
-
-                if attempt == 2:
-                    mark_price = await get_latest_mark_price(symbol)
-                    return mark_price if mark_price else \
-                        logger.warning(f"[CANDLE MISMATCH] Expected {expected_ts}, Got {candle_ts}. Retrying...")
-                await asyncio.sleep(1)
+            params = {
+                "symbol": symbol.upper(),
+                "interval": actual_interval,
+                "limit": 1
+            }
+            response = await bitunix_request("get", path, params=params, signed=False, priority=PRIORITY_MARKET,
+                                             timeout=5.0)
+            response.raise_for_status()
+            data = response.json().get("data", [])
+            if not data:
+                raise ValueError("No candle data returned")
+            candle = data[0]
+            candle_ts = int(candle.get("time", 0))
+            if candle_ts == expected_ts:
+                logger.info(f"[LATEST CANDLE MATCHED]: {candle}")
+                return float(candle.get("close"))
+
+            if attempt == 2:
+                mark_price = await get_latest_mark_price(symbol)
+                return mark_price if mark_price else \
+                    logger.warning(f"[CANDLE MISMATCH] Expected {expected_ts}, Got {candle_ts}. Retrying...")
+            await asyncio.sleep(1)
         except Exception as e:
             logger.error(f"[SELL CANDLE FETCH ERROR] Attempt {attempt + 1}: {e}")
             await asyncio.sleep(1)
@@ -118,8 +124,24 @@ async def get_latest_close_price_current(symbol: str, interval: str, expected_ts
 
 
 # --- Signal Validator ---
+def _bar_cache_key(symbol: str, direction: str, interval: str, signal_time: datetime):
+    """Key for the bar ``signal_time`` falls in, and the epoch time that bar has rolled over by."""
+    bar_close = get_next_bar_close(signal_time, interval)
+    expires_in = (bar_close - datetime.utcnow()).total_seconds() + INTERVAL_MINUTES.get(interval, 1) * 60
+    return (symbol.upper(), direction, interval, bar_close), time.time() + expires_in
+
+
 async def is_false_signal(symbol: str, entry_price: float, direction: str, interval: str,
                           signal_time: datetime, buffer_pct: float = 0.001) -> dict[str, bool | float]:
+    # The close price only depends on the bar; every signal on it after the first reuses it.
+    key, expires_at = _bar_cache_key(symbol, direction, interval, signal_time)
+    close_price = await close_price_cache.get(
+        key, expires_at, lambda: _signal_close_price(symbol, direction, interval, signal_time),
+        keep=lambda price: price is not None)
+    return evaluate_close_price(entry_price, close_price, direction, buffer_pct)
+
+
+async def _signal_close_price(symbol: str, direction: str, interval: str, signal_time: datetime) -> float:
     if direction == "SELL":
         logger.info(f"[Validate Signal]: {symbol} {direction} {interval}")
         bar_close_time = get_next_bar_close(signal_time, interval)
@@ -140,7 +162,18 @@ async def is_false_signal(symbol: str, entry_price: float, direction: str, inter
                 logger.info(f"Waiting {wait_seconds:.2f} seconds for bar to close...")
                 await asyncio.sleep(wait_seconds)
         close_price = await get_previous_candle_close_price(symbol, interval, signal_time)
+    return close_price
+
+
+async def get_cached_conviction_score(symbol: str, direction: str, interval: str, signal_time: datetime) -> dict:
+    """Conviction score once per (symbol, direction, interval, bar); error fallbacks are not cached."""
+    key, expires_at = _bar_cache_key(symbol, direction, interval, signal_time)
+    return await conviction_cache.get(key, expires_at, lambda: get_high_conviction_score(symbol, direction, interval),
+                                      keep=lambda result: "error" not in result)
 
+
+def evaluate_close_price(entry_price: float, close_price: float, direction: str,
+                         buffer_pct: float = 0.001) -> dict[str, bool | float]:
     buffer = close_price * buffer_pct
     if direction == "BUY" and entry_price <= (close_price + buffer):
         logger.info(
@@ -162,82 +195,55 @@ async def is_false_signal(symbol: str, entry_price: float, direction: str, inter
     }
 
 
-async def get_latest_mark_price(symbol: str) -> float:
-    url = f"{BASE_URL}/api/v1/futures/market/tickers"
+def on_price_message(message: dict):
+    """Public WS ``price`` channel: keep the latest streamed mark price per symbol."""
+    mark_price = (message.get("data") or {}).get("mp")
+    if mark_price and message.get("symbol"):
+        _ws_mark_prices[message["symbol"].upper()] = (float(mark_price), time.monotonic())
+
+
+async def get_latest_mark_price(symbol: str, priority: int = PRIORITY_MARKET) -> float:
+    streamed = _ws_mark_prices.get(symbol.upper())
+    if streamed and time.monotonic() - streamed[1] <= WS_PRICE_MAX_AGE:
+        metrics.incr("mark_price_source", source="ws")
+        return streamed[0]
+    snapshot_price = market_snapshot.mark_price(symbol)
+    if snapshot_price is not None:
+        metrics.incr("mark_price_source", source="snapshot")
+        return snapshot_price
+    metrics.incr("mark_price_source", source="rest")
+
+    path = "/api/v1/futures/market/tickers"
     params = {"symbols": symbol.upper()}
 
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            tickers = response.json().get("data", [])
+        response = await bitunix_request("get", path, params=params, signed=False, priority=priority,
+                                         timeout=5.0)
+        response.raise_for_status()
+        tickers = response.json().get("data", [])
 
         if not tickers:
             raise ValueError(f"No ticker found for {symbol}")
 
-        return float(tickers[0]["markPrice"])
+        mark_price = float(tickers[0]["markPrice"])
+        _mark_price_cache[symbol.upper()] = (mark_price, time.monotonic())
+        return mark_price
 
     except Exception as e:
+        cached = _mark_price_cache.get(symbol.upper())
+        if cached and time.monotonic() - cached[1] <= PRICE_CACHE_MAX_AGE:
+            metrics.incr("mark_price_cache_used")
+            logger.warning(f"[MARK PRICE CACHED] {symbol}: using {cached[0]} from "
+                           f"{time.monotonic() - cached[1]:.0f}s ago ({e})")
+            return cached[0]
         logger.error(f"[MARK PRICE ERROR] Failed to fetch mark price for {symbol}: {e}")
         raise RuntimeError(f"Failed to fetch mark price for {symbol}: {e}")
 
 
-async def validate_and_process_signal(symbol: str, entry_price: float, direction: str, interval: str,
-                                      signal_time: datetime, market_qty: float, callback):
-    from modules.utils import evaluate_signal_received
-    try:
-        # Run checks concurrently
-        is_false_task = is_false_signal(symbol, entry_price, direction, interval, signal_time)
-        conviction_data_task = get_high_conviction_score(symbol, direction, interval)
-        market_qty_revised_res = await evaluate_signal_received(symbol, direction, market_qty,
-                                                                interval)
-        market_qty_revised = market_qty_revised_res.get("reverse_qty", 0)
-        trade_action = market_qty_revised_res.get("action", "ignore")
-        is_false_res, conviction_data = await asyncio.gather(is_false_task, conviction_data_task)
-        is_false = is_false_res["is_valid"]
-        close_price = is_false_res["close_price"]
-
-        conviction_score = conviction_data["score"]
-        funding_rate = conviction_data["funding_rate"]
-        oi_trend = []
-        price_trend = conviction_data["price_trend"]
-        volume_trend = conviction_data["volume_trend"]
-        volume_spike_ratio = conviction_data["volume_spike_ratio"]
-
-        logger.info(f"[SIGNAL EVAL] {symbol}-{direction} | is_false={is_false} | score={conviction_score}")
-
-        # Decision thresholds
-        should_trade = (not is_false and conviction_score >= 0.0) or \
-                       (is_false and conviction_score >= 0.7) if market_qty_revised == market_qty else \
-            (not is_false) or \
-            (is_false and conviction_score >= 0.7)
-
-        was_executed = False
-        if should_trade:
-            logger.info(f"[TRADE CONFIRMED] {symbol} {direction} @ {entry_price} with score {conviction_score}")
-            await callback(market_qty_revised, trade_action.upper())
-            was_executed = True
-        else:
-            reason = "false_signal" if is_false else "low_confidence"
-            logger.warning(f"[TRADE SKIPPED] {symbol} {direction} skipped due to {reason}, score={conviction_score}")
-            # log_false_signal(symbol, direction, entry_price, interval, reason, signal_time)
-
-        await record_signal_log(
-            symbol=symbol,
-            direction=direction,
-            interval=interval,
-            entry_price=entry_price,
-            close_price=close_price,
-            conviction_score=conviction_score,
-            funding_rate=funding_rate,
-            oi_trend=oi_trend,
-            price_trend=price_trend,
-            volume_trend=volume_trend,
-            volume_spike_ratio=volume_spike_ratio,
-            is_false_signal=is_false,
-            was_executed=was_executed,
-            signal_time=signal_time
-        )
-
-    except Exception as e:
-        logger.error(f"[VALIDATION ERROR] {symbol}: {e}")
+def should_execute_trade(is_false: bool, conviction_score: float, market_qty_revised: float,
+                         market_qty: float, high_conviction: float = 0.7) -> bool:
+    # ``is_false`` is the close-price check's ``is_valid`` flag; set, only a high-conviction score overrides it.
+    if is_false:
+        return conviction_score >= high_conviction
+    # A plain entry also needs a non-negative score; a reversal/upgrade (revised qty) does not.
+    return market_qty_revised != market_qty or conviction_score >= 0.0
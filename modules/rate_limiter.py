@@ -0,0 +1,133 @@
+"""
+Client-side rate-limit governor for the Bitunix REST API.
+
+One token bucket per endpoint class (trade, tpsl, account, market), shared by
+every call in the process. Waiters are served by priority, so stop-loss
+moves and closes go before entries, entries before account reads, and market
+data polling last. When Bitunix throttles us (HTTP 429, a rate-limit ``code``
+or ``Retry-After``) the bucket pauses and halves its rate, then creeps back
+to the configured rate on successful calls.
+
+Limits are per worker process; with several uvicorn workers set the
+``BITUNIX_RATE_*`` values to the account limit divided by ``WEB_CONCURRENCY``.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from modules import metrics
+from modules.config import BITUNIX_RATE_LIMITS
+from modules.logger_config import logger
+
+PRIORITY_CRITICAL = 0  # SL moves, position closes, reversal flash close
+PRIORITY_ORDER = 1     # entries, TP placement and modification
+PRIORITY_QUERY = 2     # account/order reads
+PRIORITY_MARKET = 3    # klines, tickers, funding
+
+MIN_RATE_FRACTION = 0.1
+RECOVERY_FRACTION = 0.05  # of the configured rate, per successful call
+DEFAULT_PENALTY_SEC = 1.0
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0][2].set()
+
+    async def acquire(self, priority: int = PRIORITY_QUERY):
+        started = time.perf_counter()
+        entry = [priority, next(self._seq), asyncio.Event()]
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                if self._waiters[0] is entry:
+                    self._refill()
+                    now = time.monotonic()
+                    if now >= self.blocked_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        heapq.heappop(self._waiters)
+                        self._wake_head()
+                        break
+                    delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                    entry[2].clear()
+                    try:
+                        await asyncio.wait_for(entry[2].wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    entry[2].clear()
+                    await entry[2].wait()
+        except asyncio.CancelledError:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake_head()
+            raise
+        finally:
+            metrics.set_gauge("bitunix_rate_waiting", len(self._waiters), bucket=self.name)
+        metrics.observe("bitunix_rate_wait_seconds", time.perf_counter() - started,
+                        bucket=self.name, priority=priority)
+
+    def penalize(self, retry_after: float = None):
+        """Exchange said slow down: pause the bucket and halve its rate."""
+        self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate / 2)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or DEFAULT_PENALTY_SEC))
+        metrics.incr("bitunix_rate_limited", bucket=self.name)
+        metrics.set_gauge("bitunix_rate_per_sec", self.rate, bucket=self.name)
+        logger.warning(f"[RATE LIMIT] {self.name} throttled by exchange; rate now {self.rate:.2f}/s, "
+                       f"paused {retry_after or DEFAULT_PENALTY_SEC:.1f}s")
+        self._wake_head()
+
+    def reward(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_FRACTION)
+            metrics.set_gauge("bitunix_rate_per_sec", self.rate, bucket=self.name)
+
+    def status(self) -> dict:
+        self._refill()
+        return {
+            "rate": round(self.rate, 3),
+            "base_rate": self.base_rate,
+            "tokens": round(self.tokens, 3),
+            "waiting": len(self._waiters),
+            "blocked_for_sec": round(max(self.blocked_until - time.monotonic(), 0.0), 3),
+        }
+
+
+BUCKETS = {name: TokenBucket(name, rate, burst) for name, (rate, burst) in BITUNIX_RATE_LIMITS.items()}
+
+
+def endpoint_class(path: str) -> str:
+    if "/tpsl/" in path:
+        return "tpsl"
+    if "/trade/" in path:
+        return "trade"
+    if "/market/" in path:
+        return "market"
+    return "account"
+
+
+def get_bucket(path: str) -> TokenBucket:
+    return BUCKETS[endpoint_class(path)]
+
+
+def get_rate_limit_status() -> dict:
+    return {name: bucket.status() for name, bucket in BUCKETS.items()}
@@ -3,6 +3,11 @@ import redis.asyncio as redis
 import os
 from urllib.parse import urlparse
 
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from modules.circuit_breaker import get_breaker
+from modules.config import REDIS_CONNECT_TIMEOUT, REDIS_SOCKET_TIMEOUT
+
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")  # Render injects this automatically
 if not redis_url:
     raise ValueError("REDIS_URL not set. Make sure Redis add-on is configured.")
@@ -10,11 +15,28 @@ if not redis_url:
 url = urlparse(redis_url)
 
 
+class BreakerRedis(redis.Redis):
+    """Redis client whose commands fail fast while the ``redis`` circuit breaker is open."""
+
+    async def execute_command(self, *args, **options):
+        breaker = get_breaker("redis")
+        breaker.check()
+        try:
+            result = await super().execute_command(*args, **options)
+        except (RedisConnectionError, RedisTimeoutError) as e:
+            breaker.failure(e)
+            raise
+        breaker.success()
+        return result
+
+
 def get_redis():
-    return redis.Redis(
+    return BreakerRedis(
         host=url.hostname,
         port=url.port,
         db=0,  # default
         decode_responses=True,
-        password=url.password or None  # handle no-password case
+        password=url.password or None,  # handle no-password case
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
     )
@@ -1,8 +1,11 @@
 import json
+from modules import metrics
+from modules.config import DEFAULT_STATE
+from modules.logger_config import logger
 from modules.redis_client import get_redis
 from modules.postgres_state_manager import get_or_create_symbol_direction_state as pg_get, \
     update_position_state as pg_update,delete_position_state as pg_delete
-from modules.postgres_state_manager import log_signal_event
+from modules.postgres_state_manager import call_postgres, log_signal_event
 
 
 # Initialize Redis client (adjust configuration as needed)
@@ -11,11 +14,24 @@ from modules.postgres_state_manager import log_signal_event
 r = get_redis()
 
 
+# Symbols with a position state in either direction, so readers need not SCAN position_state:*.
+POSITION_SYMBOLS_KEY = "position_symbols"
+
+
 def _redis_key(symbol: str, direction: str, position_id: str = "") -> str:
     base = f"position_state:{symbol}:{direction}"
     return f"{base}:{position_id}" if position_id else base
 
 
+async def _mirror(fn, *args):
+    """Postgres only mirrors Redis; while it is unavailable the write is skipped, not retried."""
+    try:
+        await call_postgres(fn, *args)
+    except Exception as e:
+        metrics.incr("postgres_mirror_skipped", op=fn.__name__)
+        logger.warning(f"[DB MIRROR SKIPPED] {fn.__name__}{args[:2]}: {e}")
+
+
 async def get_or_create_symbol_direction_state(symbol: str, direction: str, position_id: str = "",
                                                reversal_check: bool = False, upgrade_check: bool = False) -> dict:
     key = _redis_key(symbol, direction)
@@ -25,22 +41,32 @@ async def get_or_create_symbol_direction_state(symbol: str, direction: str, posi
     if reversal_check or upgrade_check:
         return None
 
-    # Fallback to Postgres
-    state = pg_get(symbol, direction, position_id)
+    # Fallback to Postgres; without it start from a fresh PENDING state kept in Redis only
+    try:
+        state = await call_postgres(pg_get, symbol, direction, position_id)
+    except Exception as e:
+        logger.warning(f"[DB UNAVAILABLE] New state for {symbol} {direction} kept in Redis only: {e}")
+        state = {**DEFAULT_STATE, "symbol": symbol, "direction": direction, "position_id": position_id,
+                 "tps": [], "qty_distribution": list(DEFAULT_STATE["qty_distribution"]), "status": "PENDING"}
     await r.set(key, json.dumps(state, default=str))
+    await r.sadd(POSITION_SYMBOLS_KEY, symbol)
     return state
 
 
 async def update_position_state(symbol: str, direction: str, position_id: str, updated_state: dict):
     key = _redis_key(symbol, direction)
     await r.set(key, json.dumps(updated_state, default=str))
-    pg_update(symbol, direction, position_id, updated_state)
+    await r.sadd(POSITION_SYMBOLS_KEY, symbol)
+    await _mirror(pg_update, symbol, direction, position_id, updated_state)
 
 
 async def delete_position_state(symbol: str, direction: str, position_id: str = ""):
     key = _redis_key(symbol, direction)
     await r.delete(key)
-    pg_delete(symbol, direction, '')
+    other_direction = "SELL" if direction == "BUY" else "BUY"
+    if not await r.exists(_redis_key(symbol, other_direction)):
+        await r.srem(POSITION_SYMBOLS_KEY, symbol)
+    await _mirror(pg_delete, symbol, direction, '')
 
 
 async def record_signal_log(symbol, direction, interval, entry_price, close_price,
@@ -48,7 +74,8 @@ async def record_signal_log(symbol, direction, interval, entry_price, close_pric
                             oi_trend, price_trend, volume_trend,
                             volume_spike_ratio, is_false_signal, was_executed, signal_time):
     try:
-        log_signal_event(
+        await call_postgres(
+            log_signal_event,
             symbol=symbol,
             direction=direction,
             interval=interval,
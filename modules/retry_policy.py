@@ -0,0 +1,147 @@
+"""
+Retry policies for Bitunix REST calls.
+
+Failures are classified before deciding to retry:
+
+* ``safe``      - the exchange certainly did not act (connect errors, HTTP 429,
+                  rate-limit codes); always retried.
+* ``ambiguous`` - the request may have been executed (read timeouts, 5xx,
+                  dropped connections); retried only by policies for
+                  idempotent calls, or after ``recover`` confirmed nothing
+                  happened (market orders are looked up by ``clientId``).
+* ``fatal``     - everything else, e.g. business error codes; returned as is.
+
+Delays use exponential backoff with full jitter, bounded by the policy's
+overall deadline.
+"""
+import asyncio
+import hashlib
+import random
+import secrets
+import time
+
+import httpx
+
+from modules import metrics
+from modules.logger_config import logger
+
+# Bitunix answers throttled requests with HTTP 200 and this code.
+RATE_LIMIT_CODES = {10006}
+
+SAFE_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+AMBIGUOUS_EXCEPTIONS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.ReadError, httpx.WriteError,
+                        httpx.RemoteProtocolError)
+
+
+class RetryPolicy:
+    def __init__(self, name: str, attempts: int, base_delay: float, max_delay: float, deadline: float,
+                 retry_ambiguous: bool):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_ambiguous = retry_ambiguous
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter backoff for the retry following ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Entries: retried after an ambiguous failure only once the clientId lookup shows no order.
+ORDER_POLICY = RetryPolicy("order", attempts=4, base_delay=0.25, max_delay=2.0, deadline=10.0,
+                           retry_ambiguous=False)
+# Closes and cancels are idempotent on the exchange side, so ambiguous failures are retried.
+CLOSE_POLICY = RetryPolicy("close", attempts=5, base_delay=0.2, max_delay=2.0, deadline=10.0,
+                           retry_ambiguous=True)
+# TP/SL placement has no clientId: a blind retry after a timeout could stack a second TP.
+TPSL_PLACE_POLICY = RetryPolicy("tpsl_place", attempts=4, base_delay=0.5, max_delay=4.0, deadline=15.0,
+                                retry_ambiguous=False)
+# Modifying an existing TP/SL to the same values twice is harmless.
+TPSL_MODIFY_POLICY = RetryPolicy("tpsl_modify", attempts=4, base_delay=0.5, max_delay=4.0, deadline=15.0,
+                                 retry_ambiguous=True)
+QUERY_POLICY = RetryPolicy("query", attempts=3, base_delay=0.3, max_delay=2.0, deadline=8.0,
+                           retry_ambiguous=True)
+
+
+def make_client_id(*parts) -> str:
+    """Deterministic clientId so every retry (and replay) of the same order carries the same id."""
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:32]
+
+
+def new_client_id() -> str:
+    return secrets.token_hex(16)
+
+
+def classify_response(response: httpx.Response) -> str:
+    if response.status_code == 429:
+        return "safe"
+    if response.status_code >= 500:
+        return "ambiguous"
+    try:
+        if response.json().get("code") in RATE_LIMIT_CODES:
+            return "safe"
+    except (ValueError, AttributeError):
+        pass
+    return "ok" if response.status_code < 400 else "fatal"
+
+
+def classify_exception(exc: Exception) -> str:
+    if isinstance(exc, SAFE_EXCEPTIONS):
+        return "safe"
+    if isinstance(exc, AMBIGUOUS_EXCEPTIONS):
+        return "ambiguous"
+    return "fatal"
+
+
+async def request_with_retry(send, policy: RetryPolicy, description: str, recover=None) -> httpx.Response:
+    """
+    Call ``send()`` until it returns a non-retryable response or the policy runs out.
+
+    ``recover()`` runs before retrying an ambiguous failure; if it returns a
+    response (e.g. the order was found by clientId) that response is returned.
+    """
+    deadline = time.monotonic() + policy.deadline
+    for attempt in range(policy.attempts):
+        response, error = None, None
+        try:
+            response = await send()
+            outcome = classify_response(response)
+            reason = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = e
+            outcome = classify_exception(e)
+            reason = repr(e)
+
+        if outcome == "fatal" and error is not None:
+            raise error
+        if outcome in ("ok", "fatal"):
+            return response
+
+        delay = policy.delay(attempt)
+        out_of_budget = attempt + 1 >= policy.attempts or time.monotonic() + delay > deadline
+        if outcome == "ambiguous" and recover is not None and not out_of_budget:
+            try:
+                recovered = await recover()
+            except Exception as e:
+                # Cannot tell whether the first request landed; resending could duplicate it.
+                logger.error(f"[RETRY] {description}: lookup before retry failed ({e})")
+                recovered, out_of_budget = None, True
+            if recovered is not None:
+                metrics.incr("bitunix_retry_recovered", policy=policy.name)
+                logger.info(f"[RETRY] {description}: request had gone through, not resending")
+                return recovered
+        elif outcome == "ambiguous" and not policy.retry_ambiguous:
+            out_of_budget = True
+
+        if out_of_budget:
+            metrics.incr("bitunix_retry_exhausted", policy=policy.name)
+            logger.error(f"[RETRY] {description} giving up after {attempt + 1} attempts ({reason})")
+            if error is not None:
+                raise error
+            return response
+
+        metrics.incr("bitunix_retries", policy=policy.name, outcome=outcome)
+        logger.warning(f"[RETRY] {description} attempt {attempt + 1}/{policy.attempts} failed ({reason}); "
+                       f"retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
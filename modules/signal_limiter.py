@@ -43,4 +43,4 @@ async def should_accept_signal(symbol: str, direction: str, timeframe: str) -> b
 
     except Exception as e:
         logger.error(f"[SIGNAL LIMIT ERROR] Redis failure for {symbol} {direction}: {e}")
-        return True  # fail open
+        return False  # fail closed, like is_duplicate_signal: no new entries without Redis
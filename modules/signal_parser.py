@@ -0,0 +1,231 @@
+"""
+TradingView alert parsing for the webhook and the offline replay.
+
+Two formats are accepted:
+
+* the text alert - a first line saying LONG or SHORT, then ``Entry Price:``,
+  ``Stop Loss:``, ``TP1:``..``TP4:`` and ``Accumulation Zone: <top> - <bottom>``.
+  All fields are picked up in one ``finditer`` pass over the message with a
+  single precompiled pattern. Keys may follow any prefix (``🎯 Entry Price:``,
+  ``- Stop Loss:``) and several ``TPn:`` may share a line, as with the line
+  scan this replaced;
+* a structured JSON alert, sent as the webhook's ``signal`` object or as the
+  ``message`` itself, which skips regex entirely::
+
+    {"direction": "BUY", "entry_price": 1.23, "stop_loss": 1.2,
+     "take_profits": [1.25, 1.27, 1.29, 1.31], "accumulation_zone": [1.22, 1.21]}
+
+``parse_signal`` never raises; anything missing or malformed ends up in
+``Signal.errors`` so the webhook can answer 400 instead of 500.
+
+Benchmark over recorded webhooks (the ``signal_replay`` JSON lines format), or
+a synthetic corpus when no file is given::
+
+    python -m modules.signal_parser --signals signals.jsonl --repeat 200
+"""
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter
+
+from modules.metrics import summarize
+
+# One pass: (key, value, second value of a "top - bottom" range); values may start with "." (".5")
+_FIELD_RE = re.compile(
+    r"\b(Entry Price|Stop Loss|TP\d+|Accumulation Zone)[^:\d\n]*:[ \t]*(\d*\.?\d+)"
+    r"(?:[ \t]*-[ \t]*(\d*\.?\d+))?"
+)
+_DIRECTIONS = {"BUY": "BUY", "LONG": "BUY", "SELL": "SELL", "SHORT": "SELL"}
+
+
+class Signal:
+    """Parsed alert; ``errors`` is empty when every field the trade path needs is present."""
+
+    __slots__ = ("direction", "entry_price", "stop_loss", "take_profits", "accumulation_zone", "source", "errors")
+
+    def __init__(self, direction="BUY", entry_price=None, stop_loss=None, take_profits=None,
+                 accumulation_zone=None, source="text", errors=None):
+        self.direction = direction
+        self.entry_price = entry_price
+        self.stop_loss = stop_loss
+        self.take_profits = take_profits or []
+        self.accumulation_zone = accumulation_zone
+        self.source = source
+        self.errors = errors or []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> dict:
+        """The ``parsed`` dict carried on queued signals and read by ``process_trade``."""
+        return {
+            "direction": self.direction,
+            "entry_price": self.entry_price,
+            "stop_loss": self.stop_loss,
+            "take_profits": self.take_profits,
+            "accumulation_zone": self.accumulation_zone,
+        }
+
+
+def _validate(signal: Signal) -> Signal:
+    reported = " ".join(signal.errors)
+    for name in ("entry_price", "stop_loss"):
+        value = getattr(signal, name)
+        if value is None:
+            if name not in reported:
+                signal.errors.append(f"missing {name}")
+        elif value <= 0:
+            signal.errors.append(f"{name} must be positive, got {value}")
+    if not signal.take_profits and "take_profits" not in reported:
+        signal.errors.append("missing take_profits")
+    if signal.accumulation_zone is None and "accumulation_zone" not in reported:
+        signal.errors.append("missing accumulation_zone")
+    return signal
+
+
+def _parse_text(message: str) -> Signal:
+    first_line = message.partition("\n")[0]
+    signal = Signal(direction="SELL" if "short" in first_line.lower() else "BUY")
+    for match in _FIELD_RE.finditer(message):
+        key, value, range_end = match.groups()
+        if key[0] == "T":
+            signal.take_profits.append(float(value))
+        elif key[0] == "E":
+            if signal.entry_price is None:
+                signal.entry_price = float(value)
+        elif key[0] == "S":
+            if signal.stop_loss is None:
+                signal.stop_loss = float(value)
+        elif range_end and signal.accumulation_zone is None:
+            signal.accumulation_zone = [float(value), float(range_end)]
+    return _validate(signal)
+
+
+def _parse_payload(payload: dict) -> Signal:
+    signal = Signal(source="json")
+    direction = _DIRECTIONS.get(str(payload.get("direction", "")).upper())
+    if direction:
+        signal.direction = direction
+    else:
+        signal.errors.append(f"invalid direction {payload.get('direction')!r}")
+
+    def number(name, value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            signal.errors.append(f"invalid {name} {value!r}")
+            return None
+
+    if payload.get("entry_price") is not None:
+        signal.entry_price = number("entry_price", payload["entry_price"])
+    if payload.get("stop_loss") is not None:
+        signal.stop_loss = number("stop_loss", payload["stop_loss"])
+    take_profits = payload.get("take_profits") or []
+    signal.take_profits = [tp for tp in (number("take_profits", v) for v in take_profits) if tp is not None]
+    zone = payload.get("accumulation_zone")
+    if zone is not None:
+        if isinstance(zone, (list, tuple)) and len(zone) == 2:
+            top, bottom = number("accumulation_zone", zone[0]), number("accumulation_zone", zone[1])
+            if top is not None and bottom is not None:
+                signal.accumulation_zone = [top, bottom]
+        else:
+            signal.errors.append(f"invalid accumulation_zone {zone!r}")
+    return _validate(signal)
+
+
+def parse_signal(message) -> Signal:
+    """Parse a text alert, a JSON alert string, or an already decoded JSON alert."""
+    if isinstance(message, str) and message.lstrip().startswith("{"):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return Signal(source="json", errors=["malformed JSON alert"])
+    if isinstance(message, dict):
+        return _parse_payload(message)
+    if not isinstance(message, str) or not message.strip():
+        return Signal(errors=["empty alert message"])
+    return _parse_text(message)
+
+
+# --- Benchmark ---
+def load_corpus(path: str) -> list:
+    """Alert messages from recorded webhooks (``message`` or raw ``body`` per JSON line)."""
+    corpus = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            message = record.get("message")
+            if message is None and record.get("body") is not None:
+                try:
+                    payload = json.loads(record["body"])
+                    message = payload.get("signal") or payload.get("message", "")
+                except ValueError:
+                    message = record["body"].strip()
+            corpus.append(message or "")
+    return corpus
+
+
+def synthetic_corpus(size: int = 200, seed: int = 7) -> list:
+    from modules.webhook_benchmark import build_message
+
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        direction = rng.choice(["BUY", "SELL"])
+        price = rng.uniform(0.01, 70000)
+        message = build_message(direction, price)
+        if i % 10 == 0:
+            message = message.rsplit("\n", 1)[0]  # no Accumulation Zone line
+        elif i % 10 == 1:
+            parsed = parse_signal(message).as_dict()
+            message = json.dumps(parsed)
+        elif i % 10 == 2:
+            message = message.replace("Entry Price", "🎯 Entry Price").replace("Stop Loss", "- Stop Loss")
+        elif i % 10 == 3:
+            message = re.sub(r"\n(TP[2-4]:)", r" \1", message)  # all TPs on one line
+        elif i % 10 == 4:
+            # ".5" instead of "0.5", on a sub-1 price
+            message = re.sub(r"\b0\.(\d)", r".\1", build_message(direction, price / 100000))
+        corpus.append(message)
+    return corpus
+
+
+def benchmark(corpus: list, repeat: int) -> dict:
+    timings = []
+    errors = Counter()
+    failed = 0
+    for message in corpus:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            signal = parse_signal(message)
+        timings.append((time.perf_counter() - started) / repeat * 1e6)
+        errors.update(signal.errors)
+        failed += not signal.ok
+    summary = summarize(timings)
+    return {
+        "messages": len(corpus),
+        "repeat": repeat,
+        "failed": failed,
+        "errors": dict(errors),
+        "parse_us": {k: round(v, 2) if isinstance(v, float) else v for k, v in summary.items()},
+        "parses_per_sec": round(len(timings) / (sum(timings) / 1e6)) if timings else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TradingView alert parsing")
+    parser.add_argument("--signals", help="Recorded webhooks (JSON lines); synthetic corpus if omitted")
+    parser.add_argument("--repeat", type=int, default=200, help="Parses per message")
+    args = parser.parse_args(argv)
+    corpus = load_corpus(args.signals) if args.signals else synthetic_corpus()
+    print(json.dumps(benchmark(corpus, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Signal filter pipeline run by the signal workers before a trade is executed.
+
+Each ``Stage`` declares a cost and the stages whose results it needs. Stages
+run in ascending cost; stages that share a cost have no dependency on each
+other and run concurrently. A stage returns a rejection reason (or None to pass)
+and the first rejection stops the pipeline, cancelling anything still running in
+that tier. The cheap Redis/Postgres checks therefore run first, and a signal
+they reject never pays for the kline and conviction lookups.
+
+Default order:
+
+====  =====================  ===============================================
+cost  stage                  rejects with
+====  =====================  ===============================================
+0     ``degraded``           ``degraded`` (exchange trade endpoints or Redis down)
+1     ``duplicate``          ``duplicate`` (``signal_lock`` already held)
+2     ``rate_limit``         ``rate_limit`` (``TIMEFRAME_LIMITS``)
+3     ``daily_loss``         ``daily_loss``
+4     ``supersede``          ``superseded`` (see ``signal_registry``)
+5     ``strategy_rank``      ``tp_stage`` (an IGNORE the open position will not take)
+10    ``close_price``,       - (network, concurrent)
+      ``conviction``
+20    ``decision``           ``false_signal`` / ``low_confidence``
+====  =====================  ===============================================
+
+Every stage's decision and time are recorded (``signal_stage`` /
+``signal_stage_seconds``) and the trace is logged with ``[SIGNAL PIPELINE]``.
+More filters plug in with ``signal_pipeline.add(Stage(...))``.
+
+From ``supersede`` on, the run is registered in ``signal_registry`` and a newer
+signal for the symbol may cancel it. Stages with ``interruptible=False`` (the
+flash close in ``strategy_rank``) are never cancelled midway; the run stops
+before the next tier instead.
+"""
+import asyncio
+import time
+from itertools import groupby
+
+from modules import metrics
+from modules.circuit_breaker import entries_blocked
+from modules.logger_config import logger
+from modules.loss_tracking import is_daily_loss_limit_exceeded
+from modules.price_feed import is_false_signal, get_cached_conviction_score, should_execute_trade
+from modules.redis_state_manager import record_signal_log
+from modules.signal_limiter import should_accept_signal
+from modules.signal_registry import signal_registry
+from modules.utils import is_duplicate_signal, evaluate_signal_received, position_accepts_signal
+
+
+class Stage:
+    """
+    One filter. ``check(ctx)`` is async, may store results in ``ctx`` under its own
+    name, and returns a rejection reason or None.
+    """
+
+    __slots__ = ("name", "check", "cost", "requires", "interruptible")
+
+    def __init__(self, name: str, check, cost: int, requires: tuple = (), interruptible: bool = True):
+        self.name = name
+        self.check = check
+        self.cost = cost
+        self.requires = tuple(requires)
+        self.interruptible = interruptible
+
+
+class SignalPipeline:
+    def __init__(self, stages: list = ()):
+        self.stages = []
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage):
+        costs = {s.name: s.cost for s in self.stages}
+        for name in stage.requires:
+            if name not in costs:
+                raise ValueError(f"Stage {stage.name} requires unknown stage {name}")
+            if costs[name] >= stage.cost:
+                raise ValueError(f"Stage {stage.name} must cost more than {name}, which it requires")
+        self.stages.append(stage)
+        self.stages.sort(key=lambda s: s.cost)
+
+    async def _run_stage(self, stage: Stage, ctx: dict):
+        started = time.perf_counter()
+        try:
+            reason = await stage.check(ctx)
+            decision = "reject" if reason else "pass"
+        except asyncio.CancelledError:
+            ctx["trace"].append((stage.name, "cancelled", round((time.perf_counter() - started) * 1000, 2)))
+            metrics.incr("signal_stage", stage=stage.name, decision="cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"[SIGNAL PIPELINE] {stage.name} failed for {ctx['signal']['symbol']}: {e}")
+            reason, decision = "error", "error"
+        elapsed = time.perf_counter() - started
+        metrics.observe("signal_stage_seconds", elapsed, stage=stage.name)
+        metrics.incr("signal_stage", stage=stage.name, decision=decision)
+        ctx["trace"].append((stage.name, decision, round(elapsed * 1000, 2)))
+        return reason
+
+    async def run(self, ctx: dict):
+        """Run the stages over ``ctx``; returns the first rejection reason, or None if all passed."""
+        ctx.setdefault("trace", [])
+        for _, tier in groupby(self.stages, key=lambda s: s.cost):
+            tier = list(tier)
+            if ctx.get("superseded"):
+                return "superseded"
+            ctx["interruptible"] = all(stage.interruptible for stage in tier)
+            if len(tier) == 1:
+                reason = await self._run_stage(tier[0], ctx)
+                if reason:
+                    return reason
+                continue
+            pending = {asyncio.ensure_future(self._run_stage(stage, ctx)) for stage in tier}
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.result():
+                            return task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
+        return None
+
+
+# --- Default stages ---
+async def _degraded(ctx):
+    blocked_by = entries_blocked()
+    if blocked_by:
+        logger.warning(f"[DEGRADED] {ctx['signal']['symbol']} {ctx['signal']['direction']} rejected: "
+                       f"{blocked_by} unavailable")
+        return "degraded"
+    return None
+
+
+async def _duplicate(ctx):
+    signal = ctx["signal"]
+    return "duplicate" if await is_duplicate_signal(signal["symbol"], signal["direction"]) else None
+
+
+async def _rate_limit(ctx):
+    signal = ctx["signal"]
+    accepted = await should_accept_signal(signal["symbol"], signal["direction"], signal["interval"])
+    return None if accepted else "rate_limit"
+
+
+async def _daily_loss(ctx):
+    return "daily_loss" if await is_daily_loss_limit_exceeded() else None
+
+
+async def _supersede(ctx):
+    return "superseded" if await signal_registry.register(ctx["signal"], ctx) else None
+
+
+async def _strategy_rank(ctx):
+    # Closes an opposite position the new signal outranks (flash close), as before validation.
+    signal = ctx["signal"]
+    rank = ctx["strategy_rank"] = await evaluate_signal_received(
+        signal["symbol"], signal["direction"], signal["override_qty"], signal["interval"])
+    if rank.get("action") == "ignore" and rank.get("state") and \
+            not position_accepts_signal(rank["state"], signal["parsed"]["stop_loss"], signal["direction"], "IGNORE"):
+        return "tp_stage"
+    return None
+
+
+async def _close_price(ctx):
+    signal = ctx["signal"]
+    ctx["close_price"] = await is_false_signal(signal["symbol"], signal["parsed"]["entry_price"],
+                                               signal["direction"], signal["interval"], signal["signal_time"])
+
+
+async def _conviction(ctx):
+    signal = ctx["signal"]
+    ctx["conviction"] = await get_cached_conviction_score(signal["symbol"], signal["direction"],
+                                                          signal["interval"], signal["signal_time"])
+
+
+async def _decision(ctx):
+    signal = ctx["signal"]
+    is_false = ctx["close_price"]["is_valid"]
+    revised_qty = ctx["strategy_rank"].get("reverse_qty", 0)
+    if should_execute_trade(is_false, ctx["conviction"]["score"], revised_qty, signal["override_qty"]):
+        return None
+    return "false_signal" if is_false else "low_confidence"
+
+
+signal_pipeline = SignalPipeline([
+    Stage("degraded", _degraded, cost=0),
+    Stage("duplicate", _duplicate, cost=1),
+    Stage("rate_limit", _rate_limit, cost=2),
+    Stage("daily_loss", _daily_loss, cost=3),
+    Stage("supersede", _supersede, cost=4),
+    Stage("strategy_rank", _strategy_rank, cost=5, interruptible=False),
+    Stage("close_price", _close_price, cost=10),
+    Stage("conviction", _conviction, cost=10),
+    Stage("decision", _decision, cost=20, requires=("strategy_rank", "close_price", "conviction")),
+])
+
+
+async def run_signal_pipeline(signal: dict, callback, pipeline: SignalPipeline = signal_pipeline):
+    """Filter a queued signal and, if every stage passes, hand it to ``callback(qty, action)``."""
+    symbol, direction = signal["symbol"], signal["direction"]
+    ctx = {"signal": signal, "trace": []}
+    # Own task, so signal_registry can cancel the validation without touching the queue worker.
+    task = ctx["task"] = asyncio.ensure_future(pipeline.run(ctx))
+    try:
+        reason = await task
+    except asyncio.CancelledError:
+        if not (task.cancelled() and ctx.get("superseded")):
+            raise
+        reason = "superseded"
+    finally:
+        await signal_registry.release(signal)
+    if not reason and ctx.get("superseded"):
+        reason = "superseded"  # flagged after its last stage started
+    logger.info(f"[SIGNAL PIPELINE] {symbol}-{direction} {reason or 'accepted'} | trace={ctx['trace']}",
+                extra={"symbol": symbol, "interval": signal["interval"]})
+
+    conviction = ctx.get("conviction") or {}
+    evaluated = bool(conviction) and "close_price" in ctx
+    if evaluated:
+        logger.info(f"[SIGNAL EVAL] {symbol}-{direction} | is_false={ctx['close_price']['is_valid']} "
+                    f"| score={conviction['score']} | indicators={conviction.get('indicators', {})}")
+
+    was_executed = False
+    if reason:
+        metrics.incr("signals_rejected", reason=reason)
+        logger.warning(f"[TRADE SKIPPED] {symbol} {direction} skipped due to {reason}"
+                       + (f", score={conviction['score']}" if conviction else ""))
+    else:
+        rank = ctx["strategy_rank"]
+        trade_action = rank.get("action", "ignore")
+        logger.info(f"[TRADE CONFIRMED] {symbol} {direction} @ {signal['parsed']['entry_price']} "
+                    f"with score {conviction['score']}")
+        try:
+            await callback(rank.get("reverse_qty", 0), trade_action.upper())
+            metrics.incr("signals_validated", action=trade_action.lower())
+            was_executed = True
+        except Exception as e:
+            logger.error(f"[VALIDATION ERROR] {symbol}: {e}")
+
+    # Signals rejected before the network stages have nothing to log beyond the rejection.
+    if evaluated:
+        await record_signal_log(
+            symbol=symbol,
+            direction=direction,
+            interval=signal["interval"],
+            entry_price=signal["parsed"]["entry_price"],
+            close_price=ctx["close_price"]["close_price"],
+            conviction_score=conviction["score"],
+            funding_rate=conviction["funding_rate"],
+            oi_trend=[],
+            price_trend=conviction["price_trend"],
+            volume_trend=conviction["volume_trend"],
+            volume_spike_ratio=conviction["volume_spike_ratio"],
+            is_false_signal=ctx["close_price"]["is_valid"],
+            was_executed=was_executed,
+            signal_time=signal["signal_time"],
+        )
@@ -0,0 +1,232 @@
+"""
+Durable signal queue on a Redis Stream.
+
+The webhook only parses the alert and ``XADD``s it; validation and execution
+happen in a bounded pool of workers per process reading through a consumer
+group. An entry is acknowledged (and deleted) only after its handler returns,
+so signals still waiting for a bar close when a worker process dies are picked
+up again: live consumers refresh a heartbeat key, and every process
+periodically claims the pending entries of consumers whose heartbeat expired
+(including its own previous incarnation after a deploy).
+
+``XLEN`` doubles as the backlog size since handled entries are deleted; once
+it reaches ``SIGNAL_QUEUE_MAX_BACKLOG`` new signals are refused.
+"""
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime, timedelta
+
+from redis.exceptions import ResponseError
+
+from modules import metrics
+from modules.config import SIGNAL_WORKERS, SIGNAL_QUEUE_MAX_BACKLOG, SIGNAL_REPLAY_GRACE_SEC
+from modules.logger_config import logger
+from modules.price_feed import get_next_bar_close
+from modules.redis_client import get_redis
+from modules.signal_scheduler import execution_gate
+
+STREAM_KEY = "signals:stream"
+GROUP = "signal-workers"
+CONSUMER = f"{socket.gethostname()}:{os.getpid()}"
+HEARTBEAT_KEY = "signal_consumer:{}"
+HEARTBEAT_TTL = 30  # seconds
+READ_BLOCK_MS = 5000
+RECLAIM_INTERVAL = 15  # seconds
+
+# Entries claimed from dead consumers wait here for a free worker.
+_reclaimed = asyncio.Queue()
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _serialize(signal: dict) -> dict:
+    return {"payload": json.dumps(signal, default=str)}
+
+
+def _deserialize(fields: dict) -> dict:
+    signal = json.loads(fields["payload"])
+    signal["signal_time"] = datetime.fromisoformat(signal["signal_time"])
+    return signal
+
+
+async def enqueue_signal(signal: dict) -> str:
+    """Append a parsed signal; raises QueueFull when the backlog cap is reached."""
+    r = get_redis()
+    backlog = await r.xlen(STREAM_KEY)
+    metrics.set_gauge("signal_queue_backlog", backlog)
+    if backlog >= SIGNAL_QUEUE_MAX_BACKLOG:
+        raise QueueFull(f"signal backlog {backlog} >= {SIGNAL_QUEUE_MAX_BACKLOG}")
+    entry_id = await r.xadd(STREAM_KEY, _serialize(signal))
+    metrics.incr("signal_queue_enqueued")
+    return entry_id
+
+
+async def ensure_group(r):
+    try:
+        await r.xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def is_stale(signal: dict, now: datetime = None) -> bool:
+    """A replayed signal is useless once the bar it was waiting on closed well in the past."""
+    now = now or datetime.utcnow()
+    deadline = get_next_bar_close(signal["signal_time"], signal["interval"]) + \
+        timedelta(seconds=SIGNAL_REPLAY_GRACE_SEC)
+    return now > deadline
+
+
+async def _handle_entry(r, entry_id: str, fields: dict, handler):
+    try:
+        signal = _deserialize(fields)
+    except Exception as e:
+        logger.error(f"[SIGNAL QUEUE] Dropping malformed entry {entry_id}: {e}")
+        signal = None
+
+    if signal and is_stale(signal):
+        metrics.incr("signals_rejected", reason="stale")
+        logger.warning(f"[SIGNAL QUEUE] Dropping stale {signal['symbol']} {signal['direction']} "
+                       f"{signal['interval']} from {signal['signal_time']}")
+    elif signal:
+        metrics.observe("signal_queue_wait_seconds",
+                        (datetime.utcnow() - signal["signal_time"]).total_seconds())
+        try:
+            await handler(signal)
+        except Exception as e:
+            logger.error(f"[SIGNAL QUEUE] Handler failed for {entry_id}: {e}")
+
+    # Ack even on handler errors: a signal that blew up once would blow up again on replay.
+    await r.xack(STREAM_KEY, GROUP, entry_id)
+    await r.xdel(STREAM_KEY, entry_id)
+    metrics.incr("signal_queue_acked")
+
+
+async def _worker(r, handler):
+    while True:
+        try:
+            if not _reclaimed.empty():
+                entry_id, fields = _reclaimed.get_nowait()
+                await _handle_entry(r, entry_id, fields, handler)
+                continue
+            response = await r.xreadgroup(GROUP, CONSUMER, {STREAM_KEY: ">"}, count=1, block=READ_BLOCK_MS)
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    await _handle_entry(r, entry_id, fields, handler)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[SIGNAL QUEUE] Worker failed: {e}")
+            await asyncio.sleep(1)
+
+
+async def _heartbeat(r):
+    while True:
+        try:
+            await r.set(HEARTBEAT_KEY.format(CONSUMER), datetime.utcnow().isoformat(), ex=HEARTBEAT_TTL)
+        except Exception as e:
+            logger.error(f"[SIGNAL QUEUE] Heartbeat failed: {e}")
+        await asyncio.sleep(HEARTBEAT_TTL / 3)
+
+
+async def reclaim_dead_consumers(r) -> int:
+    """Take over entries pending on consumers without a heartbeat and process them here."""
+    reclaimed = 0
+    for consumer in await r.xinfo_consumers(STREAM_KEY, GROUP):
+        name = consumer["name"]
+        if name == CONSUMER or await r.exists(HEARTBEAT_KEY.format(name)):
+            continue
+        pending = await r.xpending_range(STREAM_KEY, GROUP, min="-", max="+", count=100, consumername=name)
+        if pending:
+            ids = [p["message_id"] for p in pending]
+            # min_idle_time makes a concurrent claim by another process a no-op for us.
+            claimed = await r.xclaim(STREAM_KEY, GROUP, CONSUMER, min_idle_time=HEARTBEAT_TTL * 1000,
+                                     message_ids=ids)
+            if claimed:
+                logger.warning(f"[SIGNAL QUEUE] Reclaimed {len(claimed)} pending signals from {name}")
+            for entry_id, fields in claimed:
+                if fields is None:  # deleted after it was read
+                    await r.xack(STREAM_KEY, GROUP, entry_id)
+                    continue
+                _reclaimed.put_nowait((entry_id, fields))
+                reclaimed += 1
+        elif consumer["pending"] == 0:
+            await r.xgroup_delconsumer(STREAM_KEY, GROUP, name)
+    metrics.incr("signal_queue_reclaimed", reclaimed)
+    return reclaimed
+
+
+async def _load_own_pending(r):
+    """Entries left pending under this consumer name by a previous run (same host and pid)."""
+    response = await r.xreadgroup(GROUP, CONSUMER, {STREAM_KEY: "0"}, count=1000)
+    for _, entries in response or []:
+        for entry_id, fields in entries:
+            _reclaimed.put_nowait((entry_id, fields))
+    if not _reclaimed.empty():
+        logger.warning(f"[SIGNAL QUEUE] Replaying {_reclaimed.qsize()} signals pending on {CONSUMER}")
+
+
+async def _reclaimer(r):
+    while True:
+        try:
+            await reclaim_dead_consumers(r)
+            metrics.set_gauge("signal_queue_backlog", await r.xlen(STREAM_KEY))
+        except Exception as e:
+            logger.error(f"[SIGNAL QUEUE] Reclaim failed: {e}")
+        await asyncio.sleep(RECLAIM_INTERVAL)
+
+
+async def _supervised(name: str, loop, *args):
+    """Run ``loop(*args)`` forever, restarting it if it ever dies."""
+    while True:
+        try:
+            await loop(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.incr("signal_queue_task_restarts", task=name)
+            logger.error(f"[SIGNAL QUEUE] {name} died, restarting: {e}")
+            await asyncio.sleep(1)
+
+
+async def run_signal_workers(handler, workers: int = SIGNAL_WORKERS):
+    """Consume the stream with ``workers`` concurrent handlers in this process."""
+    r = get_redis()
+    while True:
+        try:
+            await ensure_group(r)
+            await _load_own_pending(r)
+            break
+        except Exception as e:
+            logger.error(f"[SIGNAL QUEUE] Cannot create consumer group: {e}")
+            await asyncio.sleep(5)
+
+    logger.info(f"[SIGNAL QUEUE] {CONSUMER} starting {workers} workers")
+    tasks = [asyncio.create_task(_supervised("heartbeat", _heartbeat, r)),
+             asyncio.create_task(_supervised("reclaimer", _reclaimer, r))]
+    tasks += [asyncio.create_task(_supervised(f"worker-{i}", _worker, r, handler)) for i in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def get_queue_status() -> dict:
+    r = get_redis()
+    status = {"consumer": CONSUMER, "backlog": await r.xlen(STREAM_KEY), "local_reclaimed": _reclaimed.qsize(),
+              "execution_gate": execution_gate.status()}
+    try:
+        status["consumers"] = [
+            {"name": c["name"], "pending": c["pending"], "idle_ms": c["idle"],
+             "alive": bool(await r.exists(HEARTBEAT_KEY.format(c["name"])))}
+            for c in await r.xinfo_consumers(STREAM_KEY, GROUP)
+        ]
+    except ResponseError:
+        status["consumers"] = []
+    return status
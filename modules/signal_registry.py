@@ -0,0 +1,162 @@
+"""
+Per-symbol registry of in-flight signal validations.
+
+A validation can spend a whole bar waiting in ``is_false_signal``. If a newer
+signal for the same symbol arrives meanwhile, the two would otherwise race into
+``process_trade`` with conflicting orders. Every signal that gets past the
+cheap pipeline stages registers in ``signal_inflight:{symbol}`` (a Redis hash,
+so workers see each other's signals) and is compared with what is already
+there, newer against older, using ``TIMEFRAME_RANK``:
+
+* the newer signal has an equal or higher rank: the older one is superseded,
+  whichever its direction (reversal or upgrade of the pending trade);
+* the newer signal has a lower rank and the same direction: the newer one is
+  superseded (it would only ever be an IGNORE);
+* the newer signal has a lower rank and the opposite direction: both proceed,
+  as ``evaluate_multi_timeframe_strategy`` allows opening against a higher
+  timeframe.
+
+A superseded signal on this worker is cancelled at once, unless it is inside a
+stage that must not be interrupted (the flash close in ``strategy_rank``); it
+then stops before its next stage. Signals on other workers are flagged in
+``signal_superseded:{id}`` and picked up by ``watch`` within
+``SIGNAL_SUPERSEDE_POLL_SEC``.
+"""
+import asyncio
+import json
+import time
+
+from modules import metrics
+from modules.config import SIGNAL_SUPERSEDE_POLL_SEC
+from modules.logger_config import logger
+from modules.redis_client import get_redis
+from modules.utils import TIMEFRAME_RANK
+
+INFLIGHT_KEY = "signal_inflight:{}"
+SUPERSEDED_KEY = "signal_superseded:{}"
+SUPERSEDED_TTL = 3600  # seconds
+INFLIGHT_GRACE_SEC = 600  # kept past the entry's own bar wait, for slow fetches
+
+
+def signal_id(signal: dict) -> str:
+    return f"{signal['direction']}:{signal['interval']}:{signal['signal_time'].isoformat()}"
+
+
+def _interval_sec(interval: str) -> int:
+    unit = {"m": 60, "h": 3600, "d": 86400}.get(interval[-1:], 60)
+    try:
+        return int(interval[:-1]) * unit
+    except ValueError:
+        return 60
+
+
+def supersedes(newer: dict, older: dict):
+    """Which of two in-flight entries (``newer`` registered later) gives way: "older", "newer" or None."""
+    newer_rank, older_rank = TIMEFRAME_RANK.get(newer["interval"], 0), TIMEFRAME_RANK.get(older["interval"], 0)
+    if newer_rank >= older_rank:
+        return "older"
+    if newer["direction"] == older["direction"]:
+        return "newer"
+    return None
+
+
+def _describe(entry: dict) -> str:
+    return f"{entry['direction']} {entry['interval']}"
+
+
+class SignalRegistry:
+    def __init__(self):
+        self._local = {}  # signal id -> (symbol, pipeline ctx) for validations running on this worker
+
+    async def register(self, signal: dict, ctx: dict):
+        """Add ``signal`` to its symbol's in-flight set; returns why it is superseded itself, or None."""
+        symbol, sid = signal["symbol"], signal_id(signal)
+        now = time.time()
+        entry = {"direction": signal["direction"], "interval": signal["interval"],
+                 "signal_time": signal["signal_time"].isoformat(),
+                 "expires_at": now + _interval_sec(signal["interval"]) + INFLIGHT_GRACE_SEC}
+        r = get_redis()
+        key = INFLIGHT_KEY.format(symbol)
+        await r.hset(key, sid, json.dumps(entry))
+        # The TTL covers the whole hash: only ever extend it, or a short signal would expire a long one.
+        ttl = int(entry["expires_at"] - now)
+        if await r.ttl(key) < ttl:
+            await r.expire(key, ttl)
+        self._local[sid] = (symbol, ctx)
+
+        inflight = await r.hgetall(key)
+        own_reason = None
+        for other_id, raw in inflight.items():
+            if other_id == sid:
+                continue
+            other = json.loads(raw)
+            if other["expires_at"] < now:
+                await r.hdel(key, other_id)
+                continue
+            # Order the pair by signal time so every worker reaches the same verdict.
+            if (other["signal_time"], other_id) > (entry["signal_time"], sid):
+                (newer_id, newer), (older_id, older) = (other_id, other), (sid, entry)
+            else:
+                (newer_id, newer), (older_id, older) = (sid, entry), (other_id, other)
+            verdict = supersedes(newer, older)
+            if verdict is None:
+                continue
+            loser_id, winner = (older_id, newer) if verdict == "older" else (newer_id, older)
+            if loser_id == sid:
+                own_reason = f"superseded by in-flight {_describe(winner)} signal"
+            else:
+                await self.supersede(symbol, loser_id, f"superseded by {_describe(winner)} signal")
+        if own_reason:
+            logger.warning(f"[SUPERSEDED] {symbol} {_describe(entry)}: {own_reason}")
+            metrics.incr("signals_superseded", interval=signal["interval"])
+        return own_reason
+
+    async def supersede(self, symbol: str, sid: str, reason: str):
+        logger.warning(f"[SUPERSEDED] {symbol} {sid}: {reason}")
+        metrics.incr("signals_superseded", interval=sid.split(":")[1])
+        r = get_redis()
+        await r.set(SUPERSEDED_KEY.format(sid), reason, ex=SUPERSEDED_TTL)
+        await r.hdel(INFLIGHT_KEY.format(symbol), sid)
+        self._cancel_local(sid, reason)
+
+    def _cancel_local(self, sid: str, reason: str):
+        local = self._local.get(sid)
+        if local is None:
+            return
+        ctx = local[1]
+        ctx["superseded"] = reason
+        task = ctx.get("task")
+        if task is not None and ctx.get("interruptible", True):
+            task.cancel()
+
+    async def release(self, signal: dict):
+        sid = signal_id(signal)
+        if self._local.pop(sid, None) is None:
+            return
+        try:
+            await get_redis().hdel(INFLIGHT_KEY.format(signal["symbol"]), sid)
+        except Exception as e:
+            logger.warning(f"[SIGNAL REGISTRY] Could not release {signal['symbol']} {sid}: {e}")
+
+    async def watch(self):
+        """Poll for signals of this worker superseded by another worker; runs on every worker."""
+        while True:
+            await asyncio.sleep(SIGNAL_SUPERSEDE_POLL_SEC)
+            if not self._local:
+                continue
+            ids = list(self._local)
+            try:
+                reasons = await get_redis().mget([SUPERSEDED_KEY.format(sid) for sid in ids])
+            except Exception as e:
+                logger.warning(f"[SIGNAL REGISTRY] Supersede poll failed: {e}")
+                continue
+            for sid, reason in zip(ids, reasons):
+                if reason and sid in self._local:
+                    self._cancel_local(sid, reason)
+
+    def status(self) -> dict:
+        return {sid: {"symbol": symbol, "superseded": ctx.get("superseded")}
+                for sid, (symbol, ctx) in self._local.items()}
+
+
+signal_registry = SignalRegistry()
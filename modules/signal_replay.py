@@ -0,0 +1,556 @@
+"""
+Offline replay of recorded TradingView webhooks against locally stored klines.
+
+Signals go through the same parsing and decision code the live bot uses
+(``parse_signal``, the ``is_false_signal`` close check, the conviction score,
+``evaluate_multi_timeframe_strategy`` and ``should_execute_trade``); fills, the
+4-TP ladder and the breakeven SL moves are simulated bar by bar on 1m candles.
+
+Data layout under ``--data-dir``::
+
+    klines/<SYMBOL>_1m.npz    columns time, open, high, low, close, volume (or .csv with a header row)
+    funding/<SYMBOL>.csv      optional, columns time, fundingRate
+
+Signals file (JSON lines)::
+
+    {"received_at": "2025-05-01T13:05:02", "symbol": "BTCUSDT_10_5m", "message": "..."}
+
+Usage::
+
+    python -m modules.signal_replay record --symbol BTCUSDT --days 60 --data-dir replay_data
+    python -m modules.signal_replay run --signals signals.jsonl --data-dir replay_data --high-conviction 0.5,0.7
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from modules import config
+
+# Replay never touches Postgres; skip the table bootstrap done at import.
+config.OFFLINE_MODE = True
+
+from modules.bracket_manager import compute_breakeven_sl  # noqa: E402
+from modules.config import TP_DISTRIBUTION  # noqa: E402
+from modules.logger_config import logger  # noqa: E402
+from modules.market_filters import score_conviction  # noqa: E402
+from modules.price_feed import INTERVAL_MINUTES, evaluate_close_price, get_next_bar_close, \
+    get_previous_bar_close, should_execute_trade  # noqa: E402
+from modules.signal_limiter import TIMEFRAME_LIMITS, _window_start  # noqa: E402
+from modules.signal_parser import parse_signal  # noqa: E402
+from modules.utils import evaluate_multi_timeframe_strategy, parse_symbol_path  # noqa: E402
+
+EPOCH = datetime(1970, 1, 1)
+MINUTE_MS = 60_000
+DUPLICATE_LOCK_SECS = 5
+KLINE_COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+
+def _to_ms(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds() * 1000)
+
+
+def _from_ms(ms: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=int(ms))
+
+
+def _interval_minutes(interval: str) -> int:
+    return 3 if interval == "3m" else INTERVAL_MINUTES.get(interval, 1)
+
+
+# --- Candle storage ---
+class CandleSeries:
+    """Column-oriented OHLCV arrays sorted by candle open time (ms)."""
+
+    __slots__ = KLINE_COLUMNS
+
+    def __init__(self, time_ms, open_, high, low, close, volume):
+        self.time = np.asarray(time_ms, dtype=np.int64)
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def from_matrix(cls, data: np.ndarray) -> "CandleSeries":
+        data = data[np.argsort(data[:, 0], kind="stable")]
+        return cls(*(data[:, i] for i in range(len(KLINE_COLUMNS))))
+
+    @classmethod
+    def load(cls, data_dir: str, symbol: str) -> "CandleSeries":
+        base = os.path.join(data_dir, "klines", f"{symbol}_1m")
+        if os.path.exists(base + ".npz"):
+            with np.load(base + ".npz") as npz:
+                return cls.from_matrix(np.column_stack([npz[c] for c in KLINE_COLUMNS]))
+        data = np.loadtxt(base + ".csv", delimiter=",", skiprows=1, ndmin=2)
+        return cls.from_matrix(data[:, :len(KLINE_COLUMNS)])
+
+    def save(self, data_dir: str, symbol: str) -> str:
+        os.makedirs(os.path.join(data_dir, "klines"), exist_ok=True)
+        path = os.path.join(data_dir, "klines", f"{symbol}_1m.npz")
+        np.savez_compressed(path, **{c: getattr(self, c) for c in KLINE_COLUMNS})
+        return path
+
+    def resample(self, minutes: int) -> "CandleSeries":
+        if minutes <= 1 or not len(self):
+            return self
+        bucket = self.time // (minutes * MINUTE_MS)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+        ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+        return CandleSeries(
+            bucket[starts] * minutes * MINUTE_MS,
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends],
+            np.add.reduceat(self.volume, starts),
+        )
+
+
+def load_funding(data_dir: str, symbol: str):
+    path = os.path.join(data_dir, "funding", f"{symbol}.csv")
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    order = np.argsort(data[:, 0], kind="stable")
+    return data[order, 0].astype(np.int64), data[order, 1]
+
+
+# --- Signals ---
+def load_signals(path: str) -> dict:
+    """Read recorded webhooks and group them per symbol in arrival order."""
+    by_symbol = defaultdict(list)
+    with open(path) as fh:
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            message = record.get("message")
+            path_symbol = record.get("symbol")
+            body = record.get("body")
+            if message is None and body is not None:
+                try:
+                    payload = json.loads(body)
+                    message = payload.get("signal") or payload.get("message", "")
+                    path_symbol = payload.get("symbol") or path_symbol
+                except ValueError:
+                    message = body.strip()
+            received_at = record.get("received_at")
+            if isinstance(received_at, (int, float)):
+                signal_time = _from_ms(received_at)
+            else:
+                signal_time = datetime.fromisoformat(received_at.replace("Z", "")).replace(tzinfo=None)
+            symbol, override_qty, interval = parse_symbol_path(path_symbol or "BTCUSDT")
+            by_symbol[symbol].append({
+                "line": line_no,
+                "message": message or "",
+                "override_qty": override_qty,
+                "interval": interval,
+                "signal_time": signal_time,
+            })
+    for signals in by_symbol.values():
+        signals.sort(key=lambda s: s["signal_time"])
+    return by_symbol
+
+
+def validation_point(direction: str, interval: str, signal_time: datetime):
+    """Mirror ``is_false_signal``: (decision time, kline interval, expected candle open) for a signal."""
+    actual_interval = "1m" if interval == "3m" else interval
+    if direction == "SELL":
+        decision = get_next_bar_close(signal_time, interval)
+        expected_open = decision - timedelta(minutes=INTERVAL_MINUTES.get(actual_interval, 1))
+    else:
+        decision = get_next_bar_close(signal_time, interval) if interval == "3m" else signal_time
+        expected_open = get_previous_bar_close(signal_time, actual_interval)
+    return max(decision, signal_time), actual_interval, _to_ms(expected_open)
+
+
+# --- Simulation ---
+class SymbolReplay:
+    def __init__(self, symbol: str, candles: CandleSeries, funding, high_conviction: float,
+                 buffer_pct: float, default_qty: float):
+        self.symbol = symbol
+        self.candles = candles
+        self.funding_time, self.funding_rate = funding
+        self.high_conviction = high_conviction
+        self.buffer_pct = buffer_pct
+        self.default_qty = default_qty
+        self.frames = {}
+        self.cursor = 0
+        self.positions = {}
+        self.duplicate_locks = {}
+        self.limiter_counts = Counter()
+        self.stats = Counter()
+        self.actions = Counter()
+        self.tp_hits = [0] * len(TP_DISTRIBUTION)
+        self.closed = []
+
+    def frame(self, interval: str) -> CandleSeries:
+        if interval not in self.frames:
+            self.frames[interval] = self.candles.resample(_interval_minutes(interval))
+        return self.frames[interval]
+
+    def close_at(self, interval: str, open_ms: int, decision_ms: int) -> float:
+        frame = self.frame(interval)
+        idx = np.searchsorted(frame.time, open_ms)
+        if idx < len(frame) and frame.time[idx] == open_ms:
+            return float(frame.close[idx])
+        # Same fallback as live: latest known price
+        idx = np.searchsorted(self.candles.time, decision_ms, side="right") - 1
+        if idx < 0:
+            raise LookupError(f"No candle data for {self.symbol} before {_from_ms(decision_ms)}")
+        return float(self.candles.close[idx])
+
+    def conviction(self, direction: str, interval: str, decision_ms: int) -> dict:
+        frame = self.frame("1m" if interval == "3m" else interval)
+        span = _interval_minutes("1m" if interval == "3m" else interval) * MINUTE_MS
+        # Only bars fully closed at decision time, to avoid lookahead
+        end = np.searchsorted(frame.time + span, decision_ms, side="right")
+        start = max(end - 5, 0)
+        if end == start:
+            return {"score": 0.0}
+        idx = np.searchsorted(self.funding_time, decision_ms, side="right") - 1
+        funding = float(self.funding_rate[idx]) if idx >= 0 else 0.0
+        return score_conviction(frame.close[start:end].tolist(), frame.volume[start:end].tolist(),
+                                funding, direction)
+
+    # -- fills --
+    def _realize(self, pos: dict, qty: float, price: float, reason: str):
+        qty = min(qty, pos["open_qty"])
+        if qty <= 0:
+            return
+        sign = 1 if pos["direction"] == "BUY" else -1
+        pnl = (price - pos["avg_entry"]) * qty * sign
+        pos["open_qty"] = round(pos["open_qty"] - qty, 9)
+        pos["realized_pnl"] += pnl
+        pos["exits"].append((reason, price, qty))
+
+    def _finish(self, pos: dict, ts: int, reason: str):
+        pos["status"] = "CLOSED"
+        pos["limits"] = []
+        self.positions.pop(pos["direction"], None)
+        self.closed.append({
+            "direction": pos["direction"],
+            "interval": pos["interval"],
+            "opened_at": _from_ms(pos["opened_at"]).isoformat(),
+            "closed_at": _from_ms(ts).isoformat(),
+            "entry_price": pos["entry_price"],
+            "max_qty": pos["max_qty"],
+            "steps": pos["step"],
+            "exit": reason,
+            "pnl": round(pos["realized_pnl"], 8),
+        })
+
+    def _add_fill(self, pos: dict, qty: float, price: float):
+        total = pos["open_qty"] + qty
+        pos["avg_entry"] = (pos["avg_entry"] * pos["open_qty"] + price * qty) / total if total else price
+        pos["open_qty"] = total
+        pos["max_qty"] = max(pos["max_qty"], total)
+
+    def _step_candle(self, pos: dict, i: int):
+        c = self.candles
+        high, low, ts = c.high[i], c.low[i], int(c.time[i])
+        is_buy = pos["direction"] == "BUY"
+
+        for limit in list(pos["limits"]):
+            price, qty = limit
+            if (is_buy and low <= price) or (not is_buy and high >= price):
+                pos["limits"].remove(limit)
+                self._add_fill(pos, qty, price)
+                pos["acc_qty"] += qty
+
+        sl = pos["stop_loss"]
+        if sl and ((is_buy and low <= sl) or (not is_buy and high >= sl)):
+            self.stats["sl_hits"] += 1
+            self._realize(pos, pos["open_qty"], sl, "SL")
+            self._finish(pos, ts, "SL")
+            return
+
+        # Accumulation-zone TP sits at the signal entry and only covers limit fills
+        entry = pos["entry_price"]
+        if pos["acc_qty"] and ((is_buy and high >= entry) or (not is_buy and low <= entry)):
+            self._realize(pos, pos["acc_qty"], entry, "ACC_TP")
+            pos["acc_qty"] = 0.0
+            pos["limits"] = []
+
+        tps = pos["tps"]
+        while pos["status"] == "OPEN" and pos["step"] < min(len(tps), len(TP_DISTRIBUTION)):
+            step = pos["step"]
+            tp_price = float(tps[step])
+            if not ((is_buy and high >= tp_price) or (not is_buy and low <= tp_price)):
+                break
+            self.tp_hits[step] += 1
+            last = step == len(TP_DISTRIBUTION) - 1 or step == len(tps) - 1
+            qty = pos["open_qty"] if last else round(pos["base_qty"] * TP_DISTRIBUTION[step], 3)
+            self._realize(pos, qty, tp_price, f"TP{step + 1}")
+            try:
+                pos["stop_loss"] = float(compute_breakeven_sl(pos["direction"], step, entry, tps))
+            except (IndexError, TypeError, ValueError):
+                pos["stop_loss"] = entry
+            pos["step"] = step + 1
+            if step == 0:
+                pos["limits"] = []
+            if last or pos["open_qty"] <= 1e-9:
+                self._finish(pos, ts, f"TP{step + 1}")
+
+    def advance(self, until_ms: int):
+        """Run fills on every 1m candle that closed at or before ``until_ms``."""
+        c = self.candles
+        end = np.searchsorted(c.time + MINUTE_MS, until_ms, side="right")
+        while self.cursor < end:
+            for pos in list(self.positions.values()):
+                if pos["status"] == "OPEN" and pos["opened_at"] < int(c.time[self.cursor]) + MINUTE_MS:
+                    self._step_candle(pos, self.cursor)
+            self.cursor += 1
+
+    def last_price(self, ts: int) -> float:
+        idx = max(np.searchsorted(self.candles.time, ts, side="right") - 1, 0)
+        return float(self.candles.close[idx])
+
+    # -- signal path --
+    def _accept_limits(self, direction: str, interval: str, ts: int) -> str | None:
+        key = direction
+        lock_until = self.duplicate_locks.get(key, 0)
+        if ts < lock_until:
+            return "duplicate"
+        self.duplicate_locks[key] = ts + DUPLICATE_LOCK_SECS * 1000
+        limits = TIMEFRAME_LIMITS.get(interval)
+        if limits:
+            buffer_secs, max_signals = limits
+            window = (direction, interval, _window_start(ts // 1000, buffer_secs))
+            if self.limiter_counts[window] >= max_signals:
+                return "rate_limited"
+            self.limiter_counts[window] += 1
+        return None
+
+    def on_signal(self, signal: dict):
+        self.stats["signals"] += 1
+        parsed = parse_signal(signal["message"])
+        if not parsed.ok:
+            self.stats["parse_errors"] += 1
+            return
+        direction = parsed.direction
+        interval = signal["interval"]
+        market_qty = signal["override_qty"] or self.default_qty
+        decision, kline_interval, expected_open = validation_point(direction, interval, signal["signal_time"])
+        decision_ms = _to_ms(decision)
+        self.advance(decision_ms)
+
+        try:
+            close_price = self.close_at(kline_interval, expected_open, decision_ms)
+        except LookupError:
+            self.stats["no_data"] += 1
+            return
+        verdict = evaluate_close_price(parsed.entry_price, close_price, direction, self.buffer_pct)
+        conviction = self.conviction(direction, interval, decision_ms)
+
+        # evaluate_signal_received
+        opposite = "SELL" if direction == "BUY" else "BUY"
+        active = self.positions.get(opposite) or self.positions.get(direction)
+        if not active:
+            action, revised = "open", market_qty
+        else:
+            action = evaluate_multi_timeframe_strategy(
+                existing_direction=active["direction"],
+                existing_interval=active["interval"],
+                existing_qty=active["open_qty"],
+                new_direction=direction,
+                new_interval=interval,
+            )["action"]
+            revised = {"reverse": round(active["open_qty"] + market_qty, 3),
+                       "upgrade": 2 * market_qty}.get(action, market_qty)
+            if action == "reverse":
+                self._realize(active, active["open_qty"], close_price, "REVERSAL")
+                self._finish(active, decision_ms, "REVERSAL")
+        self.actions[action] += 1
+
+        if not should_execute_trade(verdict["is_valid"], conviction["score"], revised, market_qty,
+                                    self.high_conviction):
+            self.stats["rejected"] += 1
+            return
+        rejection = self._accept_limits(direction, interval, decision_ms)
+        if rejection:
+            self.stats[rejection] += 1
+            return
+
+        # process_trade
+        pos = self.positions.get(direction)
+        if pos:
+            sl_threshold = parsed.stop_loss <= pos["stop_loss"] if direction == "BUY" \
+                else parsed.stop_loss >= pos["stop_loss"]
+            if not ((pos["step"] == 0 and sl_threshold) or action.upper() != "IGNORE"):
+                self.stats["skipped_tp_stage"] += 1
+                return
+        else:
+            pos = {
+                "direction": direction, "status": "OPEN", "opened_at": decision_ms, "open_qty": 0.0,
+                "avg_entry": 0.0, "max_qty": 0.0, "acc_qty": 0.0, "realized_pnl": 0.0, "exits": [],
+            }
+            self.positions[direction] = pos
+        self.stats["executed"] += 1
+        self._add_fill(pos, revised, close_price)
+        pos.update({
+            "interval": interval,
+            "entry_price": close_price,
+            "tps": parsed.take_profits,
+            "stop_loss": parsed.stop_loss,
+            "step": 0,
+            "base_qty": pos["open_qty"],
+        })
+        zone_start, zone_bottom = parsed.accumulation_zone
+        if revised <= market_qty:
+            zone_middle = (zone_start + zone_bottom) / 2
+            pos["limits"] = [(zone_start, revised), (zone_middle, revised), (zone_bottom, revised * 2)]
+        else:
+            pos["limits"] = [(zone_bottom, revised * 2)]
+
+    def run(self, signals: list) -> dict:
+        for signal in signals:
+            self.on_signal(signal)
+        if len(self.candles):
+            self.advance(int(self.candles.time[-1]) + MINUTE_MS)
+        open_pnl = 0.0
+        for pos in self.positions.values():
+            sign = 1 if pos["direction"] == "BUY" else -1
+            open_pnl += (self.last_price(int(self.candles.time[-1])) - pos["avg_entry"]) * pos["open_qty"] * sign
+            open_pnl += pos["realized_pnl"]
+        realized = sum(t["pnl"] for t in self.closed)
+        return {
+            "symbol": self.symbol,
+            "high_conviction": self.high_conviction,
+            **{k: self.stats.get(k, 0) for k in ("signals", "executed", "rejected", "duplicate", "rate_limited",
+                                                  "skipped_tp_stage", "parse_errors", "no_data", "sl_hits")},
+            "actions": dict(self.actions),
+            "tp_hits": self.tp_hits,
+            "trades": len(self.closed),
+            "wins": sum(1 for t in self.closed if t["pnl"] > 0),
+            "losses": sum(1 for t in self.closed if t["pnl"] <= 0),
+            "realized_pnl": round(realized, 8),
+            "open_pnl": round(open_pnl, 8),
+            "closed_trades": self.closed,
+        }
+
+
+def replay_symbol(job: dict) -> dict:
+    logger.setLevel(logging.WARNING)
+    started = time.perf_counter()
+    symbol = job["symbol"]
+    candles = CandleSeries.load(job["data_dir"], symbol)
+    replay = SymbolReplay(symbol, candles, load_funding(job["data_dir"], symbol), job["high_conviction"],
+                          job["buffer_pct"], job["default_qty"])
+    result = replay.run(job["signals"])
+    result["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_replay(signals_path: str, data_dir: str, thresholds: list[float], workers: int | None = None,
+               buffer_pct: float = 0.001, default_qty: float = 10.0) -> dict:
+    by_symbol = load_signals(signals_path)
+    jobs = [
+        {"symbol": symbol, "signals": signals, "data_dir": data_dir, "high_conviction": threshold,
+         "buffer_pct": buffer_pct, "default_qty": default_qty}
+        for threshold in thresholds
+        for symbol, signals in by_symbol.items()
+        if os.path.exists(os.path.join(data_dir, "klines", f"{symbol}_1m.npz"))
+        or os.path.exists(os.path.join(data_dir, "klines", f"{symbol}_1m.csv"))
+    ]
+    skipped = sorted(s for s in by_symbol if not any(j["symbol"] == s for j in jobs))
+    if skipped:
+        logger.warning(f"[REPLAY] No kline data for {skipped}, skipping")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(replay_symbol, jobs))
+
+    summary = {}
+    for threshold in thresholds:
+        rows = [r for r in results if r["high_conviction"] == threshold]
+        summary[str(threshold)] = {
+            "symbols": len(rows),
+            "signals": sum(r["signals"] for r in rows),
+            "executed": sum(r["executed"] for r in rows),
+            "rejected": sum(r["rejected"] for r in rows),
+            "trades": sum(r["trades"] for r in rows),
+            "wins": sum(r["wins"] for r in rows),
+            "realized_pnl": round(sum(r["realized_pnl"] for r in rows), 8),
+            "open_pnl": round(sum(r["open_pnl"] for r in rows), 8),
+        }
+    return {"summary": summary, "results": results, "skipped_symbols": skipped}
+
+
+# --- Recording ---
+def record_klines(symbol: str, days: int, data_dir: str) -> str:
+    """Download 1m klines for the last ``days`` days into ``klines/<SYMBOL>_1m.npz``."""
+    import httpx
+
+    url = f"{config.BASE_URL}/api/v1/futures/market/kline"
+    end = int(time.time() * 1000) // MINUTE_MS * MINUTE_MS
+    start = end - days * 1440 * MINUTE_MS
+    rows = {}
+    with httpx.Client(timeout=10.0) as client:
+        cursor = end
+        while cursor > start:
+            resp = client.get(url, params={"symbol": symbol.upper(), "interval": "1m", "limit": 200,
+                                           "startTime": max(start, cursor - 200 * MINUTE_MS), "endTime": cursor})
+            resp.raise_for_status()
+            data = resp.json().get("data") or []
+            if not data:
+                break
+            for k in data:
+                rows[int(k["time"])] = (int(k["time"]), float(k["open"]), float(k["high"]), float(k["low"]),
+                                        float(k["close"]), float(k["baseVol"]))
+            cursor = min(int(k["time"]) for k in data) - 1
+            time.sleep(0.1)
+    if not rows:
+        raise RuntimeError(f"No klines returned for {symbol}")
+    path = CandleSeries.from_matrix(np.array(list(rows.values()), dtype=np.float64)).save(data_dir, symbol.upper())
+    logger.info(f"[REPLAY RECORD] {symbol}: {len(rows)} candles -> {path}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded TradingView signals offline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Replay a signals file against stored klines")
+    run_p.add_argument("--signals", required=True)
+    run_p.add_argument("--data-dir", default="replay_data")
+    run_p.add_argument("--high-conviction", default="0.7",
+                       help="Comma separated conviction thresholds to evaluate")
+    run_p.add_argument("--buffer-pct", type=float, default=0.001)
+    run_p.add_argument("--default-qty", type=float, default=10.0)
+    run_p.add_argument("--workers", type=int, default=None)
+    run_p.add_argument("--out", help="Write the full result JSON here")
+
+    rec_p = sub.add_parser("record", help="Download 1m klines for a symbol")
+    rec_p.add_argument("--symbol", required=True)
+    rec_p.add_argument("--days", type=int, default=30)
+    rec_p.add_argument("--data-dir", default="replay_data")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record_klines(args.symbol, args.days, args.data_dir)
+        return
+
+    thresholds = [float(t) for t in args.high_conviction.split(",") if t.strip()]
+    started = time.perf_counter()
+    result = run_replay(args.signals, args.data_dir, thresholds, args.workers, args.buffer_pct, args.default_qty)
+    result["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(result, fh, indent=2)
+    print(json.dumps(result["summary"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Priority scheduling for the exchange-facing part of signal handling.
+
+Validation (bar-close waits, kline/funding reads) runs freely in the queue
+workers; what is contended is order execution. ``execution_gate`` admits
+``EXECUTION_SLOTS`` executions at a time and, once full, hands freed slots to
+the most urgent waiter instead of the oldest:
+
+1. reversal closes (``flash_close_positions`` in ``evaluate_signal_received``)
+   and reversal entries,
+2. new entries, higher ``TIMEFRAME_RANK`` first,
+3. same-direction upgrades, higher rank first.
+
+Ties keep arrival order. Waiting time is recorded per priority class as
+``signal_wait_seconds{priority=...}``.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+from modules import metrics
+from modules.config import EXECUTION_SLOTS
+from modules.utils import TIMEFRAME_RANK
+
+MAX_RANK = max(TIMEFRAME_RANK.values())
+
+PRIORITY_CLASSES = {"reversal": 0, "entry": 1, "upgrade": 2}
+
+
+def signal_priority(action: str, interval: str) -> tuple:
+    """Sort key (lower runs first) and class name for a signal about to hit the exchange."""
+    action = (action or "open").lower()
+    if action == "reverse":
+        cls = "reversal"
+    elif action == "upgrade":
+        cls = "upgrade"
+    else:
+        cls = "entry"
+    return (PRIORITY_CLASSES[cls], MAX_RANK - TIMEFRAME_RANK.get(interval, 0)), cls
+
+
+class PriorityGate:
+    """Semaphore whose waiters are woken by priority rather than FIFO."""
+
+    def __init__(self, slots: int, name: str):
+        self.slots = slots
+        self.name = name
+        self._in_use = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    @asynccontextmanager
+    async def slot(self, priority, label: str):
+        started = time.perf_counter()
+        await self._acquire(priority)
+        metrics.observe(f"{self.name}_wait_seconds", time.perf_counter() - started, priority=label)
+        self._publish()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority):
+        if self._in_use < self.slots and not self.waiting:
+            self._in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._publish()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed to us just as we were cancelled; pass it on.
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            *_, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(True)  # slot moves straight to the waiter, _in_use unchanged
+                self._publish()
+                return
+        self._in_use -= 1
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge(f"{self.name}_in_use", self._in_use)
+        metrics.set_gauge(f"{self.name}_waiting", self.waiting)
+
+    def status(self) -> dict:
+        return {
+            "slots": self.slots,
+            "in_use": self._in_use,
+            "waiting": sorted(
+                (priority for priority, _, fut in self._waiters if not fut.done())
+            ),
+        }
+
+
+execution_gate = PriorityGate(EXECUTION_SLOTS, "signal")
@@ -0,0 +1,160 @@
+"""
+Trading-pair metadata and tick/lot rounding for order builders.
+
+Loaded from ``/market/trading_pairs`` when the worker starts and refreshed every
+``SYMBOL_INFO_REFRESH_SEC``. Per symbol it holds the price precision
+(``quotePrecision``), quantity precision (``basePrecision``), min/max order
+quantity and max leverage.
+
+``format_price`` / ``format_qty`` turn floats into the strings every order
+payload sends. They use float arithmetic only (no ``Decimal``): prices are
+rounded to the nearest tick, quantities rounded down to the lot (never more
+than was asked for, so a reduce-only quantity cannot exceed the position),
+raised to the minimum and capped at the maximum order size. They always print
+fixed-point, never ``1e-05``. Symbols the exchange has not described (or before
+the first load) keep the old fixed 6 / 3 decimals.
+"""
+import asyncio
+import math
+import time
+
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.config import SYMBOL_INFO_REFRESH_SEC
+from modules.logger_config import logger
+from modules.rate_limiter import PRIORITY_MARKET
+
+DEFAULT_PRICE_PRECISION = 6
+DEFAULT_QTY_PRECISION = 3
+_EPSILON = 1e-9  # float noise allowance before flooring, e.g. 0.3 / 0.1 -> 2.9999999999999996
+
+
+class SymbolInfo:
+    __slots__ = ("symbol", "price_precision", "qty_precision", "min_qty", "max_limit_qty", "max_market_qty",
+                 "max_leverage", "_price_scale", "_qty_scale")
+
+    def __init__(self, symbol: str, price_precision: int = DEFAULT_PRICE_PRECISION,
+                 qty_precision: int = DEFAULT_QTY_PRECISION, min_qty: float = 0.0,
+                 max_limit_qty: float = math.inf, max_market_qty: float = math.inf, max_leverage: int = None):
+        self.symbol = symbol
+        self.price_precision = price_precision
+        self.qty_precision = qty_precision
+        self.min_qty = min_qty
+        self.max_limit_qty = max_limit_qty
+        self.max_market_qty = max_market_qty
+        self.max_leverage = max_leverage
+        self._price_scale = 10 ** price_precision
+        self._qty_scale = 10 ** qty_precision
+
+    @classmethod
+    def from_pair(cls, pair: dict) -> "SymbolInfo":
+        def number(name, default):
+            value = pair.get(name)
+            return float(value) if value not in (None, "") else default
+
+        return cls(
+            symbol=pair["symbol"].upper(),
+            price_precision=int(pair.get("quotePrecision", DEFAULT_PRICE_PRECISION)),
+            qty_precision=int(pair.get("basePrecision", DEFAULT_QTY_PRECISION)),
+            min_qty=number("minTradeVolume", 0.0),
+            max_limit_qty=number("maxLimitOrderVolume", math.inf) or math.inf,
+            max_market_qty=number("maxMarketOrderVolume", math.inf) or math.inf,
+            max_leverage=int(pair["maxLeverage"]) if pair.get("maxLeverage") else None,
+        )
+
+    def round_price(self, price: float) -> float:
+        return round(price * self._price_scale) / self._price_scale
+
+    def round_qty(self, qty: float, order_type: str = "LIMIT") -> float:
+        qty = math.floor(qty * self._qty_scale + _EPSILON) / self._qty_scale
+        if qty < self.min_qty:
+            qty = self.min_qty
+        limit = self.max_market_qty if order_type.upper() == "MARKET" else self.max_limit_qty
+        return min(qty, limit)
+
+    def tradable_qty(self, qty: float, order_type: str = "LIMIT") -> float:
+        """Like ``round_qty``, but 0 below the minimum order size instead of raising it to ``min_qty``."""
+        floored = math.floor(qty * self._qty_scale + _EPSILON) / self._qty_scale
+        if floored <= 0 or floored < self.min_qty:
+            return 0.0
+        return self.round_qty(floored, order_type)
+
+    def format_price(self, price: float) -> str:
+        return f"{self.round_price(float(price)):.{self.price_precision}f}"
+
+    def format_qty(self, qty: float, order_type: str = "LIMIT") -> str:
+        return f"{self.round_qty(float(qty), order_type):.{self.qty_precision}f}"
+
+    def as_dict(self) -> dict:
+        return {
+            "price_precision": self.price_precision,
+            "qty_precision": self.qty_precision,
+            "min_qty": self.min_qty,
+            "max_limit_qty": None if math.isinf(self.max_limit_qty) else self.max_limit_qty,
+            "max_market_qty": None if math.isinf(self.max_market_qty) else self.max_market_qty,
+            "max_leverage": self.max_leverage,
+        }
+
+
+class SymbolInfoCache:
+    def __init__(self):
+        self.symbols = {}
+        self.loaded_at = None
+
+    def get(self, symbol: str) -> SymbolInfo:
+        symbol = symbol.upper()
+        info = self.symbols.get(symbol)
+        if info is None:
+            metrics.incr("symbol_info_missing")
+            info = SymbolInfo(symbol)
+        return info
+
+    async def load(self):
+        response = await bitunix_request("get", "/api/v1/futures/market/trading_pairs", signed=False,
+                                         priority=PRIORITY_MARKET, timeout=10.0)
+        response.raise_for_status()
+        pairs = response.json().get("data") or []
+        symbols = {}
+        for pair in pairs:
+            try:
+                info = SymbolInfo.from_pair(pair)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"[SYMBOL INFO] Skipping malformed pair {pair.get('symbol')}: {e}")
+                continue
+            symbols[info.symbol] = info
+        if symbols:
+            self.symbols = symbols
+            self.loaded_at = time.time()
+        logger.info(f"[SYMBOL INFO] Loaded {len(symbols)} trading pairs")
+        return len(symbols)
+
+    def status(self) -> dict:
+        return {
+            "loaded_at": self.loaded_at,
+            "symbols": {symbol: info.as_dict() for symbol, info in sorted(self.symbols.items())},
+        }
+
+
+symbol_info = SymbolInfoCache()
+
+
+def format_price(symbol: str, price: float) -> str:
+    return symbol_info.get(symbol).format_price(price)
+
+
+def format_qty(symbol: str, qty: float, order_type: str = "LIMIT") -> str:
+    return symbol_info.get(symbol).format_qty(qty, order_type)
+
+
+async def run_symbol_info_refresh():
+    """Load the pairs at startup and refresh them periodically (retrying sooner after a failure)."""
+    while True:
+        try:
+            await symbol_info.load()
+            delay = SYMBOL_INFO_REFRESH_SEC
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[SYMBOL INFO] Refresh failed: {e}")
+            delay = min(60, SYMBOL_INFO_REFRESH_SEC)
+        await asyncio.sleep(delay)
@@ -1,15 +1,20 @@
 import asyncio
-import base64
 import hashlib
 import httpx
 import json
 import re
-import secrets
 import time
 from datetime import datetime
 
-from modules.config import API_KEY, API_SECRET, BASE_URL
+from modules.bitunix_client import bitunix_request
+from modules.config import API_KEY, API_SECRET
 from modules.logger_config import logger, setup_asset_logging
+from modules.order_book import order_book
+from modules.rate_limiter import PRIORITY_CRITICAL, PRIORITY_ORDER, PRIORITY_QUERY
+from modules.order_templates import order_templates
+from modules.symbol_info import symbol_info, format_price, format_qty
+from modules.retry_policy import ORDER_POLICY, CLOSE_POLICY, TPSL_PLACE_POLICY, TPSL_MODIFY_POLICY, \
+    QUERY_POLICY, new_client_id
 # from modules.postgres_state_manager import update_position_state, get_or_create_symbol_direction_state
 from modules.redis_state_manager import get_or_create_symbol_direction_state, update_position_state, delete_position_state
 from modules.redis_client import get_redis
@@ -65,14 +70,19 @@ async def is_valid_tp_price(direction: str, tp_price: float,
         return tp_price < mark_price * (1 - buffer_pct)
 
 
-async def safe_submit_sl_update(symbol: str, direction: str, sl_payload: dict, sl_price: float, retries: int = 3,
-                                retry_delay: int = 2) -> bool:
+def _accepted(response: dict) -> bool:
+    """True if a Bitunix JSON response reports success (``code`` 0)."""
+    return bool(response) and response.get("code") == 0
+
+
+async def safe_submit_sl_update(symbol: str, direction: str, sl_payload: dict, sl_price: float,
+                                retries: int = 3) -> bool:
     from modules.price_feed import get_latest_mark_price
     setup_asset_logging(symbol)
     log_extra = _log_extra(symbol, direction)
     for attempt in range(retries):
         try:
-            mark_price = await get_latest_mark_price(symbol)
+            mark_price = await get_latest_mark_price(symbol, priority=PRIORITY_CRITICAL)
             if not mark_price:
                 raise ValueError("Mark price unavailable")
 
@@ -81,24 +91,26 @@ async def safe_submit_sl_update(symbol: str, direction: str, sl_payload: dict, s
                     f"[SL ✅] Submitting SL {sl_price} (mark: {mark_price}) for {symbol} {direction}",
                     extra=log_extra,
                 )
-                await submit_modified_tp_sl_order_async(sl_payload)
-                return True
+                if _accepted(await submit_modified_tp_sl_order_async(sl_payload)):
+                    return True
+                raise ValueError("SL modify not accepted")
             else:
                 buffer_pct = 0.001
                 adjusted_sl = mark_price * (1 + buffer_pct) if direction == "BUY" else mark_price * (1 - buffer_pct)
-                sl_payload["slPrice"] = str(round(adjusted_sl, 6))
+                sl_payload["slPrice"] = format_price(symbol, adjusted_sl)
                 logger.warning(
                     f"[TP ❌] Adjusting SL to {adjusted_sl} due to invalid original value",
                     extra=log_extra,
                 )
-                await submit_modified_tp_sl_order_async(sl_payload)
-                return True
+                if _accepted(await submit_modified_tp_sl_order_async(sl_payload)):
+                    return True
+                raise ValueError("SL modify not accepted")
         except Exception as e:
             logger.error(
                 f"[SL ERROR] Retry {attempt + 1} for {symbol} {direction}: {e}",
                 extra=log_extra,
             )
-            await asyncio.sleep(retry_delay)
+            await asyncio.sleep(TPSL_MODIFY_POLICY.delay(attempt))
 
     logger.error(
         f"[SL FAILED] Giving up SL update for {symbol} {direction} after {retries} retries.",
@@ -107,14 +119,14 @@ async def safe_submit_sl_update(symbol: str, direction: str, sl_payload: dict, s
     return False
 
 
-async def safe_submit_tp_update(symbol: str, direction: str, tp_payload: dict, tp_price: float, retries: int = 3,
-                                retry_delay: int = 2) -> bool:
+async def safe_submit_tp_update(symbol: str, direction: str, tp_payload: dict, tp_price: float,
+                                retries: int = 3) -> bool:
     from modules.price_feed import get_latest_mark_price
     setup_asset_logging(symbol)
     log_extra = _log_extra(symbol, direction)
     for attempt in range(retries):
         try:
-            mark_price = await get_latest_mark_price(symbol)
+            mark_price = await get_latest_mark_price(symbol, priority=PRIORITY_ORDER)
             if not mark_price:
                 raise ValueError("Mark price unavailable")
 
@@ -123,24 +135,26 @@ async def safe_submit_tp_update(symbol: str, direction: str, tp_payload: dict, t
                     f"[TP ✅] Submitting TP {tp_price} (mark: {mark_price}) for {symbol} {direction}",
                     extra=log_extra,
                 )
-                await submit_modified_tp_sl_order_async(tp_payload)
-                return True
+                if _accepted(await submit_modified_tp_sl_order_async(tp_payload)):
+                    return True
+                raise ValueError("TP modify not accepted")
             else:
                 buffer_pct = 0.001
                 adjusted_tp = mark_price * (1 + buffer_pct) if direction == "BUY" else mark_price * (1 - buffer_pct)
-                tp_payload["tpPrice"] = str(round(adjusted_tp, 6))
+                tp_payload["tpPrice"] = format_price(symbol, adjusted_tp)
                 logger.warning(
                     f"[TP ❌] Adjusting TP to {adjusted_tp} due to invalid original value",
                     extra=log_extra,
                 )
-                await submit_modified_tp_sl_order_async(tp_payload)
-                return True
+                if _accepted(await submit_modified_tp_sl_order_async(tp_payload)):
+                    return True
+                raise ValueError("TP modify not accepted")
         except Exception as e:
             logger.error(
                 f"[TP ERROR] Retry {attempt + 1} for {symbol} {direction}: {e}",
                 extra=log_extra,
             )
-            await asyncio.sleep(retry_delay)
+            await asyncio.sleep(TPSL_MODIFY_POLICY.delay(attempt))
 
     logger.error(
         f"[TP FAILED] Giving up TP update for {symbol} {direction} after {retries} retries.",
@@ -154,39 +168,24 @@ async def submit_modified_tp_sl_order_async(order_data):
     if symbol:
         setup_asset_logging(symbol)
     log_extra = _log_extra(symbol) if symbol else None
-    timestamp = str(int(time.time() * 1000))
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
-
-    body_json = json.dumps(order_data, separators=(',', ':'))
-    digest_input = nonce + timestamp + API_KEY + body_json
-    digest = hashlib.sha256(digest_input.encode('utf-8')).hexdigest()
-    sign_input = digest + API_SECRET
-    signature = hashlib.sha256(sign_input.encode('utf-8')).hexdigest()
-
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": API_KEY,
-        "sign": signature,
-        "timestamp": timestamp,
-        "nonce": nonce
-    }
+    body_json = order_templates.get(symbol).modify_tpsl(order_data)
+    priority = PRIORITY_CRITICAL if "slPrice" in order_data else PRIORITY_ORDER
 
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(f"{BASE_URL}/api/v1/futures/tpsl/modify_order", headers=headers,
-                                         content=body_json)
-            response.raise_for_status()
-            logger.info(
-                f"[TP/SL MODIFY SUCCESS] {body_json}",
-                extra=log_extra,
-            )
-            logger.info(
-                f"[TP/SL MODIFY SUCCESS] {response.json()}",
-                extra=log_extra,
-            )
-            return response.json()
+        response = await bitunix_request("post", "/api/v1/futures/tpsl/modify_order", content=body_json,
+                                         priority=priority, timeout=5.0, retry=TPSL_MODIFY_POLICY)
+        response.raise_for_status()
+        logger.info(
+            f"[TP/SL MODIFY SUCCESS] {body_json}",
+            extra=log_extra,
+        )
+        logger.info(
+            f"[TP/SL MODIFY SUCCESS] {response.json()}",
+            extra=log_extra,
+        )
+        return response.json()
 
-    except httpx.RequestError as e:
+    except httpx.HTTPError as e:
         logger.error(
             f"[TP/SL MODIFY SUCCESS] {e}",
             extra=log_extra,
@@ -205,17 +204,15 @@ async def update_tp_quantity(order_id: str, symbol: str, new_tp_qty: float, new_
     payload = {
         "symbol": symbol,
         "orderId": order_id,
-        "tpQty": str(round(new_tp_qty, 3)),
-        "tpOrderType": "MARKET",
-        "tpStopType": "MARK_PRICE",
-        "tpPrice": str(new_tp_price)
+        "tpPrice": format_price(symbol, new_tp_price),
+        "tpQty": format_qty(symbol, new_tp_qty),
     }
 
     logger.info(
         f"[MODIFY TP QTY] {symbol} orderId={order_id} new_tp_qty={new_tp_qty}",
         extra=log_extra,
     )
-    await submit_modified_tp_sl_order_async(payload)
+    return _accepted(await submit_modified_tp_sl_order_async(payload))
 
 
 async def update_sl_price(order_id: str, direction: str, symbol: str, new_sl_price: float, sl_qty: float):
@@ -224,60 +221,44 @@ async def update_sl_price(order_id: str, direction: str, symbol: str, new_sl_pri
     payload = {
         "symbol": symbol,
         "orderId": order_id,
-        "slPrice": str(round(new_sl_price, 6)),
-        "slQty": str(round(sl_qty, 3)),
-        "slOrderType": "MARKET",
-        "slStopType": "MARK_PRICE"
+        "slPrice": format_price(symbol, new_sl_price),
+        "slQty": format_qty(symbol, sl_qty),
     }
 
     logger.info(
         f"[MODIFY SL] {symbol} orderId={order_id} new_sl_price={new_sl_price}",
         extra=log_extra,
     )
-    await safe_submit_sl_update(symbol, direction, payload, new_sl_price)
+    # The SL actually sent: safe_submit_sl_update may move it off an invalid price.
+    return payload["slPrice"] if await safe_submit_sl_update(symbol, direction, payload, new_sl_price) else None
 
 
 async def modify_tp_sl_order_async(direction, symbol, tp_price, sl_price, position_id, tp_qty, sl_qty):
     setup_asset_logging(symbol)
     log_extra = _log_extra(symbol, direction)
-    url = f"{BASE_URL}/api/v1/futures/tpsl/get_pending_orders"
-    random_bytes = secrets.token_bytes(32)
-    nonce = base64.b64encode(random_bytes).decode('utf-8')
-    timestamp = str(int(time.time() * 1000))
-
     data = {"symbol": symbol}
-    method = "get"
-    sign = generate_get_sign_api(nonce, timestamp, method, data)
-
-    headers = {
-        "api-key": API_KEY,
-        "nonce": nonce,
-        "timestamp": timestamp,
-        "sign": sign,
-        "language": "en-US",
-        "Content-Type": "application/json"
-    }
 
     try:
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.request(method, url, headers=headers, params=data)
+        orders = order_book.tpsl_orders(symbol)
+        if orders is None:
+            try:
+                response = await bitunix_request("get", "/api/v1/futures/tpsl/get_pending_orders", params=data,
+                                                 priority=PRIORITY_CRITICAL, retry=QUERY_POLICY)
                 response.raise_for_status()
                 response_data = response.json()
-        except httpx.RequestError as e:
-            logger.error(
-                f"[PENDING TP/SL ORDERS] {e}",
-                extra=log_extra,
-            )
-            if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
+            except httpx.HTTPError as e:
                 logger.error(
-                    f"[PENDING TP/SL ORDERS] Response: {e.response.text}",
+                    f"[PENDING TP/SL ORDERS] {e}",
                     extra=log_extra,
                 )
-            return None
-
-        orders = response_data.get("data", {})
-        logger.info(f"[PENDING TP/SL ORDERS]: {response_data}", extra=log_extra)
+                if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
+                    logger.error(
+                        f"[PENDING TP/SL ORDERS] Response: {e.response.text}",
+                        extra=log_extra,
+                    )
+                return None
+            orders = response_data.get("data", {})
+        logger.info(f"[PENDING TP/SL ORDERS]: {orders}", extra=log_extra)
 
         if not orders:
             logger.warning(
@@ -299,14 +280,10 @@ async def modify_tp_sl_order_async(direction, symbol, tp_price, sl_price, positi
                         "data": {
                             "symbol": symbol,
                             "orderId": o["id"],
-                            "tpPrice": str(tp_price),
-                            "tpStopType": "MARK_PRICE",
-                            "tpOrderType": "MARKET",
-                            "tpQty": str(tp_qty),
-                            "slPrice": str(sl_price),
-                            "slStopType": "MARK_PRICE",
-                            "slOrderType": "MARKET",
-                            "slQty": str(sl_qty),
+                            "tpPrice": format_price(symbol, tp_price),
+                            "tpQty": format_qty(symbol, tp_qty),
+                            "slPrice": format_price(symbol, sl_price),
+                            "slQty": format_qty(symbol, sl_qty),
                         }
                     }
                 else:
@@ -314,10 +291,8 @@ async def modify_tp_sl_order_async(direction, symbol, tp_price, sl_price, positi
                         "data": {
                             "symbol": symbol,
                             "orderId": o["id"],
-                            "slPrice": str(sl_price),
-                            "slStopType": "MARK_PRICE",
-                            "slOrderType": "MARKET",
-                            "slQty": str(sl_qty),
+                            "slPrice": format_price(symbol, sl_price),
+                            "slQty": format_qty(symbol, sl_qty),
                         }
                     }
             else:
@@ -325,10 +300,8 @@ async def modify_tp_sl_order_async(direction, symbol, tp_price, sl_price, positi
                     "data": {
                         "symbol": symbol,
                         "orderId": o["id"],
-                        "tpPrice": str(tp_price),
-                        "tpStopType": "MARK_PRICE",
-                        "tpOrderType": "MARKET",
-                        "tpQty": str(tp_qty),
+                        "tpPrice": format_price(symbol, tp_price),
+                        "tpQty": format_qty(symbol, tp_qty),
                     }
                 }
 
@@ -370,60 +343,31 @@ async def modify_tp_sl_order_async(direction, symbol, tp_price, sl_price, positi
 async def place_tp_sl_order_async(symbol, tp_price, sl_price, position_id, tp_qty, qty):
     setup_asset_logging(symbol)
     log_extra = _log_extra(symbol)
-    timestamp = str(int(time.time() * 1000))
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
+    templates = order_templates.get(symbol)
     if sl_price:
-        order_data = {
-            "symbol": symbol,
-            "positionId": position_id,
-            "slPrice": str(sl_price),
-            "slStopType": "MARK_PRICE",
-            "slOrderType": "MARKET",
-            "slQty": str(qty)
-        }
+        content = templates.place_tpsl("sl", position_id, format_price(symbol, sl_price), format_qty(symbol, qty))
     else:
-        order_data = {
-            "symbol": symbol,
-            "positionId": position_id,
-            "tpPrice": str(tp_price),
-            "tpStopType": "MARK_PRICE",
-            "tpOrderType": "MARKET",
-            "tpQty": str(tp_qty)
-        }
-
-    body_json = json.dumps(order_data, separators=(',', ':'))
-    digest_input = nonce + timestamp + API_KEY + body_json
-    digest = hashlib.sha256(digest_input.encode('utf-8')).hexdigest()
-    sign_input = digest + API_SECRET
-    signature = hashlib.sha256(sign_input.encode('utf-8')).hexdigest()
-
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": API_KEY,
-        "sign": signature,
-        "timestamp": timestamp,
-        "nonce": nonce
-    }
+        content = templates.place_tpsl("tp", position_id, format_price(symbol, tp_price), format_qty(symbol, tp_qty))
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(f"{BASE_URL}/api/v1/futures/tpsl/place_order", headers=headers,
-                                         content=body_json)
-            response.raise_for_status()
-            logger.info(
-                f"[TP/SL ORDER SUCCESS] {response.json()}",
-                extra=log_extra,
-            )
-            response_data = response.json().get("data")
+        response = await bitunix_request("post", "/api/v1/futures/tpsl/place_order", content=content,
+                                         priority=PRIORITY_CRITICAL if sl_price else PRIORITY_ORDER,
+                                         retry=TPSL_PLACE_POLICY)
+        response.raise_for_status()
+        logger.info(
+            f"[TP/SL ORDER SUCCESS] {response.json()}",
+            extra=log_extra,
+        )
+        response_data = response.json().get("data")
 
-            order_id = None
+        order_id = None
 
-            if isinstance(response_data, list) and len(response_data) > 0:
-                order_id = response_data[0].get("orderId")
-            elif isinstance(response_data, dict):
-                order_id = response_data.get("orderId")
-            return order_id
-    except httpx.RequestError as e:
+        if isinstance(response_data, list) and len(response_data) > 0:
+            order_id = response_data[0].get("orderId")
+        elif isinstance(response_data, dict):
+            order_id = response_data.get("orderId")
+        return order_id
+    except httpx.HTTPError as e:
         logger.error(f"[ORDER FAILED] {e}", extra=log_extra)
         if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
             logger.error(f"[ORDER FAILED] Response: {e.response.text}", extra=log_extra)
@@ -603,8 +547,10 @@ async def evaluate_signal_received(symbol: str, new_direction: str, new_qty: flo
             f"[REVERSAL DETECTED] Closing {opposite_direction} position on {symbol} to open {new_direction}",
             extra=log_extra,
         )
+        from modules.signal_scheduler import execution_gate, signal_priority
+        priority, priority_class = signal_priority("reverse", new_interval)
         try:
-            if await flash_close_positions(symbol, position_id) == "failed":
+            async with execution_gate.slot(priority, priority_class):
                 await flash_close_positions(symbol, position_id)
             # await update_position_state(symbol, opposite_direction, position_id, {"status": "CLOSED"})
             # await delete_position_state(symbol, opposite_direction, position_id)
@@ -634,7 +580,7 @@ async def evaluate_signal_received(symbol: str, new_direction: str, new_qty: flo
         f"[REVERSE CHECK] No reversal permitted for {symbol}. Existing opposite position retained.",
         extra=log_extra,
     )
-    return {"action": "ignore", "reverse_qty": new_qty}
+    return {"action": "ignore", "reverse_qty": new_qty, "state": active_state}
 
 
 TIMEFRAME_RANK = {"3m": 1, "5m": 2, "15m": 3, "1h": 4, "4h": 5, "1d": 6}
@@ -670,6 +616,18 @@ def evaluate_multi_timeframe_strategy(
         return {"action": "open", "reverse_qty": 0}
 
 
+def position_accepts_signal(state: dict, new_stop_loss: float, direction: str, trade_action: str) -> bool:
+    """
+    Whether a signal may (re)enter the position in ``state``: any non-IGNORE action, a PENDING
+    position, or an OPEN one still at step 0 whose stop loss the new signal does not tighten.
+    """
+    if trade_action.upper() != "IGNORE" or state.get("status") == "PENDING":
+        return True
+    position_sl = state.get("stop_loss")
+    sl_threshold = new_stop_loss <= position_sl if direction == "BUY" else new_stop_loss >= position_sl
+    return state.get("step") == 0 and state.get("status") == "OPEN" and sl_threshold
+
+
 async def maybe_reverse_position(symbol: str, new_direction: str):
     """
     If an opposite position is open, closes it and opens a new one with doubled quantity.
@@ -697,7 +655,6 @@ async def maybe_reverse_position(symbol: str, new_direction: str):
         # Optional: cancel any remaining limit/TP/SL orders
         # await cancel_all_new_orders(symbol, opposite_direction, context="reversal")
         await close_all_positions(symbol)
-        await close_all_positions(symbol)
     # Update old state as CLOSED
         await update_position_state(symbol, opposite_direction, opposite_position_id, {"status": "CLOSED"})
         await delete_position_state(symbol, opposite_direction, opposite_position_id)
@@ -714,95 +671,79 @@ async def maybe_reverse_position(symbol: str, new_direction: str):
 
 
 async def place_order(symbol, side, price, qty, order_type="LIMIT", leverage=20, tp=None, sl=None, private=True,
-                      reduce_only=False):
+                      reduce_only=False, client_id=None):
     setup_asset_logging(symbol)
     log_extra = _log_extra(symbol, side)
-    timestamp = str(int(time.time() * 1000))
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
+    # Same clientId on every retry: the exchange rejects a second order with it, so a retry cannot double-fill.
+    client_id = client_id or new_client_id()
+    qty_str, price_str = format_qty(symbol, qty, order_type), format_price(symbol, price)
 
-    order_data = {
-        "symbol": symbol,
-        "qty": str(qty),
-        "price": str(price),
-        "side": side.upper(),
-        "orderType": order_type.upper(),
-        "tradeSide": "OPEN",
-        "effect": "GTC",
-        "clientId": timestamp,
-    }
+    order_data, content = None, None
+    if tp or sl:
+        # Attached TP/SL is rare enough not to have a template.
+        order_data = {
+            "symbol": symbol,
+            "qty": qty_str,
+            "price": price_str,
+            "side": side.upper(),
+            "orderType": order_type.upper(),
+            "tradeSide": "CLOSE" if reduce_only else "OPEN",
+            "effect": "GTC",
+            "clientId": client_id,
+        }
+        if reduce_only:
+            order_data["reduceOnly"] = True
+        if tp:
+            order_data["tpPrice"] = format_price(symbol, tp)
+            order_data["tpOrderType"] = "MARKET"
+            order_data["tpStopType"] = "MARK_PRICE"
+        if sl:
+            order_data.update({
+                "slPrice": format_price(symbol, sl),
+                "slStopType": "MARK_PRICE",
+                "slOrderType": "MARKET"
+            })
+    else:
+        content = order_templates.get(symbol).order(side, order_type, reduce_only, qty_str, price_str, client_id)
 
-    if reduce_only:
-        order_data["reduceOnly"] = True
-        order_data["tradeSide"] = "CLOSE"
-    if tp:
-        order_data["tpPrice"] = str(tp)
-        order_data["tpOrderType"] = "MARKET"
-        order_data["tpStopType"] = "MARK_PRICE"
-    if sl:
-        order_data.update({
-            "slPrice": str(sl),
-            "slStopType": "MARK_PRICE",
-            "slOrderType": "MARKET"
-        })
-
-    body_json = json.dumps(order_data, separators=(',', ':'))
-    digest_input = nonce + timestamp + API_KEY + body_json
-    digest = hashlib.sha256(digest_input.encode('utf-8')).hexdigest()
-    sign_input = digest + API_SECRET
-    signature = hashlib.sha256(sign_input.encode('utf-8')).hexdigest()
-
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": API_KEY,
-        "sign": signature,
-        "timestamp": timestamp,
-        "nonce": nonce
-    }
+    # logger.info(f"[ORDER DATA] {content or order_data}")
 
-    # logger.info(f"[ORDER DATA] {order_data}")
+    async def already_placed():
+        return await find_order_by_client_id(client_id)
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/futures/trade/place_order",
-                headers=headers,
-                content=body_json
-            )
-            response.raise_for_status()
-            logger.info(f"[ORDER SUCCESS] {response.json()}", extra=log_extra)
-            return response.json()
-    except httpx.RequestError as e:
+        response = await bitunix_request(
+            "post",
+            "/api/v1/futures/trade/place_order",
+            body=order_data,
+            content=content,
+            priority=PRIORITY_CRITICAL if reduce_only else PRIORITY_ORDER,
+            retry=ORDER_POLICY,
+            recover=already_placed
+        )
+        response.raise_for_status()
+        logger.info(f"[ORDER SUCCESS] {response.json()}", extra=log_extra)
+        return response.json()
+    except httpx.HTTPError as e:
         logger.error(f"[ORDER FAILED] {e}", extra=log_extra)
         if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
             logger.error(f"[ORDER FAILED] Response: {e.response.text}", extra=log_extra)
         return None
 
 
-def parse_signal(message):
-    lines = message.split('\n')
-    signal_type = lines[0].strip().lower()
-    direction = 'SELL' if 'short' in signal_type else 'BUY'
-
-    def extract_value(key):
-        for line in lines:
-            if key in line:
-                return float(re.findall(r"[\d.]+", line)[0])
-        return None
-
-    entry_price = extract_value("Entry Price")
-    stop_loss = extract_value("Stop Loss")
-    tps = [float(tp) for tp in re.findall(r"TP\d+:\s*([\d.]+)", message)]
-    logger.info(f"[tps]: {tps}")
-    acc_zone_match = re.search(r"Accumulation Zone: ([\d.]+) - ([\d.]+)", message)
-    acc_top, acc_bottom = float(acc_zone_match.group(1)), float(acc_zone_match.group(2))
-
-    return {
-        "direction": direction,
-        "entry_price": entry_price,
-        "stop_loss": stop_loss,
-        "take_profits": tps,
-        "accumulation_zone": [acc_top, acc_bottom]
-    }
+def parse_symbol_path(symbol_qty: str):
+    """Split a webhook symbol like ``BTCUSDT_10_5m`` into (symbol, override_qty, interval)."""
+    symbol_qty = symbol_qty.upper()
+    if "_" in symbol_qty:
+        parts = symbol_qty.split("_")
+        symbol = parts[0]
+        override_qty = float(parts[1]) if len(parts) > 1 else None
+        interval = parts[2].lower() if len(parts) > 2 else "1m"
+    else:
+        symbol = symbol_qty
+        override_qty = None
+        interval = "1m"
+    return symbol, override_qty, interval
 
 
 def calculate_zone_entries(acc_zone):
@@ -811,8 +752,11 @@ def calculate_zone_entries(acc_zone):
     return [top, mid, bottom]
 
 
-def calculate_quantities(prices, direction):
+def calculate_quantities(prices, direction, symbol=None):
     multipliers = [10, 10, 20]  # $ amounts
+    if symbol:
+        info = symbol_info.get(symbol)
+        return [info.round_qty(m / p) for m, p in zip(multipliers, prices)]
     return [round(m / p, 6) for m, p in zip(multipliers, prices)]
 
 
@@ -833,7 +777,7 @@ async def is_duplicate_signal(symbol, direction, buffer_secs=5):
             f"[REDIS ERROR] Failed to check duplicate signal for {key}: {e}",
             extra=log_extra,
         )
-        return True  # fail-safe: treat it as duplicate to avoid bad order
+        return True  # fail closed, like should_accept_signal: treat it as duplicate to avoid bad order
     logger.info(f"[DUPLICATE SIGNAL]: {was_set}", extra=log_extra)
     if not was_set:
         logger.info(f"[DUPLICATE SIGNAL CONFIRMED]", extra=log_extra)
@@ -848,32 +792,20 @@ async def close_all_positions(symbol):
         "symbol": symbol
     }
 
-    close_position_nonce = base64.b64encode(secrets.token_bytes(32)).decode()
-    close_position_ts = str(int(time.time() * 1000))
-    close_position_body = json.dumps(close_position_payload, separators=(',', ':'))
-    close_position_digest = hashlib.sha256((close_position_nonce + close_position_ts + API_KEY + close_position_body).encode()).hexdigest()
-    close_position_sign = hashlib.sha256((close_position_digest + API_SECRET).encode()).hexdigest()
-
-    close_position_headers = {
-        "api-key": API_KEY,
-        "sign": close_position_sign,
-        "nonce": close_position_nonce,
-        "timestamp": close_position_ts,
-        "Content-Type": "application/json"
-    }
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            close_position_response = await client.post(
-                f"{BASE_URL}/api/v1/futures/trade/close_all_position",
-                headers=close_position_headers,
-                content=close_position_body
-            )
-            close_position_response.raise_for_status()
-            logger.info(
-                f"[ORDER CANCEL SUCCESS] {symbol}: {close_position_response.json()}",
-                extra=log_extra,
-            )
-    except httpx.RequestError as e:
+        close_position_response = await bitunix_request(
+            "post",
+            "/api/v1/futures/trade/close_all_position",
+            body=close_position_payload,
+            priority=PRIORITY_CRITICAL,
+            retry=CLOSE_POLICY
+        )
+        close_position_response.raise_for_status()
+        logger.info(
+            f"[ORDER CANCEL SUCCESS] {symbol}: {close_position_response.json()}",
+            extra=log_extra,
+        )
+    except httpx.HTTPError as e:
         logger.error(f"[ORDER CANCEL FAILED] {e}", extra=log_extra)
         if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
             logger.error(f"[ORDER CANCEL FAILED] Response: {e.response.text}", extra=log_extra)
@@ -887,73 +819,62 @@ async def flash_close_positions(symbol, position_id):
         "positionId": position_id
     }
 
-    close_position_nonce = base64.b64encode(secrets.token_bytes(32)).decode()
-    close_position_ts = str(int(time.time() * 1000))
-    close_position_body = json.dumps(close_position_payload, separators=(',', ':'))
-    close_position_digest = hashlib.sha256((close_position_nonce + close_position_ts + API_KEY + close_position_body).encode()).hexdigest()
-    close_position_sign = hashlib.sha256((close_position_digest + API_SECRET).encode()).hexdigest()
-
-    close_position_headers = {
-        "api-key": API_KEY,
-        "sign": close_position_sign,
-        "nonce": close_position_nonce,
-        "timestamp": close_position_ts,
-        "Content-Type": "application/json"
-    }
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            close_position_response = await client.post(
-                f"{BASE_URL}/api/v1/futures/trade/flash_close_position",
-                headers=close_position_headers,
-                content=close_position_body
+        close_position_response = await bitunix_request(
+            "post",
+            "/api/v1/futures/trade/flash_close_position",
+            body=close_position_payload,
+            priority=PRIORITY_CRITICAL,
+            retry=CLOSE_POLICY
+        )
+        close_position_response.raise_for_status()
+        if close_position_response.json().get("code") != 0:
+            logger.warning(
+                f"[FLASH CLOSE IGNORED] {symbol} {position_id}: {close_position_response.json().get('msg')}",
+                extra=log_extra,
             )
-            close_position_response.raise_for_status()
-            if close_position_response.json().get("code") != 0:
-                logger.warning(
-                    f"[FLASH CLOSE IGNORED] {symbol} {position_id}: {close_position_response.json().get('msg')}",
-                    extra=log_extra,
-                )
-                return "failed"
-            else:
-                logger.info(
-                    f"[FLASH CLOSE SUCCESS] {symbol} {position_id}: {close_position_response.json()}",
-                    extra=log_extra,
-                )
-                return "success"
-    except httpx.RequestError as e:
+            return "failed"
+        else:
+            logger.info(
+                f"[FLASH CLOSE SUCCESS] {symbol} {position_id}: {close_position_response.json()}",
+                extra=log_extra,
+            )
+            return "success"
+    except httpx.HTTPError as e:
         logger.error(f"[FLASH CLOSE FAILED] {e}", extra=log_extra)
         if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
             logger.error(f"[FLASH CLOSE FAILED] Response: {e.response.text}", extra=log_extra)
         return None
 
 
+async def find_order_by_client_id(client_id):
+    """Order detail response for ``client_id``, or None if the exchange has no such order."""
+    response = await bitunix_request(
+        "get",
+        "/api/v1/futures/trade/get_order_detail",
+        params={"clientId": client_id},
+        priority=PRIORITY_CRITICAL,
+        retry=QUERY_POLICY
+    )
+    response.raise_for_status()
+    payload = response.json()
+    return response if payload.get("code") == 0 and payload.get("data") else None
+
+
 async def get_order_detail(order_id):
-    # Step 1: Prepare authentication and GET headers
-    method = "get"
     data = {"orderId": order_id}
-    nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
-    timestamp = str(int(time.time() * 1000))
-    signature = generate_get_sign_api(nonce, timestamp, method, data)
-
-    headers = {
-        "api-key": API_KEY,
-        "sign": signature,
-        "nonce": nonce,
-        "timestamp": timestamp,
-        "language": "en-US",
-        "Content-Type": "application/json"
-    }
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/api/v1/futures/trade/get_order_detail",
-                headers=headers,
-                params=data
-            )
-            response.raise_for_status()
-            order_entry_price = response.json().get("data", {}).get("price", 0.0)
-            return float(round(order_entry_price, 6))
-    except httpx.RequestError as e:
+        response = await bitunix_request(
+            "get",
+            "/api/v1/futures/trade/get_order_detail",
+            params=data,
+            priority=PRIORITY_QUERY,
+            retry=QUERY_POLICY
+        )
+        response.raise_for_status()
+        order_entry_price = response.json().get("data", {}).get("price", 0.0)
+        return float(round(order_entry_price, 6))
+    except httpx.HTTPError as e:
         logger.error(f"[PENDING ORDER CAPTURE FAILED] {e}")
         if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
             logger.error(f"[PENDING ORDER CAPTURE FAILED] Response: {e.response.text}")
@@ -971,35 +892,24 @@ async def cancel_all_new_orders(symbol, direction, context="tp"):
             logger.error(f"[CANCEL ORDERS] Invalid direction: {direction}", extra=log_extra)
             return
 
-        # Step 1: Prepare authentication and GET headers
-        method = "get"
         data = {"symbol": symbol}
-        nonce = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
-        timestamp = str(int(time.time() * 1000))
-        signature = generate_get_sign_api(nonce, timestamp, method, data)
-
-        headers = {
-            "api-key": API_KEY,
-            "sign": signature,
-            "nonce": nonce,
-            "timestamp": timestamp,
-            "language": "en-US",
-            "Content-Type": "application/json"
-        }
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{BASE_URL}/api/v1/futures/trade/get_pending_orders",
-                    headers=headers,
-                    params=data
+        orders = order_book.open_orders(symbol)
+        if orders is None:
+            try:
+                response = await bitunix_request(
+                    "get",
+                    "/api/v1/futures/trade/get_pending_orders",
+                    params=data,
+                    priority=PRIORITY_ORDER,
+                    retry=QUERY_POLICY
                 )
                 response.raise_for_status()
                 orders = response.json().get("data", {}).get("orderList", [])
-        except httpx.RequestError as e:
-            logger.error(f"[PENDING ORDER CAPTURE FAILED] {e}", extra=log_extra)
-            if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
-                logger.error(f"[PENDING ORDER CAPTURE FAILED] Response: {e.response.text}", extra=log_extra)
-            return None
+            except httpx.HTTPError as e:
+                logger.error(f"[PENDING ORDER CAPTURE FAILED] {e}", extra=log_extra)
+                if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
+                    logger.error(f"[PENDING ORDER CAPTURE FAILED] Response: {e.response.text}", extra=log_extra)
+                return None
 
         # Filter orders based on context
         if context == "reversal":
@@ -1025,32 +935,21 @@ async def cancel_all_new_orders(symbol, direction, context="tp"):
             "orderList": cancel_list
         }
 
-        cancel_nonce = base64.b64encode(secrets.token_bytes(32)).decode()
-        cancel_ts = str(int(time.time() * 1000))
-        cancel_body = json.dumps(cancel_payload, separators=(',', ':'))
-        cancel_digest = hashlib.sha256((cancel_nonce + cancel_ts + API_KEY + cancel_body).encode()).hexdigest()
-        cancel_sign = hashlib.sha256((cancel_digest + API_SECRET).encode()).hexdigest()
-
-        cancel_headers = {
-            "api-key": API_KEY,
-            "sign": cancel_sign,
-            "nonce": cancel_nonce,
-            "timestamp": cancel_ts,
-            "Content-Type": "application/json"
-        }
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                cancel_response = await client.post(
-                    f"{BASE_URL}/api/v1/futures/trade/cancel_orders",
-                    headers=cancel_headers,
-                    content=cancel_body
-                )
-                cancel_response.raise_for_status()
-                logger.info(
-                    f"[ORDER CANCEL SUCCESS] {symbol}: {cancel_list} {cancel_response.json()}",
-                    extra=log_extra,
-                )
-        except httpx.RequestError as e:
+            cancel_response = await bitunix_request(
+                "post",
+                "/api/v1/futures/trade/cancel_orders",
+                body=cancel_payload,
+                priority=PRIORITY_ORDER,
+                retry=CLOSE_POLICY
+            )
+            cancel_response.raise_for_status()
+            order_book.remove_orders(symbol, [o["orderId"] for o in cancel_list])
+            logger.info(
+                f"[ORDER CANCEL SUCCESS] {symbol}: {cancel_list} {cancel_response.json()}",
+                extra=log_extra,
+            )
+        except httpx.HTTPError as e:
             logger.error(f"[ORDER CANCEL FAILED] {e}", extra=log_extra)
             if isinstance(e, httpx.HTTPStatusError) and e.response is not None:
                 logger.error(f"[ORDER CANCEL FAILED] Response: {e.response.text}", extra=log_extra)
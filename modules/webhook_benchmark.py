@@ -0,0 +1,213 @@
+"""
+Webhook load test against a running bot wired to the exchange simulator.
+
+Fires a seeded burst of TradingView-style alerts at ``/webhook/<symbol>``
+(many symbols, mixed intervals, duplicates and reversals), then reads the
+simulator journal and the bot's ``/debug/metrics`` to report latency
+percentiles, event-loop lag and rejection counts. Results are written as
+JSON so runs on different commits can be compared.
+
+Usage::
+
+    python -m modules.exchange_simulator --port 9000 &
+    BITUNIX_BASE_URL=http://127.0.0.1:9000 BITUNIX_WS_URL=ws://127.0.0.1:9000/private/ python app.py &
+    python -m modules.webhook_benchmark --signals 300 --symbols 20 --out bench.json
+    python -m modules.webhook_benchmark --compare baseline.json bench.json
+
+``time_to_order`` includes the bar-close wait done by ``is_false_signal`` for
+SELL (and 3m) signals; use BUY-only runs (``--sell-ratio 0``) to isolate the
+pipeline itself.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+
+import httpx
+
+from modules.metrics import summarize
+
+INTERVALS = ["5m", "15m", "1h"]
+
+
+def build_message(direction: str, price: float) -> str:
+    sign = 1 if direction == "BUY" else -1
+    step = price * 0.004
+    tps = "\n".join(f"TP{i}: {price + sign * step * i:.6f}" for i in range(1, 5))
+    return (
+        f"{'LONG' if direction == 'BUY' else 'SHORT'} Signal\n"
+        f"Entry Price: {price:.6f}\n"
+        f"Stop Loss: {price - sign * step * 2:.6f}\n"
+        f"{tps}\n"
+        f"Accumulation Zone: {price - sign * step * 0.5:.6f} - {price - sign * step:.6f}"
+    )
+
+
+def build_plan(args, prices: dict) -> list:
+    rng = random.Random(args.seed)
+    symbols = list(prices)
+    plan = []
+    for _ in range(args.signals):
+        roll = rng.random()
+        if plan and roll < args.duplicate_ratio:
+            plan.append({**rng.choice(plan), "kind": "duplicate"})
+            continue
+        if plan and roll < args.duplicate_ratio + args.reversal_ratio:
+            base = rng.choice(plan)
+            later = INTERVALS[INTERVALS.index(base["interval"]):] if base["interval"] in INTERVALS \
+                else [base["interval"]]
+            direction = "SELL" if base["direction"] == "BUY" else "BUY"
+            symbol, interval, kind = base["symbol"], rng.choice(later), "reversal"
+        else:
+            symbol, interval, kind = rng.choice(symbols), rng.choice(args.intervals), "new"
+            direction = "SELL" if rng.random() < args.sell_ratio else "BUY"
+        plan.append({
+            "symbol": symbol,
+            "interval": interval,
+            "direction": direction,
+            "kind": kind,
+            "path": f"{symbol}_{args.qty:g}_{interval}",
+            "message": build_message(direction, prices[symbol]),
+        })
+    return plan
+
+
+async def fire(client: httpx.AsyncClient, bot_url: str, signal: dict, sem: asyncio.Semaphore) -> dict:
+    async with sem:
+        sent = time.time()
+        started = time.perf_counter()
+        try:
+            resp = await client.post(f"{bot_url}/webhook/{signal['path']}",
+                                     json={"message": signal["message"], "alert_name": "benchmark"})
+            status = resp.status_code
+        except httpx.HTTPError as e:
+            status = f"error:{type(e).__name__}"
+        return {**signal, "sent": sent, "response_sec": time.perf_counter() - started, "status": status}
+
+
+def first_after(events: list, ts: float, match) -> float | None:
+    for event in events:
+        if event["ts"] >= ts and match(event):
+            return event["ts"] - ts
+    return None
+
+
+def _ms(summary: dict) -> dict:
+    return {k: (round(v * 1000, 3) if k != "count" else v) for k, v in summary.items()}
+
+
+async def run_benchmark(args) -> dict:
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        symbols = [f"BENCH{i}USDT" for i in range(args.symbols)]
+        tickers = (await client.get(f"{args.sim_url}/api/v1/futures/market/tickers",
+                                    params={"symbols": ",".join(symbols)})).json()["data"]
+        prices = {t["symbol"]: float(t["markPrice"]) for t in tickers}
+        plan = build_plan(args, prices)
+
+        await client.post(f"{args.bot_url}/debug/metrics/reset")
+        started = time.time()
+        sem = asyncio.Semaphore(args.concurrency)
+        results = await asyncio.gather(*(fire(client, args.bot_url, s, sem) for s in plan))
+        burst_sec = time.time() - started
+
+        await asyncio.sleep(args.settle)
+        journal = (await client.get(f"{args.sim_url}/sim/stats", params={"since": started})).json()["journal"]
+        bot_metrics = (await client.get(f"{args.bot_url}/debug/metrics")).json()
+
+    journal.sort(key=lambda e: e["ts"])
+    time_to_order, time_to_tpsl = [], []
+    for r in results:
+        if r["kind"] == "duplicate":
+            continue
+        order_delay = first_after(journal, r["sent"], lambda e: e["ch"] == "order" and e["symbol"] == r["symbol"]
+                                  and e["side"] == r["direction"] and e["type"] == "MARKET")
+        tpsl_delay = first_after(journal, r["sent"], lambda e: e["ch"] == "tpsl" and e["symbol"] == r["symbol"]
+                                 and e["event"] == "CREATE")
+        if order_delay is not None:
+            time_to_order.append(order_delay)
+        if tpsl_delay is not None:
+            time_to_tpsl.append(tpsl_delay)
+
+    lag = bot_metrics.get("timings", {}).get("event_loop_lag_seconds", {})
+    counters = bot_metrics.get("counters", {})
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.utcfromtimestamp(started).isoformat(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        },
+        "throughput": {"signals": len(results), "burst_sec": round(burst_sec, 3),
+                       "signals_per_sec": round(len(results) / burst_sec, 2) if burst_sec else 0.0},
+        "response_ms": _ms(summarize(r["response_sec"] for r in results)),
+        "time_to_order_ms": _ms(summarize(time_to_order)),
+        "time_to_tpsl_ms": _ms(summarize(time_to_tpsl)),
+        "event_loop_lag_ms": _ms({k: lag.get(k, 0.0) for k in ("count", "p50", "p95", "p99", "max")}),
+        "signals": {
+            "sent_by_kind": {k: sum(1 for r in results if r["kind"] == k) for k in ("new", "duplicate", "reversal")},
+            "http_status": {str(s): sum(1 for r in results if r["status"] == s) for s in {r["status"] for r in results}},
+            "rejected": {k: v for k, v in counters.items() if k.startswith("signals_rejected")},
+            "validated": {k: v for k, v in counters.items() if k.startswith("signals_validated")},
+            "orders_seen": len(time_to_order),
+            "tpsl_seen": len(time_to_tpsl),
+        },
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(baseline_path: str, current_path: str) -> str:
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    with open(current_path) as fh:
+        current = json.load(fh)
+    lines = [f"{baseline['meta']['commit']} -> {current['meta']['commit']}"]
+    for section in ("response_ms", "time_to_order_ms", "time_to_tpsl_ms", "event_loop_lag_ms"):
+        for pct in ("p50", "p95", "p99"):
+            old, new = baseline[section].get(pct, 0.0), current[section].get(pct, 0.0)
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            lines.append(f"{section:<20} {pct:<4} {old:>10.2f} {new:>10.2f} {change:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Webhook burst benchmark")
+    parser.add_argument("--bot-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--sim-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--signals", type=int, default=200)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--intervals", type=lambda v: v.split(","), default=INTERVALS)
+    parser.add_argument("--qty", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--reversal-ratio", type=float, default=0.1)
+    parser.add_argument("--sell-ratio", type=float, default=0.5)
+    parser.add_argument("--settle", type=float, default=30.0, help="Seconds to wait for orders after the burst")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare(*args.compare))
+        return
+
+    result = asyncio.run(run_benchmark(args))
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(result, fh, indent=2)
+    print(json.dumps({k: result[k] for k in ("throughput", "response_ms", "time_to_order_ms",
+                                              "time_to_tpsl_ms", "event_loop_lag_ms", "signals")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
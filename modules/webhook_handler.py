@@ -1,19 +1,26 @@
 import asyncio
 import time
 from datetime import datetime
+from functools import partial
 
 from quart import request, jsonify
 
+from modules import metrics
+from modules.config import TP_DISTRIBUTION
 from modules.logger_config import logger, error_logger, setup_asset_logging
 from modules.loss_tracking import is_daily_loss_limit_exceeded
-from modules.price_feed import validate_and_process_signal
 # from modules.postgres_state_manager import get_or_create_symbol_direction_state, update_position_state
+from modules.order_templates import order_templates
 from modules.redis_client import get_redis
 from modules.redis_state_manager import get_or_create_symbol_direction_state, \
                                         update_position_state, delete_position_state
-from modules.utils import parse_signal, place_order, is_duplicate_signal, maybe_reverse_position, \
-    evaluate_signal_received, get_order_detail
-from modules.signal_limiter import should_accept_signal
+from modules.utils import place_order, get_order_detail, parse_symbol_path, position_accepts_signal
+from modules.signal_parser import parse_signal
+from modules.signal_pipeline import run_signal_pipeline
+from modules.signal_queue import enqueue_signal, QueueFull
+from modules.retry_policy import make_client_id
+from modules.signal_scheduler import execution_gate, signal_priority
+from modules.circuit_breaker import entries_blocked
 
 
 async def clear_buffered_loss_keys(symbol: str, direction: str):
@@ -25,14 +32,175 @@ async def clear_buffered_loss_keys(symbol: str, direction: str):
 
 
 
+def _reject_if_degraded(signal: dict) -> bool:
+    """Degraded mode: no new entries while the exchange's trade endpoints or Redis are down."""
+    blocked_by = entries_blocked()
+    if blocked_by:
+        metrics.incr("signals_rejected", reason="degraded")
+        logger.warning(f"[DEGRADED] {signal['symbol']} {signal['direction']} rejected: {blocked_by} unavailable",
+                       extra={"symbol": signal["symbol"], "interval": signal["interval"]})
+    return bool(blocked_by)
+
+
+async def process_trade(signal: dict, market_qty_revised, trade_action):
+    symbol, direction, interval = signal["symbol"], signal["direction"], signal["interval"]
+    override_qty, parsed, signal_time = signal["override_qty"], signal["parsed"], signal["signal_time"]
+    entry = parsed["entry_price"]
+    log_extra_base = {"symbol": symbol, "interval": interval}
+
+    # A breaker may have opened while this signal waited for its bar close.
+    if _reject_if_degraded(signal):
+        return
+
+    # Duplicate lock and rate limit already ran in the filter pipeline (signal_pipeline).
+    # Create a new pending position or get a open position if exists.
+    trade_extra = {**log_extra_base, "direction": direction}
+    logger.info(
+        f"[PROCESS TRADE]: CREATE STATE - {symbol} {direction} {entry}",
+        extra=trade_extra,
+    )
+    state = await get_or_create_symbol_direction_state(symbol, direction)
+    new_signal_sl = parsed["stop_loss"]
+    if position_accepts_signal(state, new_signal_sl, direction, trade_action):
+        order_templates.prepare(symbol)
+
+        state["tps"] = parsed["take_profits"]
+        state["entry_price"] = parsed["entry_price"]
+        state["step"] = 0
+        state["qty_distribution"] = list(TP_DISTRIBUTION)
+        state["stop_loss"] = new_signal_sl
+        state["created_at"] = datetime.utcnow().isoformat()
+        state["interval"] = interval
+        state["signal_time"] = signal_time
+        state["trade_action"] = trade_action
+        state["revised_qty"] = market_qty_revised
+        # Track requested size separately until confirmed via websocket
+        state["pending_qty"] = market_qty_revised
+
+        zone_start, zone_bottom = parsed["accumulation_zone"]
+        logger.info(
+            f"[ACC ZONES]: {zone_start}: {zone_bottom}",
+            extra=trade_extra,
+        )
+        zone_middle = (zone_start + zone_bottom) / 2
+        # tp1 = parsed["take_profits"][0]
+        # sl = parsed["stop_loss"]
+
+        # market_qty = override_qty if override_qty else 10
+        logger.info(
+            f"[ORDER SUBMIT] Market order: symbol={symbol}, direction={direction}, "
+            f"price={entry}, qty_revised={market_qty_revised} base_qty={override_qty}",
+            extra=trade_extra,
+        )
+        logger.info(
+            f"[TEST TRACE] Reverse? {state}, Revised Qty: {market_qty_revised}",
+            extra=trade_extra,
+        )
+        state["order_type"] = "market"
+        position_id = state.get("position_id", "")
+        await update_position_state(symbol, direction, position_id, state)
+        # Retries happen inside place_order under ORDER_POLICY with this clientId, and a replayed
+        # queue entry derives the same ids, so neither can open the position twice.
+        response = await place_order(
+            symbol=symbol,
+            side=direction,
+            price=entry,
+            qty=market_qty_revised,
+            order_type="MARKET",
+            private=True,
+            client_id=make_client_id(symbol, direction, signal_time.isoformat(), "market")
+        )
+        if response and response.get("code", -1) == 0:
+            metrics.observe("signal_to_order_seconds",
+                            (datetime.utcnow() - signal_time).total_seconds(), interval=interval)
+            order_id = response.get("data", {}).get("order_id")
+            if order_id:
+                state["entry_price"] = await get_order_detail(order_id)
+            await update_position_state(symbol, direction, position_id, state)
+            # logger.info(f"[LOSS TRACKING] Awaiting TP or SL to update net P&L for {symbol}")
+            logger.info(f"[TEST TRACE] ORDER RESPONSE: {response}", extra=trade_extra)
+        else:
+            error_logger.error(
+                f"[ORDER FAILURE] symbol={symbol}, direction={direction}, response={response}")
+        if market_qty_revised <= override_qty:
+            logger.info(
+                f"[ORDER SUBMIT] Limit order 1: symbol={symbol}, direction={direction}, "
+                f"price={zone_start}, qty={market_qty_revised or 10}",
+                extra=trade_extra,
+            )
+            await place_order(symbol=symbol, side=direction, price=zone_start, qty=market_qty_revised or 10,
+                              order_type="LIMIT",
+                              client_id=make_client_id(symbol, direction, signal_time.isoformat(), "limit1"))
+
+            logger.info(
+                f"[ORDER SUBMIT] Limit order 2: symbol={symbol}, direction={direction}, "
+                f"price={zone_middle}, qty={market_qty_revised or 10}",
+                extra=trade_extra,
+            )
+            await place_order(symbol=symbol, side=direction, price=zone_middle, qty=market_qty_revised or 10,
+                              order_type="LIMIT",
+                              client_id=make_client_id(symbol, direction, signal_time.isoformat(), "limit2"))
+
+            bottom_qty = (market_qty_revised * 2 if market_qty_revised else 20)
+            logger.info(
+                f"[ORDER SUBMIT] Limit order 3: symbol={symbol}, direction={direction}, "
+                f"price={zone_bottom}, qty={bottom_qty}",
+                extra=trade_extra,
+            )
+            await place_order(symbol=symbol, side=direction, price=zone_bottom, qty=bottom_qty, order_type="LIMIT",
+                              client_id=make_client_id(symbol, direction, signal_time.isoformat(), "limit3"))
+        else:
+            # Clear buffer keys used for reversal or uprade
+            await clear_buffered_loss_keys(symbol, direction)
+            # Submit only one limit order for reversal
+            bottom_qty = (market_qty_revised * 2 if market_qty_revised else 20)
+            logger.info(
+                f"[ORDER SUBMIT FOR REVERSAL] Limit order 3: symbol={symbol}, direction={direction}, "
+                f"price={zone_bottom}, qty={bottom_qty}",
+                extra=trade_extra,
+            )
+            await place_order(symbol=symbol, side=direction, price=zone_bottom, qty=bottom_qty, order_type="LIMIT",
+                              client_id=make_client_id(symbol, direction, signal_time.isoformat(), "limit3"))
+    else:
+        # await delete_position_state(symbol, direction)
+        metrics.incr("signals_rejected", reason="tp_stage")
+        logger.info(
+            f"[TRADE SKIP] {symbol} {direction} {interval}: existing position in TP stage",
+            extra=trade_extra,
+        )
+
+
+async def execute_trade(signal: dict, market_qty_revised, trade_action):
+    """Run process_trade once the execution gate admits this signal's priority class."""
+    priority, priority_class = signal_priority(trade_action, signal["interval"])
+    async with execution_gate.slot(priority, priority_class):
+        await process_trade(signal, market_qty_revised, trade_action)
+
+
+async def process_signal(signal: dict):
+    """Validate a queued signal and, if it passes, execute it via process_trade."""
+    setup_asset_logging(signal["symbol"])
+    await run_signal_pipeline(signal, partial(execute_trade, signal))
+
+
 async def webhook_handler(symbol):
+    started = time.perf_counter()
+    try:
+        return await _handle_webhook(symbol)
+    finally:
+        metrics.observe("webhook_response_seconds", time.perf_counter() - started)
+
+
+async def _handle_webhook(symbol):
     setup_asset_logging(symbol.upper())
     raw_data = await request.get_data(as_text=True)
     logger.info(f"Raw webhook data: {raw_data}")
     logger.info(f"Request headers: {dict(request.headers)}")
 
+    metrics.incr("signals_received")
     try:
-        if is_daily_loss_limit_exceeded():
+        if await is_daily_loss_limit_exceeded():
+            metrics.incr("signals_rejected", reason="daily_loss")
             logger.warning(
                 f"[MAX DAILY LOSS] {symbol.upper()} Blocking trades.",
                 extra={"symbol": symbol.upper()}
@@ -50,16 +218,7 @@ async def webhook_handler(symbol):
             alert_name = "unknown"
             payload_symbol = None
 
-        symbol_qty = (payload_symbol or symbol or "BTCUSDT").upper()
-        if "_" in symbol_qty:
-            parts = symbol_qty.split("_")
-            symbol = parts[0]
-            override_qty = float(parts[1]) if len(parts) > 1 else None
-            interval = parts[2].lower() if len(parts) > 2 else "1m"
-        else:
-            symbol = symbol_qty
-            override_qty = None
-            interval = "1m"
+        symbol, override_qty, interval = parse_symbol_path(payload_symbol or symbol or "BTCUSDT")
 
         log_extra_base = {"symbol": symbol, "interval": interval}
 
@@ -73,144 +232,36 @@ async def webhook_handler(symbol):
             extra=log_extra_base,
         )
 
-        parsed = parse_signal(message)
-        direction = parsed["direction"].upper()
+        parsed = parse_signal(data.get("signal") or message)
+        if not parsed.ok:
+            metrics.incr("signals_rejected", reason="parse_error")
+            logger.warning(f"[INVALID SIGNAL] {symbol} ({parsed.source}): {parsed.errors}", extra=log_extra_base)
+            return jsonify({"status": "invalid", "errors": parsed.errors}), 400
+        direction = parsed.direction
         signal_time = datetime.utcnow()
-        entry = parsed["entry_price"]
-
-        async def process_trade(market_qty_revised, trade_action):
-            # Create a new pending position or get a open position if exists.
-            if await is_duplicate_signal(symbol, direction):
-                logger.warning(
-                    f"[DUPLICATE] Signal skipped for {symbol}-{direction}",
-                    extra={**log_extra_base, "direction": direction},
-                )
-                return
 
-            if not await should_accept_signal(symbol, direction, interval):
-                return jsonify({"error": "Signal rate limit exceeded"})
-
-            trade_extra = {**log_extra_base, "direction": direction}
-            logger.info(
-                f"[PROCESS TRADE]: CREATE STATE - {symbol} {direction} {entry}",
-                extra=trade_extra,
-            )
-            state = await get_or_create_symbol_direction_state(symbol, direction)
-            position_status = state.get("status")
-            position_step = state.get("step")
-            position_sl = state.get("stop_loss")
-            new_signal_sl = parsed["stop_loss"]
-            position_existing_qty = state.get("total_qty",0)
-            sl_threshold = new_signal_sl <= position_sl if direction == "BUY" else new_signal_sl >= position_sl
-            if (position_step == 0 and position_status == "OPEN" and sl_threshold) \
-                    or position_status == "PENDING" or trade_action != "IGNORE":
-
-                state["tps"] = parsed["take_profits"]
-                state["entry_price"] = parsed["entry_price"]
-                state["step"] = 0
-                state["qty_distribution"] = [0.7, 0.1, 0.1, 0.1]
-                state["stop_loss"] = new_signal_sl
-                state["created_at"] = datetime.utcnow().isoformat()
-                state["interval"] = interval
-                state["signal_time"] = signal_time
-                state["trade_action"] = trade_action
-                state["revised_qty"] = market_qty_revised
-                # Track requested size separately until confirmed via websocket
-                state["pending_qty"] = market_qty_revised
-
-                zone_start, zone_bottom = parsed["accumulation_zone"]
-                logger.info(
-                    f"[ACC ZONES]: {zone_start}: {zone_bottom}",
-                    extra=trade_extra,
-                )
-                zone_middle = (zone_start + zone_bottom) / 2
-                # tp1 = parsed["take_profits"][0]
-                # sl = parsed["stop_loss"]
-
-                # market_qty = override_qty if override_qty else 10
-                logger.info(
-                    f"[ORDER SUBMIT] Market order: symbol={symbol}, direction={direction}, "
-                    f"price={entry}, qty_revised={market_qty_revised} base_qty={override_qty}",
-                    extra=trade_extra,
-                )
-                retries = 3
-
-                for attempt in range(retries):
-                    logger.info(
-                        f"[TEST TRACE] Reverse? {state}, Revised Qty: {market_qty_revised}",
-                        extra=trade_extra,
-                    )
-                    state["order_type"] = "market"
-                    position_id = state.get("position_id", "")
-                    await update_position_state(symbol, direction, position_id, state)
-                    response = await place_order(
-                        symbol=symbol,
-                        side=direction,
-                        price=entry,
-                        qty=market_qty_revised,
-                        order_type="MARKET",
-                        private=True
-                    )
-                    if response and response.get("code", -1) == 0:
-                        order_id = response.get("data", {}).get("order_id")
-                        if order_id:
-                            state["entry_price"] = await get_order_detail(order_id)
-                        await update_position_state(symbol, direction, position_id, state)
-                        # logger.info(f"[LOSS TRACKING] Awaiting TP or SL to update net P&L for {symbol}")
-                        logger.info(f"[TEST TRACE] ORDER RESPONSE: {response}", extra=trade_extra)
-                        break
-                    error_logger.error(
-                        f"[ORDER FAILURE] Attempt {attempt + 1}/{retries} - symbol={symbol}, \
-                            direction={direction}, response={response}")
-                    time.sleep(1)
-                if market_qty_revised <= override_qty:
-                    logger.info(
-                        f"[ORDER SUBMIT] Limit order 1: symbol={symbol}, direction={direction}, "
-                        f"price={zone_start}, qty={market_qty_revised or 10}",
-                        extra=trade_extra,
-                    )
-                    await place_order(symbol=symbol, side=direction, price=zone_start, qty=market_qty_revised or 10,
-                                      order_type="LIMIT")
-
-                    logger.info(
-                        f"[ORDER SUBMIT] Limit order 2: symbol={symbol}, direction={direction}, "
-                        f"price={zone_middle}, qty={market_qty_revised or 10}",
-                        extra=trade_extra,
-                    )
-                    await place_order(symbol=symbol, side=direction, price=zone_middle, qty=market_qty_revised or 10,
-                                      order_type="LIMIT")
-
-                    bottom_qty = (market_qty_revised * 2 if market_qty_revised else 20)
-                    logger.info(
-                        f"[ORDER SUBMIT] Limit order 3: symbol={symbol}, direction={direction}, "
-                        f"price={zone_bottom}, qty={bottom_qty}",
-                        extra=trade_extra,
-                    )
-                    await place_order(symbol=symbol, side=direction, price=zone_bottom, qty=bottom_qty, order_type="LIMIT")
-                else:
-                    # Clear buffer keys used for reversal or uprade
-                    await clear_buffered_loss_keys(symbol, direction)
-                    # Submit only one limit order for reversal
-                    bottom_qty = (market_qty_revised * 2 if market_qty_revised else 20)
-                    logger.info(
-                        f"[ORDER SUBMIT FOR REVERSAL] Limit order 3: symbol={symbol}, direction={direction}, "
-                        f"price={zone_bottom}, qty={bottom_qty}",
-                        extra=trade_extra,
-                    )
-                    await place_order(symbol=symbol, side=direction, price=zone_bottom, qty=bottom_qty, order_type="LIMIT")
-            else:
-                # await delete_position_state(symbol, direction)
-                logger.info(
-                    f"[TRADE SKIP] {symbol} {direction} {interval}: existing position in TP stage",
-                    extra=trade_extra,
-                )
-
-        async def wrapped_process():
-            await validate_and_process_signal(
-                symbol, entry, direction, interval, signal_time, override_qty,  process_trade
-            )
-
-        asyncio.create_task(wrapped_process())
+        signal = {
+            "symbol": symbol,
+            "interval": interval,
+            "override_qty": override_qty,
+            "direction": direction,
+            "signal_time": signal_time,
+            "alert_name": alert_name,
+            "parsed": parsed.as_dict(),
+        }
+        if _reject_if_degraded(signal):
+            return jsonify({"status": "degraded", "message": "Exchange or Redis unavailable"}), 503
+        try:
+            await enqueue_signal(signal)
+        except QueueFull as e:
+            metrics.incr("signals_rejected", reason="backlog")
+            logger.warning(f"[SIGNAL QUEUE FULL] {symbol} {direction} refused: {e}", extra=log_extra_base)
+            return jsonify({"status": "busy", "message": "Signal backlog full"}), 503
+        except Exception as e:
+            # Redis unavailable: better to run it in-process (not durable) than to drop it.
+            logger.error(f"[SIGNAL QUEUE ERROR] {e}; processing {symbol} {direction} in-process",
+                         extra=log_extra_base)
+            asyncio.create_task(process_signal(signal))
 
         return jsonify({
             "status": "parsed",
@@ -1,4 +1,3 @@
-import asyncio
 import hashlib
 import json
 import random
@@ -6,21 +5,23 @@ import string
 import time
 from datetime import datetime
 
-import websockets
-
-from modules.config import API_KEY, API_SECRET
+from modules.bracket_manager import bracket_manager
+from modules.config import API_KEY, API_SECRET, WS_URL
 from modules.logger_config import logger, setup_asset_logging
 from modules.loss_tracking import log_profit_loss
+from modules.order_book import order_book
+from modules.orphan_position_checker import mark_dirty
+from modules.postgres_state_manager import call_postgres
+from modules.price_feed import on_price_message
+from modules.ws_manager import WsConnection, ws_manager
+from modules.ws_resync import is_replayed, resync_positions
 # from modules.state import position_state, save_position_state, get_or_create_symbol_direction_state
 from modules.redis_state_manager import get_or_create_symbol_direction_state, \
     update_position_state, delete_position_state
 from modules.redis_client import get_redis
 # from modules.postgres_state_manager import get_or_create_symbol_direction_state, update_position_state
-from modules.utils import place_tp_sl_order_async, cancel_all_new_orders, \
-    modify_tp_sl_order_async, update_tp_quantity, update_sl_price, reduce_buffer_loss
+from modules.utils import reduce_buffer_loss
 
-# TP distribution: 70% for TP1, 10% each for TP2–TP4
-TP_DISTRIBUTION = [0.7, 0.1, 0.1, 0.1]
 INTERVAL_MINUTES = {"1m": 1, "3m": 3, "5m": 5, "15m": 15, "1h": 60, "4h": 240}
 
 __all__ = ["start_websocket_listener"]
@@ -38,77 +39,71 @@ def generate_nonce(length=32):
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
 
-async def send_heartbeat(websocket):
-    while True:
-        await websocket.send(json.dumps({"op": "ping", "ping": int(time.time())}))
-        await asyncio.sleep(20)
-
-
-async def listen_and_process(ws_url):
+async def _private_open(websocket, gap_started):
+    """Log in and subscribe, then bring the order book and position states up to date."""
     nonce = generate_nonce()
     sign, timestamp = generate_signature(API_KEY, API_SECRET, nonce)
-    async with websockets.connect(ws_url, ping_interval=None) as websocket:
-        logger.info("WS launched")
-        connect_msg = await websocket.recv()
-        logger.info(f"[WS CONNECT] {connect_msg}")
+    login_request = {
+        "op": "login",
+        "args": [
+            {
+                "apiKey": API_KEY,
+                "timestamp": timestamp,
+                "nonce": nonce,
+                "sign": sign,
+            }
+        ],
+    }
+    await websocket.send(json.dumps(login_request))
+    await websocket.recv()
 
-        login_request = {
-            "op": "login",
-            "args": [
-                {
-                    "apiKey": API_KEY,
-                    "timestamp": timestamp,
-                    "nonce": nonce,
-                    "sign": sign,
-                }
-            ],
-        }
-        await websocket.send(json.dumps(login_request))
-        await websocket.recv()
-        heartbeat_task = asyncio.create_task(send_heartbeat(websocket))
+    subscribe_request = {
+        "op": "subscribe",
+        "args": [
+            {"ch": "order"},
+            {"ch": "position"},
+            {"ch": "tpsl"}
+        ]
+    }
+    await websocket.send(json.dumps(subscribe_request))
+    # Events arriving meanwhile wait in the socket and are applied on top of the snapshot.
+    await order_book.seed()
+    try:
+        await resync_positions(handle_ws_message, gap_started)
+    except Exception as e:
+        logger.error(f"[WS RESYNC] Failed, leaving the gap to the reconciler: {e}")
 
-        subscribe_request = {
-            "op": "subscribe",
-            "args": [
-                {"ch": "order"},
-                {"ch": "position"},
-                {"ch": "tpsl"}
-            ]
-        }
-        await websocket.send(json.dumps(subscribe_request))
 
-        while True:
-            try:
-                message = await websocket.recv()
-                # logger.info(f"[WS MESSAGE] {message}")
-                await handle_ws_message(message)
-            except websockets.exceptions.ConnectionClosedError as e:
-                logger.warning(f"[WS] Connection closed unexpectedly: {e}")
-                heartbeat_task.cancel()
-                try:
-                    await heartbeat_task
-                except asyncio.CancelledError:
-                    logger.info("[WS] Heartbeat task cancelled cleanly")
-                raise
-            except Exception as e:
-                logger.error(f"[WS MESSAGE ERROR] {e}")
+async def start_websocket_listener():
+    # First connect resyncs too: the previous leader may have died mid-gap.
+    ws_manager.on_public("price", on_price_message)
+    private = WsConnection("private", WS_URL, handle_ws_message, private=True,
+                           on_open=_private_open, on_close=order_book.invalidate)
+    await ws_manager.run(private)
 
 
-async def start_websocket_listener():
-    ws_url = "wss://fapi.bitunix.com/private/"
-    while True:
-        try:
-            await listen_and_process(ws_url)
-        except Exception as outer_e:
-            logger.error(f"[WS CONNECTION ERROR] {outer_e}")
-            logger.info("Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
+async def _watch_price(symbol: str, position_event: str):
+    """Stream mark prices while ``symbol`` has an open position in either direction."""
+    try:
+        if position_event != "CLOSE":
+            await ws_manager.subscribe(symbol)
+        elif not [key async for key in get_redis().scan_iter(match=f"position_state:{symbol}:*")]:
+            await ws_manager.unsubscribe(symbol)
+    except Exception as e:
+        logger.warning(f"[WS MANAGER] Price subscription update failed for {symbol}: {e}")
 
 
 async def handle_ws_message(message):
     try:
         data = json.loads(message)
         topic = data.get("ch")
+        payload = data.get("data")
+        event_symbol = payload.get("symbol") if isinstance(payload, dict) else None
+        if topic in ("order", "position", "tpsl") and event_symbol:
+            order_book.apply(topic, payload)
+            await mark_dirty(event_symbol)
+            if is_replayed(topic, payload):
+                return
 
         if topic == "position":
             pos_event = data.get("data", {})
@@ -136,6 +131,7 @@ async def handle_ws_message(message):
             except Exception:
                 ctime = datetime.utcnow()
             log_date = ctime.strftime("%Y-%m-%d")
+            ws_extra = {"symbol": symbol, "direction": direction, "interval": state.get("interval", "")}
             if position_event == "OPEN":
                 position_id = pos_event.get("positionId")
                 avg_entry = state.get("entry_price", 0)
@@ -148,32 +144,11 @@ async def handle_ws_message(message):
                 state["order_type"] = "limit"
                 logger.info(
                     f"[WEBSOCKET_HANDLER]: position_event: {position_event} avg_entry: {avg_entry} old_qty: {old_qty}")
-                sl_price = state["stop_loss"]
-                logger.info(f"[INITIAL SL SET] {symbol} {direction} SL {sl_price}, Qty: {new_qty}")
-                sl_order_id = await place_tp_sl_order_async(symbol, tp_price=None, sl_price=sl_price,
-                                                            position_id=position_id, tp_qty=None, qty=new_qty)
-                if sl_order_id:
-                    state["sl_order_id"] = sl_order_id
-                for i in range(0, 4):
-                    tp_price = tps[i]
-                    tp_ratio = TP_DISTRIBUTION[i]
-                    tp_qty = round(new_qty * tp_ratio, 3)
-                    logger.info(f"[INITIAL TP/SL SET] {symbol} {direction} TP{i + 1} {tp_price}, tpQty: {tp_qty}")
-                    if tp_price:
-                        order_id = await place_tp_sl_order_async(symbol, tp_price=tp_price, sl_price=None,
-                                                                 position_id=position_id, tp_qty=tp_qty, qty=new_qty)
-                        if order_id:
-                            state.setdefault("tp_orders", {})[f"TP{i + 1}"] = order_id
-                    else:
-                        logger.info(
-                            f"[INITIAL TP/SL NOT SET FOR]: {symbol} {direction} TP{i} {tp_price}, tpQty: {tp_qty}")
+                logger.info(f"[INITIAL TP/SL SET] {symbol} {direction} SL {state['stop_loss']} TPs {tps}, "
+                            f"Qty: {new_qty}")
+                await bracket_manager.open(symbol, direction, position_id, state, new_qty)
 
                 pending_qty = state.get("pending_qty", 0)
-                ws_extra = {
-                    "symbol": symbol,
-                    "direction": direction,
-                    "interval": state.get("interval", "")
-                }
                 logger.info(
                     f"[POSITION OPEN] old_qty={old_qty} new_qty={new_qty} pending_qty={pending_qty}",
                     extra=ws_extra,
@@ -184,42 +159,16 @@ async def handle_ws_message(message):
 
             # New logic: if position qty increases after step > 0, update TP/SL
             if position_event == "UPDATE" and new_qty > old_qty:
-                tp_acc_zone_id = state.get("tp_acc_zone_id")
-                trade_action = state.get("trade_action").lower()
+                # Rebuilt states have no trade_action.
+                trade_action = (state.get("trade_action") or "").lower()
                 order_type = state.get("order_type", "market")
-                revised_qty = state.get("revised_qty", 0)
-                acc_qty = new_qty - revised_qty
                 logger.info(
                     f"[POSITION UPDATE] {symbol} {direction} action={trade_action} order_type={order_type}",
-                    extra={"symbol": symbol, "direction": direction, "interval": state.get("interval", "")},
+                    extra=ws_extra,
                 )
-                if order_type == "market":
-                    for tp_label, order_id in state["tp_orders"].items():
-                        step_index = int(tp_label.replace("TP", "")) - 1
-                        tp_price = state["tps"][step_index]
-                        tp_qty = round(new_qty * TP_DISTRIBUTION[step_index], 3)
-                        logger.info(
-                            f"[TP/SL UPDATED ON QTY INCREASE] {symbol} {direction} Step {step_index} TP: {tp_price}, TPQty: {tp_qty}")
-                        await update_tp_quantity(order_id, symbol, tp_qty, tp_price)
-                    state["order_type"] = "limit"
-                else:
-                    if not tp_acc_zone_id:
-                        logger.info(
-                                f"[TP/SL OPEN FOR ACC ENTRIES] {symbol} {direction} TP: {avg_entry}, TPQty: {new_qty}")
-                        order_id = await place_tp_sl_order_async(symbol, tp_price=avg_entry, sl_price=None,
-                                                      position_id=position_id, tp_qty=acc_qty, qty=new_qty)
-                        if order_id:
-                            state.setdefault("tp_acc_zone_id", order_id)
-                    else:
-                        logger.info(
-                            f"[TP/SL UPDATE FOR ACC ENTRIES] {symbol} {direction} TP: {avg_entry}, TPQty: {new_qty}")
-                        await update_tp_quantity(tp_acc_zone_id, symbol, acc_qty, avg_entry)
-                    limit_order_qty = new_qty - old_qty
-                    state["limit_order_qty"] = limit_order_qty
-
-                sl_order_id = state.get("sl_order_id")
-                sl_price = state["stop_loss"]
-                await update_sl_price(sl_order_id, direction, symbol, sl_price, new_qty)
+                if order_type != "market":
+                    state["limit_order_qty"] = new_qty - old_qty
+                await bracket_manager.scale_in(symbol, direction, position_id, state, new_qty)
                 pending_qty = state.get("pending_qty", 0)
                 logger.info(
                     f"[POSITION UPDATE] old_qty={old_qty} new_qty={new_qty} pending_qty={pending_qty}",
@@ -259,12 +208,13 @@ async def handle_ws_message(message):
                     )
 
                 try:
-                    await cancel_all_new_orders(symbol, direction)
+                    await bracket_manager.close(symbol, direction, position_id, state)
                     await update_position_state(symbol, direction, position_id, {
                         "status": "CLOSED"
                     })
                     await delete_position_state(symbol, direction, position_id)
-                    log_profit_loss(
+                    await call_postgres(
+                        log_profit_loss,
                         symbol,
                         direction,
                         str(position_id),
@@ -278,6 +228,7 @@ async def handle_ws_message(message):
                         f"[CANCEL LIMIT ORDERS FAILED] {cancel_err}",
                         extra={"symbol": symbol, "direction": direction, "interval": interval},
                     )
+            await _watch_price(symbol, position_event)
         elif topic == "tpsl":
             # This flow handles only take profit event.
             try:
@@ -308,22 +259,14 @@ async def handle_ws_message(message):
                         f"[TP/SL EVENT] Processing event: {tp_data} with status: {status}",
                         extra={"symbol": symbol, "direction": position_direction, "interval": interval},
                     )
-                tp_acc_zone_id = state.get("tp_acc_zone_id")
-                if tp_acc_zone_id and tp_acc_zone_id != "":
-                    try:
-                        await cancel_all_new_orders(symbol, position_direction)
-                        logger.info(
-                            f"[TP ACC EVENT] Canceled limit order: {tp_data} with status: {status}",
-                            extra={"symbol": symbol, "direction": position_direction, "interval": interval},
-                        )
-                        state["tp_acc_zone_id"] = ""
-                        await update_position_state(symbol, position_direction, position_id, state)
-                        return
-                    except Exception as cancel_err:
-                        logger.error(
-                            f"[CANCEL LIMIT ORDERS FAILED] {cancel_err}",
-                            extra={"symbol": symbol, "direction": position_direction, "interval": interval},
-                        )
+                if state.get("tp_acc_zone_id"):
+                    logger.info(
+                        f"[TP ACC EVENT] Accumulation TP filled: {tp_data} with status: {status}",
+                        extra={"symbol": symbol, "direction": position_direction, "interval": interval},
+                    )
+                    await bracket_manager.acc_hit(symbol, position_direction, position_id, state)
+                    await update_position_state(symbol, position_direction, position_id, state)
+                    return
                 tps = state.get("tps", [])
                 step = state.get("step", 0)
                 try:
@@ -358,52 +301,11 @@ async def handle_ws_message(message):
                     )
                 # logger.info(f"[TPSL EVENT]: {tp_data}")
 
-                tps = state.get("tps", [])
-                step = state.get("step", 0)
-                old_qty = float(state.get("total_qty", 0))
-                # tp_qty_triggered = float(tp_data.get("tpQty"))
-                next_step = step + 1
-                triggered_qty = sum(TP_DISTRIBUTION[:next_step]) * old_qty
-                new_qty = round(old_qty - triggered_qty, 3)
-                trigger_price = float(tps[step])
-                entry = float(state.get("entry_price", 0))
                 logger.info(
                     f"[TP SL INFO]:{state}",
                     extra={"symbol": symbol, "direction": position_direction, "interval": interval},
                 )
-
-                try:
-                    if step == 0 and entry != 0:
-                        if position_direction == "BUY":
-                            new_sl = entry - (3 / 7) * ((trigger_price - entry) * 0.2)
-                        else:
-                            new_sl = entry + (3 / 7) * ((entry - trigger_price) * 0.2)
-                    else:
-                        new_sl = tps[step - 1]
-                except Exception as e:
-                    logger.info(
-                        f"[TP LEVEL 1 Beakeven calculation error]",
-                        extra={"symbol": symbol, "direction": position_direction, "interval": interval},
-                    )
-                    new_sl = float(state.get("entry_price")) if step == 0 else tps[max(step - 1, 0)]
-
-                logger.info(
-                    f"[BREAKEVEN SL] {symbol} {position_direction} step={step} → SL={new_sl}",
-                    extra={"symbol": symbol, "direction": position_direction, "interval": interval},
-                )
-
-                if step == 0:
-                    try:
-                        await cancel_all_new_orders(symbol, position_direction)
-                    except Exception as cancel_err:
-                        logger.error(
-                            f"[CANCEL LIMIT ORDERS FAILED] {cancel_err}",
-                            extra={"symbol": symbol, "direction": position_direction, "interval": interval},
-                        )
-                order_id = state.get("sl_order_id")
-                await update_sl_price(order_id, position_direction, symbol, new_sl, new_qty)
-                state["step"] = next_step
-                # state["total_qty"] = new_qty
+                await bracket_manager.tp_hit(symbol, position_direction, position_id, state)
                 await update_position_state(symbol, position_direction, position_id, state)
             except Exception as e:
                 logger.error(
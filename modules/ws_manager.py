@@ -0,0 +1,267 @@
+"""
+Bitunix WebSocket connections: one private connection plus sharded public ones.
+
+The private connection (order/position/TP-SL events) handles every message
+inline, in order, exactly as the listener always has. Public market-data
+subscriptions are spread over as many connections as needed, at most
+``WS_PUBLIC_MAX_SUBS`` each, always filling the least loaded one first.
+
+Each connection reconnects on its own with exponential backoff, so a public
+socket dropping never touches the private one. Public messages go into a
+bounded per-connection queue drained by a separate task that yields to the loop
+regularly, so a noisy symbol cannot hold up a fill: when the queue is full the
+oldest market tick is dropped, since only the latest one matters.
+
+Per connection we record message counts, rate, exchange-to-receipt lag,
+reconnects and drops (``ws_*`` metrics and ``/debug/ws``).
+"""
+import asyncio
+import itertools
+import json
+import random
+import time
+
+import websockets
+
+from modules import metrics
+from modules.config import WS_PUBLIC_URL, WS_PUBLIC_MAX_SUBS, WS_PUBLIC_QUEUE_SIZE, \
+    WS_RECONNECT_BASE_SEC, WS_RECONNECT_MAX_SEC
+from modules.logger_config import logger
+
+HEARTBEAT_SEC = 20
+RATE_WINDOW_SEC = 10
+PUBLIC_YIELD_EVERY = 50  # public messages handled before giving the loop back to the private connection
+
+
+async def send_heartbeat(websocket):
+    # Sleep first so the first ping cannot be mistaken for the login reply.
+    while True:
+        await asyncio.sleep(HEARTBEAT_SEC)
+        await websocket.send(json.dumps({"op": "ping", "ping": int(time.time())}))
+
+
+class WsConnection:
+    """
+    One WebSocket with its own reconnect loop.
+
+    ``handler`` gets the raw message on a private connection (awaited inline)
+    and the decoded dict on a public one (called from the drain task).
+    ``on_open(websocket, gap_started)`` runs after connect, before any message
+    is read; ``on_close()`` runs whenever the socket goes away.
+    """
+
+    def __init__(self, name: str, url: str, handler, private: bool = False, on_open=None, on_close=None):
+        self.name = name
+        self.url = url
+        self.handler = handler
+        self.private = private
+        self.on_open = on_open
+        self.on_close = on_close
+        self.subscriptions = set()  # (channel, symbol), re-sent on every reconnect
+        self.websocket = None
+        self.task = None
+        self.queue = None if private else asyncio.Queue(maxsize=WS_PUBLIC_QUEUE_SIZE)
+        self.failures = 0
+        self.gap_started = None
+        self.reconnects = 0
+        self.messages = 0
+        self.dropped = 0
+        self.rate = 0.0
+        self.last_message_at = None
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket is not None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def run(self):
+        drain_task = None if self.private else asyncio.create_task(self._drain())
+        try:
+            while True:
+                try:
+                    await self._session()
+                except websockets.exceptions.ConnectionClosed as e:
+                    logger.warning(f"[WS {self.name}] Connection closed unexpectedly: {e}")
+                except Exception as e:
+                    logger.error(f"[WS {self.name}] Connection error: {e}")
+                finally:
+                    self.websocket = None
+                    if self.on_close:
+                        self.on_close()
+                self.gap_started = self.gap_started or time.monotonic()
+                self.reconnects += 1
+                metrics.incr("ws_reconnects", conn=self.name)
+                delay = random.uniform(0, min(WS_RECONNECT_MAX_SEC, WS_RECONNECT_BASE_SEC * 2 ** self.failures))
+                self.failures += 1
+                logger.info(f"[WS {self.name}] Reconnecting in {delay:.1f} seconds (attempt {self.failures})...")
+                await asyncio.sleep(delay)
+        finally:
+            if drain_task:
+                drain_task.cancel()
+
+    async def _session(self):
+        async with websockets.connect(self.url, ping_interval=None) as websocket:
+            connect_msg = await websocket.recv()
+            logger.info(f"[WS {self.name}] Connected: {connect_msg}")
+            heartbeat_task = asyncio.create_task(send_heartbeat(websocket))
+            try:
+                if self.on_open:
+                    await self.on_open(websocket, self.gap_started)
+                self.websocket = websocket
+                if self.subscriptions:
+                    await self._send_op(websocket, "subscribe", list(self.subscriptions))
+                self.failures = 0
+                self.gap_started = None
+                async for message in websocket:
+                    self._receive(message)
+                    if self.private:
+                        try:
+                            await self.handler(message)
+                        except Exception as e:
+                            logger.error(f"[WS MESSAGE ERROR] {e}")
+            finally:
+                heartbeat_task.cancel()
+
+    def _receive(self, message):
+        now = time.monotonic()
+        self.messages += 1
+        self.last_message_at = now
+        self._window_count += 1
+        metrics.incr("ws_messages", conn=self.name)
+        if now - self._window_start >= RATE_WINDOW_SEC:
+            self.rate = self._window_count / (now - self._window_start)
+            metrics.set_gauge("ws_message_rate", self.rate, conn=self.name)
+            self._window_start, self._window_count = now, 0
+
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("ts"):
+            metrics.observe("ws_lag_ms", time.time() * 1000 - float(data["ts"]), conn=self.name)
+        if self.private or data.get("op"):
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            metrics.incr("ws_messages_dropped", conn=self.name)
+        self.queue.put_nowait(data)
+
+    async def _drain(self):
+        handled = 0
+        while True:
+            data = await self.queue.get()
+            try:
+                self.handler(data)
+            except Exception as e:
+                logger.error(f"[WS {self.name}] Handler error: {e}")
+            handled += 1
+            if handled % PUBLIC_YIELD_EVERY == 0:
+                metrics.set_gauge("ws_queue_depth", self.queue.qsize(), conn=self.name)
+                await asyncio.sleep(0)
+
+    async def _send_op(self, websocket, op: str, subscriptions):
+        args = [{"symbol": symbol, "ch": channel} for channel, symbol in subscriptions]
+        await websocket.send(json.dumps({"op": op, "args": args}))
+
+    async def update(self, op: str, subscriptions):
+        """Send a (un)subscribe now if connected; otherwise the next connect picks it up."""
+        if self.websocket is not None:
+            try:
+                await self._send_op(self.websocket, op, subscriptions)
+            except Exception as e:
+                logger.warning(f"[WS {self.name}] {op} deferred to reconnect: {e}")
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "subscriptions": len(self.subscriptions) if not self.private else None,
+            "messages": self.messages,
+            "rate_per_sec": round(self.rate, 2),
+            "last_message_age_sec": round(time.monotonic() - self.last_message_at, 3)
+            if self.last_message_at else None,
+            "reconnects": self.reconnects,
+            "queue_depth": self.queue.qsize() if self.queue else None,
+            "dropped": self.dropped,
+        }
+
+
+class WsManager:
+    def __init__(self):
+        self.private = None
+        self.public = []
+        self.channel_handlers = {}
+        self.running = False
+        self._ids = itertools.count()
+
+    def on_public(self, channel: str, handler):
+        """Register a plain (non-async) function for public messages on ``channel``."""
+        self.channel_handlers[channel] = handler
+
+    def _dispatch(self, data: dict):
+        handler = self.channel_handlers.get(data.get("ch"))
+        if handler:
+            handler(data)
+
+    async def subscribe(self, symbol: str, channel: str = "price"):
+        key = (channel, symbol.upper())
+        if any(key in conn.subscriptions for conn in self.public):
+            return
+        open_conns = [conn for conn in self.public if len(conn.subscriptions) < WS_PUBLIC_MAX_SUBS]
+        if open_conns:
+            conn = min(open_conns, key=lambda c: len(c.subscriptions))
+        else:
+            conn = WsConnection(f"public-{next(self._ids)}", WS_PUBLIC_URL, self._dispatch)
+            self.public.append(conn)
+            logger.info(f"[WS MANAGER] Opened {conn.name} ({len(self.public)} public connections)")
+        conn.subscriptions.add(key)
+        if self.running:
+            conn.start()
+            await conn.update("subscribe", [key])
+
+    async def unsubscribe(self, symbol: str, channel: str = "price"):
+        key = (channel, symbol.upper())
+        for conn in list(self.public):
+            if key not in conn.subscriptions:
+                continue
+            conn.subscriptions.discard(key)
+            if conn.subscriptions:
+                await conn.update("unsubscribe", [key])
+            else:
+                self.public.remove(conn)
+                await conn.stop()
+                logger.info(f"[WS MANAGER] Closed idle {conn.name}")
+
+    async def run(self, private: WsConnection):
+        """Run the private connection and all public ones until cancelled."""
+        self.private = private
+        self.running = True
+        for conn in self.public:
+            conn.start()
+        private.start()
+        try:
+            await private.task
+        finally:
+            self.running = False
+            await asyncio.gather(*(conn.stop() for conn in [private, *self.public]), return_exceptions=True)
+
+    def status(self) -> dict:
+        conns = ([self.private] if self.private else []) + self.public
+        return {"running": self.running, "connections": {conn.name: conn.status() for conn in conns}}
+
+
+ws_manager = WsManager()
@@ -0,0 +1,171 @@
+"""
+Catch up on position/TP-SL events missed while the private WebSocket was down.
+
+After every (re)login the listener calls ``resync_positions`` before reading
+new messages. It snapshots live positions and pending TP/SL orders over REST,
+compares them with the OPEN/PENDING states in Redis and feeds the implied events
+through the normal message handler, so the same code advances ``step``, moves
+the SL or cleans up a closed position:
+
+* tracked position no longer live         -> ``position`` CLOSE
+* PENDING state whose position is live    -> ``position`` OPEN
+* TP orders gone and live qty lower       -> one ``tpsl`` CLOSE/FILLED per missing TP, in order
+* live qty higher than tracked            -> ``position`` UPDATE
+
+A replayed event may also still be waiting in the socket (it happened after
+subscribe but before the snapshot); ``is_replayed`` lets the handler drop that
+second copy. Anything this cannot explain is left to the reconciler.
+"""
+import json
+import time
+
+from modules import metrics
+from modules.bitunix_client import bitunix_request
+from modules.logger_config import logger
+from modules.order_book import order_book
+from modules.config import TP_DISTRIBUTION
+from modules.orphan_position_checker import fetch_bitunix_positions, fetch_pending_tp_sl, position_direction, \
+    position_qty
+from modules.rate_limiter import PRIORITY_QUERY
+from modules.redis_client import get_redis
+from modules.redis_state_manager import POSITION_SYMBOLS_KEY
+from modules.retry_policy import QUERY_POLICY
+from modules.ws_manager import ws_manager
+
+_replayed = set()
+
+
+def _event_key(topic: str, data: dict):
+    if topic == "tpsl" and data.get("event") == "CLOSE" and data.get("status") == "FILLED":
+        return topic, str(data.get("id") or data.get("orderId"))
+    if topic == "position":
+        key = (topic, str(data.get("positionId")), data.get("event"))
+        return key + ((float(data.get("qty", 0)),) if data.get("event") == "UPDATE" else ())
+    return None
+
+
+def is_replayed(topic: str, data: dict) -> bool:
+    """True (once) if this live event was already applied by the last resync."""
+    key = _event_key(topic, data)
+    if key is not None and key in _replayed:
+        _replayed.discard(key)
+        metrics.incr("ws_resync_duplicates_dropped", topic=topic)
+        return True
+    return False
+
+
+async def _realized_pnl(symbol: str, position_id: str) -> float:
+    try:
+        response = await bitunix_request("get", "/api/v1/futures/position/get_history_positions",
+                                         params={"symbol": symbol, "positionId": position_id},
+                                         priority=PRIORITY_QUERY, retry=QUERY_POLICY)
+        response.raise_for_status()
+        data = response.json().get("data") or {}
+        positions = data.get("positionList", []) if isinstance(data, dict) else data
+        for p in positions:
+            if str(p.get("positionId")) == str(position_id):
+                return float(p.get("realizedPNL", 0))
+    except Exception as e:
+        logger.warning(f"[WS RESYNC] No realized PnL for {symbol} {position_id}: {e}")
+    return 0.0
+
+
+async def _tracked_states(r) -> list:
+    states = []
+    async for key in r.scan_iter(match="position_state:*", count=200):
+        raw = await r.get(key)
+        if raw:
+            state = json.loads(raw)
+            _, symbol, direction = key.split(":")[:3]
+            states.append((symbol, direction, state))
+    if states:
+        # Backfills the index for states written before it existed.
+        await r.sadd(POSITION_SYMBOLS_KEY, *{symbol for symbol, _, _ in states})
+    return states
+
+
+async def _replay(handler, topic: str, data: dict, kind: str):
+    logger.warning(f"[WS RESYNC] Replaying {topic} {data.get('event')} for {data.get('symbol')}: {data}")
+    await handler(json.dumps({"ch": topic, "data": data}))
+    key = _event_key(topic, data)
+    if key is not None:
+        _replayed.add(key)
+    metrics.incr("ws_resync_replayed", kind=kind)
+
+
+async def resync_positions(handler, gap_started: float = None) -> int:
+    """Replay the transitions implied by REST vs Redis through ``handler``; returns how many."""
+    _replayed.clear()
+    live = await fetch_bitunix_positions()
+    if live is None:
+        logger.error("[WS RESYNC] Live positions unavailable; leaving the gap to the reconciler")
+        return 0
+    for p in live:
+        await ws_manager.subscribe(p["symbol"])
+    r = get_redis()
+    live_by_key = {(p["symbol"], position_direction(p)): p for p in live}
+    replayed = 0
+
+    for symbol, direction, state in await _tracked_states(r):
+        position = live_by_key.get((symbol, direction))
+        status = state.get("status")
+        side = "LONG" if direction == "BUY" else "SHORT"
+
+        if status == "OPEN" and position is None:
+            position_id = str(state.get("position_id"))
+            await _replay(handler, "position", {
+                "event": "CLOSE", "positionId": position_id, "symbol": symbol, "side": side, "qty": "0",
+                "realizedPNL": str(await _realized_pnl(symbol, position_id)), "ctime": None,
+            }, "close")
+            replayed += 1
+            continue
+        if position is None:
+            continue
+
+        position_id = str(position["positionId"])
+        live_qty = position_qty(position)
+        if status == "PENDING":
+            await _replay(handler, "position", {
+                "event": "OPEN", "positionId": position_id, "symbol": symbol, "side": side,
+                "qty": str(live_qty), "ctime": None,
+            }, "open")
+            replayed += 1
+            continue
+        if status != "OPEN" or str(state.get("position_id")) != position_id:
+            continue
+
+        tracked_qty = float(state.get("total_qty", 0))
+        pending = order_book.tpsl_orders(symbol)
+        if pending is None:
+            pending = await fetch_pending_tp_sl(symbol)
+        if pending is None:
+            # Every TP would look filled; the reconciler picks the symbol up later.
+            continue
+        pending_ids = {str(o.get("id")) for o in pending}
+        tp_orders = state.get("tp_orders")
+        step = state.get("step", 0)
+        # States rebuilt by older versions only have a list of ids, which says nothing about which TP is which.
+        missing = [(int(label.replace("TP", "")), order_id) for label, order_id in sorted(tp_orders.items())
+                   if int(label.replace("TP", "")) > step and str(order_id) not in pending_ids] \
+            if isinstance(tp_orders, dict) else []
+
+        if missing and live_qty < tracked_qty:
+            tp_side = "SELL" if direction == "BUY" else "BUY"
+            for tp_number, order_id in missing:
+                await _replay(handler, "tpsl", {
+                    "event": "CLOSE", "status": "FILLED", "id": str(order_id), "positionId": position_id,
+                    "symbol": symbol, "side": tp_side, "slQty": 0,
+                    "tpQty": str(round(tracked_qty * TP_DISTRIBUTION[tp_number - 1], 3)),
+                }, "tp_fill")
+                replayed += 1
+        elif live_qty > tracked_qty:
+            await _replay(handler, "position", {
+                "event": "UPDATE", "positionId": position_id, "symbol": symbol, "side": side,
+                "qty": str(live_qty), "ctime": None,
+            }, "qty_increase")
+            replayed += 1
+
+    if gap_started is not None:
+        metrics.observe("ws_gap_seconds", time.monotonic() - gap_started)
+    logger.info(f"[WS RESYNC] Replayed {replayed} missed transitions")
+    return replayed